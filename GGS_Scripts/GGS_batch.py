@@ -0,0 +1,197 @@
+# =========================
+# IMPORTS
+# =========================
+
+import datetime as dt
+import json
+import os
+import time
+
+from GGS_main import GGS_main, GGS_products
+from X_batch import batch_groups, batch_carve, batch_save
+from X_config import GGS_config_import, GGS_config_process, GGS_config_datetimes
+from X_dispatch import dispatch_context, dispatch_stage, dispatch_tasks
+from X_functions import acquire_gliders, optimal_workers
+from X_interpolation import interpolate_rtofs, interpolate_cmems, interpolate_gofs
+from X_models import RTOFS, CMEMS, GOFS
+from X_prefetch import prefetch_union_config
+from X_track import GGS_along_track
+
+# =========================
+
+BATCH_MODELS = {
+    'rtofs': (RTOFS, interpolate_rtofs),
+    'cmems': (CMEMS, interpolate_cmems),
+    'gofs': (GOFS, interpolate_gofs)
+}
+
+### BATCH EXECUTIONER:
+def GGS_batch_executioner(task):
+
+    '''
+    Process a single datetime index for every mission of a batch. Each model is fetched and interpolated once per maximum depth group over the union extent, then carved per mission for its paths and products.
+
+    Args:
+    - task (dict): A dictionary containing all necessary parameters for processing.
+
+    Returns:
+    - None
+    '''
+
+    datetime_index = task['datetime_index']
+    config_flag, root_directory_flag, glider_data_flag = dispatch_context(task)
+    missions = config_flag['BATCH']['missions']
+
+    for group in config_flag['BATCH']['groups']:
+        mission_indices = [i for i in group['missions'] if datetime_index in missions[i]['datetimes']]
+        if not mission_indices:
+            continue
+        union_config = group['config']
+
+        shared_datasets = {}
+        for model_key, (model_class, interpolate) in BATCH_MODELS.items():
+            if not union_config['MODEL'][f"enable_{model_key}"]:
+                continue
+            with dispatch_stage(f"{model_key.upper()} shared processing ({group['max_depth']} m)"):
+                model = model_class()
+                getattr(model, f"{model_key}_load")(union_config, datetime_index)
+                getattr(model, f"{model_key}_save")(union_config, None, save_data=False)
+                depth_average, bin_average = interpolate(union_config, None, model.data, chunk=union_config['MODEL']['chunk'], save_depth_average=False, save_bin_average=False)
+                shared_datasets[model_key] = (model.data, depth_average, bin_average)
+
+        for i in mission_indices:
+            config = missions[i]['config']
+            root_directory = missions[i]['root_directory']
+            sub_directory_plots = os.path.join(root_directory, "plots", ''.join(datetime_index[:10].split('-')))
+            os.makedirs(sub_directory_plots, exist_ok=True)
+            sub_directory_data = os.path.join(root_directory, "data", ''.join(datetime_index[:10].split('-')))
+            os.makedirs(sub_directory_data, exist_ok=True)
+
+            model_datasets = []
+            for model_key, datasets in shared_datasets.items():
+                if not config['MODEL'][f"enable_{model_key}"]:
+                    continue
+                with dispatch_stage(f"{model_key.upper()} carve for {config['MISSION']['mission_name']}"):
+                    carved_datasets = tuple(batch_carve(dataset, config) for dataset in datasets)
+                    batch_save(config, sub_directory_data, carved_datasets)
+                    model_datasets.append(carved_datasets)
+
+            GGS_products(config, root_directory, sub_directory_plots, sub_directory_data, datetime_index, model_datasets, glider_data_flag)
+
+### BATCH:
+def GGS_batch(config_names=None, power=1, path="local", compare_sequential=False):
+
+    '''
+    GGS multi-mission batch function. Missions sharing a maximum depth share their model downloads and interpolation for every datetime.
+
+    Args:
+    - config_names (list): Names of the config files (without the extension).
+    - power (float): Fraction of the CPU cores used as workers.
+        - default: 1
+    - path (str): The path directory to save output to. Options: 'local' or 'rucool'.
+        - default: 'local'
+    - compare_sequential (bool): Also run every config one after another with GGS_main and report the batch wall time against this sequential baseline.
+        - default: False
+
+    Returns:
+    - report (dict): Batch and (optionally) sequential wall times.
+    '''
+
+    if not config_names:
+        print("No config files specified. Exiting.")
+        return
+
+    batch_start = time.perf_counter()
+    run_started = dt.datetime.now(dt.timezone.utc)
+
+    if path == "local":
+        output_path = "default"
+    elif path == "rucool":
+        output_path = "/www/web/rucool/hurricane/model_comparisons/maps/yucatan"
+    else:
+        raise ValueError("Invalid root directory.")
+
+    configs = []
+    missions = []
+    for config_name in config_names:
+        config = GGS_config_import(config_name)
+        if config is None:
+            continue
+        configs.append(config)
+        missions.append({
+            'config': config,
+            'root_directory': GGS_config_process(config, path=output_path),
+            'datetimes': GGS_config_datetimes(config)
+        })
+
+    batch_config = prefetch_union_config(configs)
+    batch_config['MISSION']['mission_name'] = "Batch"
+    batch_root_directory = GGS_config_process(batch_config, path=output_path)
+    batch_config['BATCH'] = {
+        'missions': missions,
+        'groups': batch_groups(configs)
+    }
+
+    glider_dataframes = None
+    if any(config['PRODUCT'].get('show_gliders') for config in configs):
+        (min_lat, min_lon), (max_lat, max_lon) = batch_config['MISSION']['extent']
+        glider_dataframes = acquire_gliders(
+            extent=[min_lon, max_lon, min_lat, max_lat],
+            target_date=max(config['MISSION']['target_date'] for config in configs),
+            date_delta=dt.timedelta(days=1),
+            requested_variables=["time", "longitude", "latitude", "profile_id", "depth"],
+            print_vars=False,
+            target="all",
+            request_timeout=5,
+            enable_parallel=False,
+            track_sync=configs[0]['PRODUCT'].get('glider_track_sync', False),
+            track_resolution=configs[0]['PRODUCT'].get('glider_track_resolution')
+        )
+
+    datetime_list = sorted({datetime_index for mission in missions for datetime_index in mission['datetimes']})
+    tasks = [{
+        'datetime_index': datetime_index
+    } for datetime_index in datetime_list]
+
+    num_workers = optimal_workers(power=power)
+    dispatch_tasks(GGS_batch_executioner, tasks, batch_config, batch_root_directory, glider_dataframes=glider_dataframes, num_workers=num_workers, label="Batch task")
+    for mission in missions:
+        if mission['config']['PRODUCT'].get('along_track'):
+            GGS_along_track(mission['config'], mission['root_directory'], mission['datetimes'])
+
+    report = {
+        'run_started': run_started.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'config_names': list(config_names),
+        'groups': [{'max_depth': group['max_depth'], 'extent': group['config']['MISSION']['extent'], 'missions': [missions[i]['config']['MISSION']['mission_name'] for i in group['missions']]} for group in batch_config['BATCH']['groups']],
+        'batch_wall_time_s': time.perf_counter() - batch_start
+    }
+
+    if compare_sequential:
+        report['sequential_wall_time_s'] = {}
+        for config_name in config_names:
+            sequential_start = time.perf_counter()
+            GGS_main(power=power, path=path, config_name=config_name)
+            report['sequential_wall_time_s'][config_name] = time.perf_counter() - sequential_start
+        sequential_total = sum(report['sequential_wall_time_s'].values())
+        report['speedup'] = sequential_total / report['batch_wall_time_s'] if report['batch_wall_time_s'] > 0 else None
+
+    print(f"\n### BATCH SUMMARY ###\n")
+    for group in report['groups']:
+        print(f"{group['max_depth']} m group, union extent {group['extent']}: {', '.join(group['missions'])}")
+    print(f"Batch wall time: {report['batch_wall_time_s']:.1f} s")
+    if compare_sequential:
+        for config_name, wall_time in report['sequential_wall_time_s'].items():
+            print(f"Sequential {config_name}: {wall_time:.1f} s")
+        print(f"Sequential wall time: {sequential_total:.1f} s (batch speedup {report['speedup']:.2f}x)")
+
+    report_directory = os.path.join(batch_root_directory, "logs")
+    os.makedirs(report_directory, exist_ok=True)
+    report_path = os.path.join(report_directory, f"batch_report_{run_started.strftime('%Y%m%dT%H%M%SZ')}.json")
+    with open(report_path, 'w') as file:
+        json.dump(report, file, indent=2, default=str)
+    print(f"Batch report saved to: {report_path}")
+
+    return report
+
+if __name__ == "__main__":
+    GGS_batch(config_names=["sentinel1", "sentinel2", "sentinel3", "sentinel4", "sentinel5", "sentinel6", "sentinel7", "ru29", "ugos"], power=1, path="local", compare_sequential=False)
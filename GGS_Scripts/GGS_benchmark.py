@@ -0,0 +1,324 @@
+# =========================
+# IMPORTS
+# =========================
+
+import matplotlib
+matplotlib.use('Agg')
+
+import datetime as dt
+import json
+import numpy as np
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from X_functions import compute_optimal_path
+from X_models import RTOFS, CMEMS, GOFS
+from X_interpolation import interpolate_rtofs, interpolate_cmems, interpolate_gofs
+from X_products import GGS_export_gpkg
+from X_render import RENDER_PRODUCTS, render_product_kwargs
+from X_synthetic import synthetic_config, synthetic_rtofs, synthetic_cmems, synthetic_gofs
+from X_trace import trace_collect, trace_peak_rss
+
+# =========================
+
+BENCHMARK_IMPORT_MODULES = {
+    'X_models': 'data',
+    'X_interpolation': 'data',
+    'X_functions': 'data',
+    'GGS_main': 'data',
+    'X_products': 'products',
+    'X_tiles': 'products'
+}
+
+BENCHMARK_HEAVY_MODULES = ('matplotlib', 'cartopy', 'cmocean', 'geopandas', 'shapely', 'pyogrio', 'copernicusmarine', 'erddapy', 'aiohttp')
+
+# BENCHMARK FUNCTIONS
+
+### FUNCTION:
+def benchmark_measure(function, repeats=3):
+
+    '''
+    Time repeated calls of a function.
+
+    Args:
+    - function (callable): Function without arguments to time.
+    - repeats (int): Number of timed calls.
+        - default: 3
+
+    Returns:
+    - measurement (dict): Median, minimum and maximum wall time, median CPU time and peak RSS.
+    - result: Result of the last call.
+    '''
+
+    wall_times = []
+    cpu_times = []
+    for _ in range(repeats):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = function()
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+    trace_collect()
+
+    measurement = {
+        'median_s': statistics.median(wall_times),
+        'min_s': min(wall_times),
+        'max_s': max(wall_times),
+        'cpu_median_s': statistics.median(cpu_times),
+        'peak_rss_mb': trace_peak_rss(),
+        'repeats': repeats
+    }
+
+    return measurement, result
+
+### FUNCTION:
+def benchmark_case(grid_size, num_depths, max_depth=1000, repeats=3, include_products=True):
+
+    '''
+    Benchmark the GGS pipeline stages on synthetic RTOFS-, CMEMS- and GOFS-style datasets of one grid size.
+
+    Args:
+    - grid_size (tuple): Number of (y, x) or (lat, lon) grid points.
+    - num_depths (int): Number of model depth levels.
+    - max_depth (int): Mission maximum depth in meters.
+        - default: 1000
+    - repeats (int): Number of timed calls per stage.
+        - default: 3
+    - include_products (bool): Also benchmark the plot products and the GeoPackage/CSV export.
+        - default: True
+
+    Returns:
+    - results (dict): Measurement per stage name.
+    '''
+
+    print(f"\n### BENCHMARK CASE: {grid_size[0]}x{grid_size[1]}, {num_depths} DEPTHS ###\n")
+
+    datetime_index = "2024-01-01T00:00:00Z"
+    directory = tempfile.mkdtemp(prefix="ggs_benchmark_")
+    results = {}
+    try:
+        config = synthetic_config(directory, max_depth=max_depth)
+        raw_datasets = {
+            'RTOFS': synthetic_rtofs(config, grid_size=grid_size, num_depths=num_depths, datetime_index=datetime_index),
+            'CMEMS': synthetic_cmems(config, grid_size=grid_size, num_depths=num_depths, datetime_index=datetime_index),
+            'GOFS': synthetic_gofs(config, grid_size=grid_size, num_depths=num_depths, datetime_index=datetime_index)
+        }
+        models = {
+            'RTOFS': (RTOFS(), lambda model: model.rtofs_standardize(config, raw_datasets['RTOFS'], datetime_index), interpolate_rtofs),
+            'CMEMS': (CMEMS(username=None, password=None), lambda model: model.cmems_standardize(config, raw_datasets['CMEMS'], dt.datetime.fromisoformat(datetime_index[:19])), interpolate_cmems),
+            'GOFS': (GOFS(), lambda model: model.gofs_standardize(config, raw_datasets['GOFS'], dt.datetime.fromisoformat(datetime_index[:19])), interpolate_gofs)
+        }
+
+        model_datasets = []
+        for model_name, (model, standardize, interpolate) in models.items():
+            results[f"{model_name}_standardize"], _ = benchmark_measure(lambda: (standardize(model), model.data_origin.load()), repeats)
+            model.data = model.data_origin
+            results[f"interpolate_{model_name.lower()}"], (depth_average, bin_average) = benchmark_measure(lambda: interpolate(config, directory, model.data, save_depth_average=False, save_bin_average=False), repeats)
+            model_datasets.append((model.data, depth_average, bin_average))
+
+        cmems_depth_average = model_datasets[1][1].isel(time=0)
+        results['compute_optimal_path'], _ = benchmark_measure(lambda: compute_optimal_path(config, directory, cmems_depth_average, 0.5), repeats)
+
+        if include_products:
+            for product, (flag, plot_function) in RENDER_PRODUCTS.items():
+                results[plot_function.__name__], _ = benchmark_measure(lambda: plot_function(config, directory, datetime_index, model_datasets, **render_product_kwargs(config, product, optimal_paths=[None] * len(model_datasets))), repeats)
+            results['GGS_export_gpkg'], _ = benchmark_measure(lambda: GGS_export_gpkg(directory, datetime_index, model_datasets), repeats)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return results
+
+### FUNCTION:
+def benchmark_imports(modules=BENCHMARK_IMPORT_MODULES, repeats=3):
+
+    '''
+    Time the cold import of the GGS modules in fresh interpreters with 'python -X importtime', as a worker process pays it at startup.
+
+    Args:
+    - modules (dict): Stage ('data' or 'products') per module name. Data stage modules are checked to not import the plotting, GIS or remote data stacks.
+        - default: BENCHMARK_IMPORT_MODULES
+    - repeats (int): Number of timed imports per module.
+        - default: 3
+
+    Returns:
+    - results (dict): Measurement per module, with the heavy modules it imported and its slowest direct imports.
+    '''
+
+    script_directory = os.path.dirname(os.path.abspath(__file__))
+    check = f"import sys; print(','.join(name for name in {BENCHMARK_HEAVY_MODULES!r} if name in sys.modules))"
+
+    results = {}
+    for module, stage in modules.items():
+        import_times = []
+        package_times = {}
+        for _ in range(repeats):
+            process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}; {check}"], cwd=script_directory, capture_output=True, text=True)
+            if process.returncode != 0:
+                print(f"Import of {module} failed: {process.stderr.strip().splitlines()[-1]}")
+                break
+            for line in process.stderr.splitlines():
+                if not line.startswith('import time:') or '|' not in line:
+                    continue
+                fields = line[len('import time:'):].split('|')
+                if not fields[1].strip().isdigit():
+                    continue
+                cumulative_s = int(fields[1]) / 1e6
+                name = fields[2].strip()
+                depth = (len(fields[2]) - len(fields[2].lstrip()) - 1) // 2
+                if depth == 0 and name == module:
+                    import_times.append(cumulative_s)
+                elif depth == 1:
+                    package_times[name] = max(package_times.get(name, 0), cumulative_s)
+            heavy_modules = [name for name in process.stdout.strip().split(',') if name]
+        if not import_times:
+            continue
+
+        results[module] = {
+            'median_s': statistics.median(import_times),
+            'min_s': min(import_times),
+            'max_s': max(import_times),
+            'repeats': len(import_times),
+            'heavy_modules': heavy_modules,
+            'slowest_packages': dict(sorted(package_times.items(), key=lambda item: item[1], reverse=True)[:5])
+        }
+        if stage == 'data' and heavy_modules:
+            print(f"Data stage module {module} imports: {', '.join(heavy_modules)}")
+
+    return results
+
+### FUNCTION:
+def benchmark_compare(results, baseline, tolerance=0.2, min_delta=0.05):
+
+    '''
+    Compare benchmark results against a baseline and flag regressions.
+
+    Args:
+    - results (dict): Measurement per benchmark key.
+    - baseline (dict): Baseline measurement per benchmark key.
+    - tolerance (float): Allowed relative slowdown of the median wall time.
+        - default: 0.2
+    - min_delta (float): Minimum absolute slowdown in seconds for a regression, to ignore noise on very fast stages.
+        - default: 0.05
+
+    Returns:
+    - comparison (dict): Baseline median, ratio and regression flag per benchmark key present in both.
+    '''
+
+    comparison = {}
+    for key, measurement in results.items():
+        if key not in baseline:
+            continue
+        baseline_median = baseline[key]['median_s']
+        ratio = measurement['median_s'] / baseline_median if baseline_median > 0 else np.inf
+        comparison[key] = {
+            'baseline_median_s': baseline_median,
+            'median_s': measurement['median_s'],
+            'ratio': ratio,
+            'regression': ratio > 1 + tolerance and measurement['median_s'] - baseline_median > min_delta
+        }
+
+    return comparison
+
+### MAIN:
+def GGS_benchmark(grid_sizes=((150, 150), (400, 400)), num_depths=40, max_depth=1000, repeats=3, include_products=True, include_imports=True, output_path=None, baseline_path=None, save_baseline=False, tolerance=0.2):
+
+    '''
+    GGS offline benchmark on synthetic ocean model datasets.
+
+    Args:
+    - grid_sizes (tuple): Grid sizes to benchmark, as (y, x) or (lat, lon) point counts.
+        - default: ((150, 150), (400, 400))
+    - num_depths (int): Number of model depth levels.
+        - default: 40
+    - max_depth (int): Mission maximum depth in meters.
+        - default: 1000
+    - repeats (int): Number of timed calls per stage.
+        - default: 3
+    - include_products (bool): Also benchmark the plot products and the GeoPackage/CSV export.
+        - default: True
+    - include_imports (bool): Also benchmark the cold import time of the GGS modules.
+        - default: True
+    - output_path (str or None): Path of the results JSON. None saves to 'benchmarks/benchmark_<time>.json'.
+        - default: None
+    - baseline_path (str or None): Path of the baseline JSON. None uses 'benchmarks/baseline.json'.
+        - default: None
+    - save_baseline (bool): Save these results as the new baseline.
+        - default: False
+    - tolerance (float): Allowed relative slowdown of the median wall time before a stage is flagged.
+        - default: 0.2
+
+    Returns:
+    - regressions (list): Benchmark keys flagged as regressions.
+    '''
+
+    benchmark_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+    os.makedirs(benchmark_directory, exist_ok=True)
+    run_time = dt.datetime.now(dt.timezone.utc)
+    output_path = output_path or os.path.join(benchmark_directory, f"benchmark_{run_time.strftime('%Y%m%dT%H%M%SZ')}.json")
+    baseline_path = baseline_path or os.path.join(benchmark_directory, "baseline.json")
+
+    results = {}
+    for grid_size in grid_sizes:
+        case_results = benchmark_case(tuple(grid_size), num_depths, max_depth=max_depth, repeats=repeats, include_products=include_products)
+        for stage, measurement in case_results.items():
+            results[f"{grid_size[0]}x{grid_size[1]}x{num_depths}/{stage}"] = measurement
+    if include_imports:
+        for module, measurement in benchmark_imports(repeats=repeats).items():
+            results[f"import/{module}"] = measurement
+
+    report = {
+        'metadata': {
+            'run_time': run_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'repeats': repeats
+        },
+        'results': results
+    }
+
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as file:
+            baseline = json.load(file)['results']
+        report['comparison'] = benchmark_compare(results, baseline, tolerance=tolerance)
+
+    with open(output_path, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nBenchmark results saved to: {output_path}")
+    if save_baseline:
+        with open(baseline_path, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Benchmark baseline saved to: {baseline_path}")
+
+    print(f"\n### BENCHMARK RESULTS ###\n")
+    print(f"{'Stage':<48} {'Median (s)':>11} {'Min (s)':>9} {'Baseline (s)':>13} {'Ratio':>7}")
+    regressions = []
+    comparison = report.get('comparison', {})
+    for key, measurement in results.items():
+        entry = comparison.get(key)
+        baseline_text = f"{entry['baseline_median_s']:>13.3f} {entry['ratio']:>7.2f}" if entry else f"{'-':>13} {'-':>7}"
+        flag = "  REGRESSION" if entry and entry['regression'] else ""
+        print(f"{key:<48} {measurement['median_s']:>11.3f} {measurement['min_s']:>9.3f} {baseline_text}{flag}")
+        if entry and entry['regression']:
+            regressions.append(key)
+
+    if baseline is None:
+        print(f"\nNo baseline found at {baseline_path}. Run with save_baseline=True to create one.")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%}: {', '.join(regressions)}")
+    else:
+        print(f"\nNo regressions beyond {tolerance:.0%}.")
+
+    return regressions
+
+if __name__ == "__main__":
+    GGS_benchmark(grid_sizes=((150, 150), (400, 400)), num_depths=40, repeats=3, save_baseline=False)
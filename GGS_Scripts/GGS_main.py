@@ -6,19 +6,52 @@ from X_functions import *
 from X_config import *
 from X_models import *
 from X_interpolation import *
+from X_storage import *
+from X_derived import *
 from X_products import *
-
-from concurrent.futures import ProcessPoolExecutor
+from X_render import *
+from X_tiles import *
+from X_track import *
+from X_dispatch import *
 
 # =========================
 # MAIN
 # =========================
 
+### ANALYSIS:
+def GGS_analysis(config_flag, sub_directory_data, model_datasets):
+
+    '''
+    Run the analysis stages shared by the products and the reprocessor of a single datetime: the derived fields and the optimal paths.
+
+    Args:
+    - config_flag (dict): Glider Guidance System mission configuration.
+    - sub_directory_data (str): Data output directory of the datetime.
+    - model_datasets (list): (model data, depth average, bin average) tuple per model.
+
+    Returns:
+    - model_datasets (list): The model dataset tuples with the derived depth averages.
+    - optimal_paths (list): The optimal path per model, None where it is disabled or failed.
+    '''
+
+    with dispatch_stage("derived fields"):
+        model_datasets = derived_stage(config_flag, sub_directory_data, model_datasets)
+
+    optimal_paths = [None] * len(model_datasets)
+    if config_flag['PRODUCT']['compute_optimal_path']:
+        for index, model_data in enumerate(model_datasets):
+            try:
+                optimal_paths[index] = compute_optimal_path(config_flag, sub_directory_data, model_data[1], 0.5)
+            except Exception as e:
+                dispatch_error(f"{model_data[1].attrs.get('model_name')} optimal path computation", e)
+
+    return model_datasets, optimal_paths
+
 ### REPROCESSOR:
 def GGS_reprocessor(task):
 
     '''
-    Reprocess all datafiles in the 'reprocess' directory.
+    Reprocess the depth average datafiles of a single datetime from the 'reprocess' directory.
 
     Args:
     - task (dict): A dictionary containing all necessary parameters for processing.
@@ -27,48 +60,19 @@ def GGS_reprocessor(task):
     - None
     '''
 
-    current_directory = os.path.dirname(__file__)
-    reprocess_path = os.path.join(current_directory, "data/reprocess")
+    datetime_index = task['datetime_index']
+    model_files = task['model_files_flag']
 
     model_datasets = []
-    model_files = glob.glob(os.path.join(reprocess_path, '*.nc'))
-    for model_file in model_files:
-        depth_average_dataset = xr.open_dataset(model_file)
-        model_name = depth_average_dataset.attrs['model_name']
-        if model_name == 'RTOFS':
-            rtofs_datasets = (None, depth_average_dataset, None)
-            model_datasets.append(rtofs_datasets)
-        elif model_name == 'CMEMS':
-            cmems_datasets = (None, depth_average_dataset, None)
-            model_datasets.append(cmems_datasets)
-        elif model_name == 'GOFS':
-            gofs_datasets = (None, depth_average_dataset, None)
-            model_datasets.append(gofs_datasets)
+    for model_name in ('RTOFS', 'CMEMS', 'GOFS'):
+        if model_name in model_files:
+            depth_average_dataset = storage_open(model_files[model_name])
+            model_datasets.append((None, depth_average_dataset, None))
 
-    datetime_index = model_datasets[0][1].attrs['model_datetime']
-    config_flag = task['config_flag']
-    root_directory_flag = task['root_directory_flag']
-    glider_data_flag = task['glider_data_flag']
+    config_flag, root_directory_flag, glider_data_flag = dispatch_context(task)
 
-    create_magnitude_plot_flag = config_flag['PRODUCT']['create_magnitude_plot']
-    create_threshold_plot_flag = config_flag['PRODUCT']['create_threshold_plot']
-    create_advantage_plot_flag = config_flag['PRODUCT']['create_advantage_plot']
-    create_profiles_plot_flag = config_flag['PRODUCT']['create_profile_plot']
     create_gpkg_file_flag = config_flag['PRODUCT']['create_gpkg_file']
-    latitude_qc_flag = config_flag['PRODUCT']['latitude_qc']
-    longitude_qc_flag = config_flag['PRODUCT']['longitude_qc']
-    density_flag = config_flag['PRODUCT']['density']
-    mag1_flag = config_flag['PRODUCT']['mag1']
-    mag2_flag = config_flag['PRODUCT']['mag2']
-    mag3_flag = config_flag['PRODUCT']['mag3']
-    mag4_flag = config_flag['PRODUCT']['mag4']
-    mag5_flag = config_flag['PRODUCT']['mag5']
-    tolerance_flag = config_flag['PRODUCT']['tolerance']
-    show_waypoints_flag = config_flag['PRODUCT']['show_waypoints']
-    show_eez_flag = config_flag['PRODUCT']['show_eez']
-    show_qc_flag = config_flag['PRODUCT']['show_qc']
-    manual_extent_flag = config_flag['PRODUCT']['manual_extent']
-    compute_optimal_path_flag = config_flag['PRODUCT']['compute_optimal_path']
+    create_tiles_flag = config_flag['PRODUCT'].get('create_tiles', False)
     
     sub_directory_plots = os.path.join(root_directory_flag, "REPROCESSED", "plots", ''.join(datetime_index[:10].split('-')))
     os.makedirs(sub_directory_plots, exist_ok=True)
@@ -83,75 +87,106 @@ def GGS_reprocessor(task):
     else:
         print(f"Datetime {datetime_index} unprocessed, proceeding with task.")
 
-    if compute_optimal_path_flag:
-        optimal_paths = []
-        try:
-            for model_data in model_datasets:
-                optimal_path = compute_optimal_path(config_flag, sub_directory_data, model_data[1], 0.5)
-                optimal_paths.append(optimal_path)
-        except Exception as e:
-            optimal_paths.append(None)
-            print(f"Error during optimal path computation for a model: {e}")
-    else:
-        optimal_paths = [None] * len(model_datasets)
+    model_datasets, optimal_paths = GGS_analysis(config_flag, sub_directory_data, model_datasets)
 
-    if create_magnitude_plot_flag:
-        GGS_plot_magnitude(
+    with dispatch_stage("plot rendering"):
+        GGS_render_products(
             config_flag,
             sub_directory_plots,
             datetime_index,
             model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            density=density_flag,
             gliders=glider_data_flag,
-            show_waypoints=show_waypoints_flag, show_eez=show_eez_flag, show_qc=show_qc_flag,
-            manual_extent=manual_extent_flag,
             optimal_paths=optimal_paths
         )
-    if create_threshold_plot_flag:
-        GGS_plot_threshold(
-            config_flag,
-            sub_directory_plots,
-            datetime_index,
-            model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            density=density_flag,
-            mag1=mag1_flag, mag2=mag2_flag, mag3=mag3_flag, mag4=mag4_flag, mag5=mag5_flag,
-            gliders=glider_data_flag,
-            show_waypoints=show_waypoints_flag, show_eez=show_eez_flag, show_qc=show_qc_flag,
-            manual_extent=manual_extent_flag,
-            optimal_paths=optimal_paths
-        )
-    if create_advantage_plot_flag:
-        GGS_plot_advantage(
+    if create_tiles_flag:
+        with dispatch_stage("tile export"):
+            GGS_export_tiles(
+                config_flag,
+                os.path.join(root_directory_flag, "REPROCESSED", "tiles"),
+                datetime_index,
+                model_datasets
+            )
+    if create_gpkg_file_flag:
+        with dispatch_stage("vector export"):
+            GGS_export_gpkg(
+                sub_directory_data,
+                datetime_index,
+                model_datasets,
+                export_formats=config_flag['PRODUCT'].get('export_formats', ["csv", "gpkg"]),
+                chunk_size=config_flag['PRODUCT'].get('export_chunk_size', 250000)
+            )
+
+### PRODUCTS:
+def GGS_products(config_flag, root_directory_flag, sub_directory_plots, sub_directory_data, datetime_index, model_datasets, glider_data_flag):
+
+    '''
+    Store, route and render the products of a single datetime from its model datasets.
+
+    Args:
+    - config_flag (dict): Glider Guidance System mission configuration.
+    - root_directory_flag (str): Root output directory of the mission.
+    - sub_directory_plots (str): Plot output directory of the datetime.
+    - sub_directory_data (str): Data output directory of the datetime.
+    - datetime_index (str): Datetime index.
+    - model_datasets (list): (model data, depth average, bin average) tuple per model.
+    - glider_data_flag (pandas.DataFrame or None): The concatenated glider datasets.
+
+    Returns:
+    - None
+    '''
+
+    create_gpkg_file_flag = config_flag['PRODUCT']['create_gpkg_file']
+    create_tiles_flag = config_flag['PRODUCT'].get('create_tiles', False)
+
+    if config_flag['MODEL'].get('store_depth_average'):
+        store_settings = storage_config(config_flag, 'depth_average')
+        for model_data in model_datasets:
+            with dispatch_stage(f"{model_data[1].attrs['model_name']} depth average store append"):
+                store_path = storage_store_path(
+                    os.path.join(root_directory_flag, "data", "store"),
+                    config_flag['MISSION'].get('mission_name', 'UnknownMission'),
+                    model_data[1].attrs['model_name'],
+                    storage_format=store_settings['storage_format']
+                )
+                storage_append(model_data[1], store_path, layout=store_settings['layout'], compression_level=store_settings['compression_level'])
+
+    if config_flag['ADVANCED'].get('storage_report'):
+        for model_data in model_datasets:
+            if model_data[2] is not None:
+                storage_report(model_data[2], os.path.join(sub_directory_data, "storage_report"), name=f"{model_data[2].attrs['model_name']}_BinAverage")
+
+    model_datasets, optimal_paths = GGS_analysis(config_flag, sub_directory_data, model_datasets)
+
+    with dispatch_stage("plot rendering"):
+        GGS_render_products(
             config_flag,
             sub_directory_plots,
             datetime_index,
             model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            density=density_flag,
-            tolerance=tolerance_flag,
-            mag1=mag1_flag, mag2=mag2_flag, mag3=mag3_flag, mag4=mag4_flag, mag5=mag5_flag,
             gliders=glider_data_flag,
-            show_waypoints=show_waypoints_flag, show_eez=show_eez_flag, show_qc=show_qc_flag,
-            manual_extent=manual_extent_flag,
             optimal_paths=optimal_paths
         )
-    if create_profiles_plot_flag:
-        GGS_plot_profiles(
-            config_flag,
-            sub_directory_plots,
-            datetime_index,
-            model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            threshold=0.5
-        )
+    if config_flag['PRODUCT'].get('along_track'):
+        for model_data in model_datasets:
+            with dispatch_stage(f"{model_data[1].attrs['model_name']} along-track sampling"):
+                track_sample_snapshot(config_flag, sub_directory_data, model_data[1], model_data[2], glider_dataframes=glider_data_flag)
+    if create_tiles_flag:
+        with dispatch_stage("tile export"):
+            GGS_export_tiles(
+                config_flag,
+                os.path.join(root_directory_flag, "tiles"),
+                datetime_index,
+                model_datasets
+            )
     if create_gpkg_file_flag:
-        GGS_export_gpkg(
-            sub_directory_data,
-            datetime_index,
-            model_datasets
-        )
+        with dispatch_stage("vector export"):
+            GGS_export_gpkg(
+                sub_directory_data,
+                datetime_index,
+                model_datasets,
+                export_formats=config_flag['PRODUCT'].get('export_formats', ["csv", "gpkg"]),
+                chunk_size=config_flag['PRODUCT'].get('export_chunk_size', 250000)
+            )
 
 ### EXECUTIONER:
 def GGS_executioner(task):
@@ -167,9 +202,7 @@ def GGS_executioner(task):
     '''
     
     datetime_index = task['datetime_index']
-    config_flag = task['config_flag']
-    root_directory_flag = task['root_directory_flag']
-    glider_data_flag = task['glider_data_flag']
+    config_flag, root_directory_flag, glider_data_flag = dispatch_context(task)
     
     enable_rtofs_flag = config_flag['MODEL']['enable_rtofs']
     enable_cmems_flag = config_flag['MODEL']['enable_cmems']
@@ -178,26 +211,6 @@ def GGS_executioner(task):
     save_depth_average_flag = config_flag['MODEL']['save_depth_average']
     save_bin_average_flag = config_flag['MODEL']['save_bin_average']
     chunk_flag = config_flag['MODEL']['chunk']
-
-    create_magnitude_plot_flag = config_flag['PRODUCT']['create_magnitude_plot']
-    create_threshold_plot_flag = config_flag['PRODUCT']['create_threshold_plot']
-    create_advantage_plot_flag = config_flag['PRODUCT']['create_advantage_plot']
-    create_profiles_plot_flag = config_flag['PRODUCT']['create_profile_plot']
-    create_gpkg_file_flag = config_flag['PRODUCT']['create_gpkg_file']
-    latitude_qc_flag = config_flag['PRODUCT']['latitude_qc']
-    longitude_qc_flag = config_flag['PRODUCT']['longitude_qc']
-    density_flag = config_flag['PRODUCT']['density']
-    mag1_flag = config_flag['PRODUCT']['mag1']
-    mag2_flag = config_flag['PRODUCT']['mag2']
-    mag3_flag = config_flag['PRODUCT']['mag3']
-    mag4_flag = config_flag['PRODUCT']['mag4']
-    mag5_flag = config_flag['PRODUCT']['mag5']
-    tolerance_flag = config_flag['PRODUCT']['tolerance']
-    show_waypoints_flag = config_flag['PRODUCT']['show_waypoints']
-    show_eez_flag = config_flag['PRODUCT']['show_eez']
-    show_qc_flag = config_flag['PRODUCT']['show_qc']
-    manual_extent_flag = config_flag['PRODUCT']['manual_extent']
-    compute_optimal_path_flag = config_flag['PRODUCT']['compute_optimal_path']
     
     sub_directory_plots = os.path.join(root_directory_flag, "plots", ''.join(datetime_index[:10].split('-')))
     os.makedirs(sub_directory_plots, exist_ok=True)
@@ -214,7 +227,7 @@ def GGS_executioner(task):
     
     model_datasets = []
     if enable_rtofs_flag:
-        try:
+        with dispatch_stage("RTOFS processing"):
             rtofs = RTOFS()
             rtofs.rtofs_load(config_flag, datetime_index)
             rtofs.rtofs_save(config_flag, sub_directory_data, save_data=save_model_data_flag)
@@ -222,21 +235,17 @@ def GGS_executioner(task):
             rtofs_depth_average, rtofs_bin_average = interpolate_rtofs(config_flag, sub_directory_data, rtofs_model_data, chunk=chunk_flag, save_depth_average=save_depth_average_flag, save_bin_average=save_bin_average_flag)
             rtofs_datasets = (rtofs_model_data, rtofs_depth_average, rtofs_bin_average)
             model_datasets.append(rtofs_datasets)
-        except Exception as e:
-            print(f"Error during RTOFS processing: {e}")
     if enable_cmems_flag:
-        try:
-            cmems = CMEMS(username='sfricano1', password='GlobalGliders1')
+        with dispatch_stage("CMEMS processing"):
+            cmems = CMEMS()
             cmems.cmems_load(config_flag, datetime_index)
             cmems.cmems_save(config_flag, sub_directory_data, save_data=save_model_data_flag)
             cmems_model_data = cmems.data
             cmems_depth_average, cmems_bin_average = interpolate_cmems(config_flag, sub_directory_data, cmems_model_data, chunk=chunk_flag, save_depth_average=save_depth_average_flag, save_bin_average=save_bin_average_flag)
             cmems_datasets = (cmems_model_data, cmems_depth_average, cmems_bin_average)
             model_datasets.append(cmems_datasets)
-        except Exception as e:
-            print(f"Error during CMEMS processing: {e}")
     if enable_gofs_flag:
-        try:
+        with dispatch_stage("GOFS processing"):
             gofs = GOFS()
             gofs.gofs_load(config_flag, datetime_index)
             gofs.gofs_save(config_flag, sub_directory_data, save_data=save_model_data_flag)
@@ -244,81 +253,11 @@ def GGS_executioner(task):
             gofs_depth_average, gofs_bin_average = interpolate_gofs(config_flag, sub_directory_data, gofs_model_data, chunk=chunk_flag, save_depth_average=save_depth_average_flag, save_bin_average=save_bin_average_flag)
             gofs_datasets = (gofs_model_data, gofs_depth_average, gofs_bin_average)
             model_datasets.append(gofs_datasets)
-        except Exception as e:
-            print(f"Error during GOFS processing: {e}")
     
-    if compute_optimal_path_flag:
-        optimal_paths = []
-        try:
-            for model_data in model_datasets:
-                optimal_path = compute_optimal_path(config_flag, sub_directory_data, model_data[1], 0.5)
-                optimal_paths.append(optimal_path)
-        except Exception as e:
-            optimal_paths.append(None)
-            print(f"Error during optimal path computation for a model: {e}")
-    else:
-        optimal_paths = [None] * len(model_datasets)
-
-    if create_magnitude_plot_flag:
-        GGS_plot_magnitude(
-            config_flag,
-            sub_directory_plots,
-            datetime_index,
-            model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            density=density_flag,
-            gliders=glider_data_flag,
-            show_waypoints=show_waypoints_flag, show_eez=show_eez_flag, show_qc=show_qc_flag,
-            manual_extent=manual_extent_flag,
-            optimal_paths=optimal_paths
-        )
-    if create_threshold_plot_flag:
-        GGS_plot_threshold(
-            config_flag,
-            sub_directory_plots,
-            datetime_index,
-            model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            density=density_flag,
-            mag1=mag1_flag, mag2=mag2_flag, mag3=mag3_flag, mag4=mag4_flag, mag5=mag5_flag,
-            gliders=glider_data_flag,
-            show_waypoints=show_waypoints_flag, show_eez=show_eez_flag, show_qc=show_qc_flag,
-            manual_extent=manual_extent_flag,
-            optimal_paths=optimal_paths
-        )
-    if create_advantage_plot_flag:
-        GGS_plot_advantage(
-            config_flag,
-            sub_directory_plots,
-            datetime_index,
-            model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            density=density_flag,
-            tolerance=tolerance_flag,
-            mag1=mag1_flag, mag2=mag2_flag, mag3=mag3_flag, mag4=mag4_flag, mag5=mag5_flag,
-            gliders=glider_data_flag,
-            show_waypoints=show_waypoints_flag, show_eez=show_eez_flag, show_qc=show_qc_flag,
-            manual_extent=manual_extent_flag,
-            optimal_paths=optimal_paths
-        )
-    if create_profiles_plot_flag:
-        GGS_plot_profiles(
-            config_flag,
-            sub_directory_plots,
-            datetime_index,
-            model_datasets,
-            latitude_qc=latitude_qc_flag, longitude_qc=longitude_qc_flag,
-            threshold=0.5
-        )
-    if create_gpkg_file_flag:
-        GGS_export_gpkg(
-            sub_directory_data,
-            datetime_index,
-            model_datasets
-        )
+    GGS_products(config_flag, root_directory_flag, sub_directory_plots, sub_directory_data, datetime_index, model_datasets, glider_data_flag)
 
 ### MAIN:
-def GGS_main(power=1, path="local", config_name=None):
+def GGS_main(power=1, path="local", config_name=None, overrides=None, datetimes=None, executor=None):
     
     '''
     GGS main function.
@@ -326,16 +265,24 @@ def GGS_main(power=1, path="local", config_name=None):
     Args:
     - config_name (str): The name of the config file without the extension.
     - path (str): The path directory to save output to. Options: 'local' or a specific directory path.
+    - overrides (dict or None): Settings per config section replacing the config file values.
+        - default: None
+    - datetimes (list or None): Datetime indexes ('%Y-%m-%dT%H:%M:%SZ') to process out of the configured ones, e.g. for single datetime reruns. None processes all of them.
+        - default: None
+    - executor (concurrent.futures.ProcessPoolExecutor or None): Running worker pool to dispatch the tasks to (the GGS service's warm workers). None starts a pool for this run.
+        - default: None
     
     Returns:
-    - None
+    - summary (dict or None): Run summary of the dispatched tasks.
     '''
 
     if config_name is None:
         print("No config file specified. Exiting.")
         return
 
-    config = GGS_config_import(config_name)
+    config = GGS_config_import(config_name, overrides=overrides)
+    if config is None:
+        return
     
     target_datetime = config['MISSION'].get('target_date')
     if not target_datetime:
@@ -349,13 +296,9 @@ def GGS_main(power=1, path="local", config_name=None):
     else:
         raise ValueError("Invalid root directory.")
     
-    if config['MODEL'].get('single_datetime'):
-        datetime_list = [target_datetime.replace(hour=0, minute=0, second=0, microsecond=0).strftime('%Y-%m-%dT%H:%M:%SZ')]
-    else:
-        datetime_start = target_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
-        datetime_end = datetime_start + dt.timedelta(days=1)
-        datetime_range = pd.date_range(datetime_start, datetime_end, freq='6H').tz_localize(None)
-        datetime_list = [datetime.strftime('%Y-%m-%dT%H:%M:%SZ') for datetime in datetime_range]
+    datetime_list = GGS_config_datetimes(config)
+    if datetimes is not None:
+        datetime_list = [datetime_index for datetime_index in datetime_list if datetime_index in datetimes]
 
     glider_dataframes = None
     if config['PRODUCT'].get('show_gliders'):
@@ -370,31 +313,34 @@ def GGS_main(power=1, path="local", config_name=None):
             print_vars=False,
             target="all",
             request_timeout=5,
-            enable_parallel=False
+            enable_parallel=False,
+            track_sync=config['PRODUCT'].get('glider_track_sync', False),
+            track_resolution=config['PRODUCT'].get('glider_track_resolution')
         )
     
     if config['ADVANCED']['reprocess']:
         print(f"\n### !!!WARNING!!!: REPROCESSING MODE ENABLED ###\n")
-        task = {
-            'config_flag': config,
-            'root_directory_flag': root_directory,
-            'glider_data_flag': glider_dataframes
-        }
-        GGS_reprocessor(task)
-    else:
+        reprocess_path = os.path.join(os.path.dirname(__file__), "data/reprocess")
+        reprocess_files = glob.glob(os.path.join(reprocess_path, '*.nc')) + glob.glob(os.path.join(reprocess_path, '*.zarr'))
+        reprocess_groups = storage_group_files(reprocess_files)
         tasks = [{
             'datetime_index': datetime_index,
-            'config_flag': config,
-            'root_directory_flag': root_directory,
-            'glider_data_flag': glider_dataframes
+            'model_files_flag': model_files
+        } for datetime_index, model_files in reprocess_groups.items()]
+
+        num_workers = optimal_workers(power=power)
+        summary = dispatch_tasks(GGS_reprocessor, tasks, config, root_directory, glider_dataframes=glider_dataframes, num_workers=num_workers, label="Reprocess task", executor=executor)
+    else:
+        tasks = [{
+            'datetime_index': datetime_index
         } for datetime_index in datetime_list]
 
         num_workers = optimal_workers(power=power)
-        with ProcessPoolExecutor(max_workers=num_workers) as executor:
-            print("Starting parallel processing with the following tasks:")
-            for i, task in enumerate(tasks, start=1):
-                print(f"Task {i}: {task['datetime_index']}")
-            executor.map(GGS_executioner, tasks)
+        summary = dispatch_tasks(GGS_executioner, tasks, config, root_directory, glider_dataframes=glider_dataframes, num_workers=num_workers, executor=executor)
+        if config['PRODUCT'].get('along_track'):
+            GGS_along_track(config, root_directory, datetime_list)
+
+    return summary
 
 if __name__ == "__main__":
     GGS_main(power=1, path="local", config_name="sentinel1")
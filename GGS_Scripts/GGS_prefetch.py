@@ -0,0 +1,58 @@
+# =========================
+# IMPORTS
+# =========================
+
+import time
+
+from X_config import GGS_config_import
+from X_prefetch import prefetch_union_config, prefetch_cycle, prefetch_prune
+from X_sources import source_cache_directory
+from X_trace import trace_span, trace_collect
+
+# =========================
+
+### MAIN:
+def GGS_prefetch(config_names=None, interval=900, window_days=1, retention_days=3, once=False):
+
+    '''
+    GGS prefetch daemon. Watches the model sources for new forecast datetimes and caches the union of the mission extents and depths once, so scheduled runs with 'prefetch_cache' enabled carve their subsets locally.
+
+    Args:
+    - config_names (list): Names of the config files (without the extension) whose missions are prefetched.
+    - interval (float): Seconds between catalog checks.
+        - default: 900
+    - window_days (int): Days after today 00Z prefetched, 6-hourly.
+        - default: 1
+    - retention_days (float): Days of model datetimes kept in the cache.
+        - default: 3
+    - once (bool): Run a single prefetch pass and return.
+        - default: False
+
+    Returns:
+    - None
+    '''
+
+    if not config_names:
+        print("No config files specified. Exiting.")
+        return
+
+    configs = [config for config in (GGS_config_import(config_name) for config_name in config_names) if config is not None]
+    union_config = prefetch_union_config(configs)
+    directory = source_cache_directory(configs[0])
+
+    print(f"\n### PREFETCH: {', '.join(config_names)} ###\n")
+    print(f"Union extent: {union_config['MISSION']['extent']}, max depth: {union_config['MISSION']['max_depth']} m")
+    print(f"Prefetch cache: {directory}")
+
+    while True:
+        with trace_span("prefetch cycle"):
+            fetched = prefetch_cycle(union_config, directory, window_days=window_days)
+            removed = prefetch_prune(directory, retention_days=retention_days)
+        trace_collect()
+        print(f"Prefetch cycle complete: {len(fetched)} datetime(s) fetched, {removed} expired file(s) removed.")
+        if once:
+            return
+        time.sleep(interval)
+
+if __name__ == "__main__":
+    GGS_prefetch(config_names=["sentinel1", "sentinel2", "sentinel3", "sentinel4", "sentinel5", "sentinel6", "sentinel7", "ru29", "ugos"], interval=900)
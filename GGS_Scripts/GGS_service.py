@@ -0,0 +1,47 @@
+# =========================
+# IMPORTS
+# =========================
+
+from GGS_main import GGS_main
+from X_config import GGS_config_import
+from X_functions import optimal_workers
+from X_service import SERVICE_CATALOG_TTL, service_start, service_serve
+
+# =========================
+
+### MAIN:
+def GGS_service(config_name=None, host="127.0.0.1", port=8090, power=1, catalog_ttl=SERVICE_CATALOG_TTL):
+
+    '''
+    Run GGS as a long-lived service. Warm worker processes keep the libraries imported, the basemaps and bathymetry loaded and the remote model catalogs open, and run requests (a config name plus overrides) posted to the HTTP API are queued and run on them one after another.
+
+    Args:
+    - config_name (str): The name of the config file (without the extension) used to warm the workers.
+    - host (str): Host to bind.
+        - default: '127.0.0.1'
+    - port (int): Port to serve the API on.
+        - default: 8090
+    - power (float): Fraction of the CPU cores used as warm workers.
+        - default: 1
+    - catalog_ttl (float): Seconds a worker keeps a remote model catalog open before reopening it for new forecast datetimes.
+        - default: SERVICE_CATALOG_TTL
+
+    Returns:
+    - None
+    '''
+
+    if config_name is None:
+        print("No config file specified. Exiting.")
+        return
+
+    config = GGS_config_import(config_name)
+    if config is None:
+        return
+
+    print(f"\n### GGS SERVICE ###\n")
+    service = service_start(GGS_main, config, num_workers=optimal_workers(power=power), power=power, catalog_ttl=catalog_ttl)
+    print('Example request: curl -X POST -d \'{"config_name": "' + config_name + '", "overrides": {"MODEL": {"single_datetime": true}}}\' ' + f"http://{host}:{port}/runs")
+    service_serve(service, host=host, port=port, background=False)
+
+if __name__ == "__main__":
+    GGS_service(config_name="sentinel1", host="127.0.0.1", port=8090, power=1)
@@ -0,0 +1,55 @@
+# =========================
+# IMPORTS
+# =========================
+
+import json
+import os
+
+from X_config import GGS_config_import
+from X_standin import standin_write_fixtures, standin_serve, standin_endpoints
+
+# =========================
+
+### MAIN:
+def GGS_standin(config_name=None, port=8080, latency=0.0, bandwidth=None, grid_size=(300, 300), num_depths=40, overwrite=False):
+
+    '''
+    Run the local model stand-in server for offline end-to-end GGS runs.
+    Recorded model files placed in 'data/standin' are served as they are; missing models are filled with synthetic aggregations covering the mission extent.
+
+    Args:
+    - config_name (str): The name of the config file without the extension.
+    - port (int): Port to serve on.
+        - default: 8080
+    - latency (float): Simulated latency per request, in seconds.
+        - default: 0.0
+    - bandwidth (float or None): Simulated bandwidth in bytes per second. None is unthrottled.
+        - default: None
+    - grid_size (tuple): Number of horizontal grid points of the synthetic aggregations.
+        - default: (300, 300)
+    - num_depths (int): Number of depth levels of the synthetic aggregations.
+        - default: 40
+    - overwrite (bool): Regenerate the synthetic aggregations.
+        - default: False
+
+    Returns:
+    - None
+    '''
+
+    if config_name is None:
+        print("No config file specified. Exiting.")
+        return
+
+    config = GGS_config_import(config_name)
+    datetime_index = config['MISSION']['target_date'].replace(hour=0, minute=0, second=0, microsecond=0).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    standin_directory = os.path.join(os.path.dirname(__file__), "data", "standin")
+    fixture_files = standin_write_fixtures(standin_directory, config, grid_size=grid_size, num_depths=num_depths, datetime_index=datetime_index, overwrite=overwrite)
+
+    print(f"\n### STAND-IN SERVER ###\n")
+    print("Add the following to the MODEL section of the config to use the stand-in server:")
+    print(json.dumps({'endpoints': standin_endpoints(f"http://127.0.0.1:{port}", fixture_files)}, indent=2))
+    standin_serve(standin_directory, port=port, latency=latency, bandwidth=bandwidth, background=False)
+
+if __name__ == "__main__":
+    GGS_standin(config_name="sentinel1", port=8080, latency=0.05, bandwidth=5e6)
@@ -0,0 +1,107 @@
+# =========================
+# IMPORTS
+# =========================
+
+import numpy as np
+import os
+
+from X_functions import format_save_datetime
+from X_prefetch import prefetch_union_config
+from X_storage import storage_save, storage_config
+
+# =========================
+
+# BATCH FUNCTIONS
+
+### FUNCTION:
+def batch_groups(configs):
+
+    '''
+    Group mission configurations that can share model downloads and interpolation, i.e. missions with the same maximum depth.
+
+    Args:
+    - configs (list): Glider Guidance System mission configurations.
+
+    Returns:
+    - groups (list): Per group: the maximum depth, the union configuration used for the shared processing and the indices of its missions.
+    '''
+
+    max_depths = sorted({config['MISSION']['max_depth'] for config in configs})
+    groups = []
+    for max_depth in max_depths:
+        mission_indices = [i for i, config in enumerate(configs) if config['MISSION']['max_depth'] == max_depth]
+        union_config = prefetch_union_config([configs[i] for i in mission_indices])
+        union_config['MISSION']['mission_name'] = f"Batch_{max_depth}m"
+        union_config['MODEL']['prefetch_cache'] = configs[mission_indices[0]]['MODEL'].get('prefetch_cache', False)
+        groups.append({
+            'max_depth': max_depth,
+            'config': union_config,
+            'missions': mission_indices
+        })
+
+    return groups
+
+### FUNCTION:
+def batch_carve(dataset, config):
+
+    '''
+    Slice a model, depth average or bin average dataset computed for a union extent to the extent of one mission.
+
+    Args:
+    - dataset (xarray.Dataset or None): Dataset with 'lat'/'lon' coordinates, either 1D (CMEMS, GOFS) or 2D (RTOFS).
+    - config (dict): Glider Guidance System mission configuration.
+
+    Returns:
+    - carved (xarray.Dataset or None): The dataset within the mission extent.
+    '''
+
+    if dataset is None:
+        return None
+
+    lats, lons = zip(*config['MISSION']['extent'])
+    min_lon, max_lon = min(lons), max(lons)
+    min_lat, max_lat = min(lats), max(lats)
+
+    if dataset['lat'].ndim == 1:
+        return dataset.sel(lat=slice(min_lat, max_lat), lon=slice(min_lon, max_lon))
+
+    y_dim, x_dim = dataset['lat'].dims
+    lat_values = dataset['lat'].values
+    lon_values = dataset['lon'].values
+    inside = (lat_values >= min_lat) & (lat_values <= max_lat) & (lon_values >= min_lon) & (lon_values <= max_lon)
+    rows = np.flatnonzero(inside.any(axis=1))
+    columns = np.flatnonzero(inside.any(axis=0))
+    if rows.size == 0 or columns.size == 0:
+        return dataset.isel({y_dim: slice(0, 0), x_dim: slice(0, 0)})
+
+    carved = dataset.isel({y_dim: slice(rows[0], rows[-1] + 1), x_dim: slice(columns[0], columns[-1] + 1)})
+
+    return carved
+
+### FUNCTION:
+def batch_save(config, directory, model_datasets):
+
+    '''
+    Save the carved model, depth average and bin average data of one mission under the mission's save flags, with the same names as a single-mission run.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - directory (str): Data output directory of the datetime.
+    - model_datasets (tuple): (model data, depth average, bin average) of one model.
+
+    Returns:
+    - None
+    '''
+
+    model_data, depth_average, bin_average = model_datasets
+    model_name = depth_average.attrs['model_name']
+    mission_name = config['MISSION'].get('mission_name', 'UnknownMission')
+    file_datetime = format_save_datetime(depth_average.attrs['model_datetime'])
+
+    if config['MODEL']['save_model_data']:
+        model_data_path = storage_save(model_data, os.path.join(directory, f"{model_name}_Data_{config['MISSION']['max_depth']}m"), **storage_config(config, 'model'))
+        print(f"{model_name} Data saved to: {model_data_path}")
+    if config['MODEL']['save_depth_average']:
+        storage_save(depth_average, os.path.join(directory, f"{mission_name}_{model_name}_DepthAverage_{file_datetime}"), **storage_config(config, 'depth_average'))
+    if config['MODEL']['save_bin_average']:
+        storage_save(bin_average, os.path.join(directory, f"{mission_name}_{model_name}_BinAverage_{file_datetime}"), **storage_config(config, 'bin_average'))
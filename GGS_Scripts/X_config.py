@@ -2,22 +2,27 @@
 # IMPORTS
 # =========================
 
+from concurrent.futures import ThreadPoolExecutor
 import datetime as dt
 from dateutil import parser
 import json
 import os
-from X_functions import acquire_gliders
+import pandas as pd
+from X_functions import acquire_glider_position
+from X_sources import source_warmup
 
 # =========================
 
 ### FUNCTION:
-def GGS_config_import(config_name):
+def GGS_config_import(config_name, overrides=None):
     
     '''
     Import a Glider Guidance System mission configuration from a JSON file.
     
     Args:
     - config_name (str): Name of the configuration file to import.
+    - overrides (dict or None): Settings per config section replacing the file values before processing, in the JSON format of the file (e.g. {"MISSION": {"target_date": "2024-06-01 00:00:00"}}).
+        - default: None
     
     Returns:
     - config (dict): Glider Guidance System mission configuration.
@@ -31,6 +36,8 @@ def GGS_config_import(config_name):
     try:
         with open(config_path, 'r') as file:
             config = json.load(file)
+            for section, settings in (overrides or {}).items():
+                config.setdefault(section, {}).update(settings)
             
             mission_config = config['MISSION']
             mission_config['target_date'] = dt.datetime.now(dt.timezone.utc) if mission_config['target_date'] is None else dt.datetime.strptime(mission_config['target_date'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=dt.timezone.utc)
@@ -51,29 +58,30 @@ def GGS_config_import(config_name):
     glider_id = config['MISSION'].get('glider_id')
     if glider_id is not None:
         print(f"Locating glider: {glider_id}")
+        executor = ThreadPoolExecutor(max_workers=2)
+        # The source probes overlap the glider position lookup instead of adding to it.
+        if config['MODEL'].get('source_probing', True):
+            executor.submit(source_warmup, config)
         try:
             glider_buffer = config['MISSION']['glider_buffer']
         except:
             glider_buffer = 1
             print(f"Error using provided 'glider_buffer'. Defaulting buffer to 1 degree.")
         try:
-            glider_df = acquire_gliders(
-                extent=None,
-                target_date=dt.datetime.now(dt.timezone.utc),
-                date_delta=dt.timedelta(days=1),
-                requested_variables=["time", "longitude", "latitude", "profile_id", "depth"],
-                print_vars=False,
-                target=glider_id,
+            glider_position = executor.submit(
+                acquire_glider_position,
+                glider_id,
                 request_timeout=5,
-                enable_parallel=False
-            )
-            if not glider_df.empty:
-                last_lon = glider_df['longitude'].iloc[-1]
-                last_lat = glider_df['latitude'].iloc[-1]
+                cache_ttl=config['MISSION'].get('glider_cache_ttl', 900)
+            ).result()
+            if glider_position is not None:
+                last_lon = glider_position['longitude']
+                last_lat = glider_position['latitude']
                 buffer = glider_buffer
                 config['MISSION']['extent'] = [[last_lat - buffer, last_lon - buffer], [last_lat + buffer, last_lon + buffer]]
         except Exception as e:
             print(f"Error updating extent based on glider ID {glider_id}: {e}")
+        executor.shutdown(wait=False)
 
     print("Configuration import success!")
 
@@ -119,3 +127,31 @@ def GGS_config_process(config, path="default"):
     print(output_str)
     
     return root_directory
+
+### FUNCTION:
+def GGS_config_datetimes(config):
+
+    '''
+    List the model datetimes processed for a Glider Guidance System mission configuration.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+
+    Returns:
+    - datetime_list (list): Datetime indexes formatted as '%Y-%m-%dT%H:%M:%SZ'. The target date at 00Z for a single datetime, otherwise 6-hourly from the target date at 00Z to the next day at 00Z.
+    '''
+
+    target_datetime = config['MISSION'].get('target_date')
+    if not target_datetime:
+        print("No target datetime. Using current datetime.")
+        target_datetime = dt.datetime.now(dt.timezone.utc)
+
+    if config['MODEL'].get('single_datetime'):
+        datetime_list = [target_datetime.replace(hour=0, minute=0, second=0, microsecond=0).strftime('%Y-%m-%dT%H:%M:%SZ')]
+    else:
+        datetime_start = target_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
+        datetime_end = datetime_start + dt.timedelta(days=1)
+        datetime_range = pd.date_range(datetime_start, datetime_end, freq='6H').tz_localize(None)
+        datetime_list = [datetime.strftime('%Y-%m-%dT%H:%M:%SZ') for datetime in datetime_range]
+
+    return datetime_list
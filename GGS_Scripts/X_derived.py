@@ -0,0 +1,246 @@
+# =========================
+# IMPORTS
+# =========================
+
+import json
+import numpy as np
+import os
+import xarray as xr
+
+from X_functions import calculate_bearing, format_contour_cbar, format_save_datetime
+from X_storage import storage_save, storage_config
+
+# =========================
+
+DERIVED_NODATA = 255
+
+DERIVED_THRESHOLD_COLORS = ['none', 'yellow', 'orange', 'orangered', 'maroon']
+
+# DERIVED FIELD FUNCTIONS
+
+### FUNCTION:
+def derived_threshold_classes(mag_depth_avg, levels):
+
+    '''
+    Classify depth-averaged magnitudes into threshold classes.
+
+    Args:
+    - mag_depth_avg (np.ndarray): Depth-averaged magnitude values.
+    - levels (list): Class boundaries (mag2 to mag5). Class 0 is below the first boundary, class 4 at or above the last one.
+
+    Returns:
+    - classes (np.ndarray): uint8 class grid, DERIVED_NODATA where the magnitude is NaN.
+    '''
+
+    invalid = np.isnan(mag_depth_avg)
+    classes = np.digitize(np.where(invalid, -np.inf, mag_depth_avg), levels).astype(np.uint8)
+    classes[invalid] = DERIVED_NODATA
+
+    return classes
+
+### FUNCTION:
+def derived_bearing_window(start, end, tolerance):
+
+    '''
+    Calculate the accepted current bearing window around the bearing from one waypoint to another.
+
+    Args:
+    - start (tuple): (lat, lon) of the first waypoint.
+    - end (tuple): (lat, lon) of the second waypoint.
+    - tolerance (float): Tolerance in degrees on either side of the bearing.
+
+    Returns:
+    - window (dict): 'direct_bearing', 'bearing_lower' and 'bearing_upper' in degrees.
+    '''
+
+    direct_bearing = float(calculate_bearing(start[0], start[1], end[0], end[1]))
+    window = {
+        'direct_bearing': direct_bearing,
+        'bearing_lower': (direct_bearing - tolerance) % 360,
+        'bearing_upper': (direct_bearing + tolerance) % 360
+    }
+
+    return window
+
+### FUNCTION:
+def derived_bearing_mask(dir_depth_avg, bearing_lower, bearing_upper):
+
+    '''
+    Flag the cells whose depth-averaged current direction lies within a bearing window, wrapping through north.
+
+    Args:
+    - dir_depth_avg (np.ndarray): Depth-averaged direction values.
+    - bearing_lower (float): Lower bearing of the window.
+    - bearing_upper (float): Upper bearing of the window.
+
+    Returns:
+    - mask (np.ndarray): uint8 grid, 1 inside the window and 0 elsewhere (NaN included).
+    '''
+
+    with np.errstate(invalid='ignore'):
+        if bearing_lower < bearing_upper:
+            mask = (dir_depth_avg >= bearing_lower) & (dir_depth_avg <= bearing_upper)
+        else:
+            mask = (dir_depth_avg >= bearing_lower) | (dir_depth_avg <= bearing_upper)
+
+    return mask.astype(np.uint8)
+
+### FUNCTION:
+def derived_fields(config, depth_average):
+
+    '''
+    Compute the derived fields of one model and datetime once: the threshold class grid, the bearing advantage masks of the route and of every waypoint leg, and the magnitude summary statistics with the colorbar levels.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - depth_average (xarray.Dataset): Depth-averaged model data.
+
+    Returns:
+    - derived (xarray.Dataset): Dataset with the uint8 'threshold_class', 'advantage_route' and 'advantage_legs' grids (the advantage grids only with at least two waypoints) on the depth average grid. The summary statistics are kept in its attributes.
+    '''
+
+    product_config = config['PRODUCT']
+    if 'time' in depth_average.dims:
+        depth_average = depth_average.isel(time=0, drop=True)
+    mag_depth_avg = np.asarray(depth_average['mag_depth_avg'].values, dtype=float)
+    dir_depth_avg = np.asarray(depth_average['dir_depth_avg'].values, dtype=float)
+    dims = depth_average['mag_depth_avg'].dims
+
+    levels = [float(product_config[key]) for key in ('mag2', 'mag3', 'mag4', 'mag5')]
+    classes = derived_threshold_classes(mag_depth_avg, levels)
+    derived = xr.Dataset(coords=depth_average['mag_depth_avg'].coords)
+    derived['threshold_class'] = (dims, classes, {
+        'levels': levels,
+        'nodata': DERIVED_NODATA,
+        'class_counts': np.bincount(classes[classes != DERIVED_NODATA], minlength=len(levels) + 1).tolist()
+    })
+
+    GPS_coords = config['MISSION'].get('GPS_coords')
+    if GPS_coords and len(GPS_coords) >= 2:
+        tolerance = float(product_config['tolerance'])
+        window = derived_bearing_window(GPS_coords[0], GPS_coords[-1], tolerance)
+        derived['advantage_route'] = (dims, derived_bearing_mask(dir_depth_avg, window['bearing_lower'], window['bearing_upper']), {**window, 'tolerance': tolerance})
+        leg_windows = [derived_bearing_window(start, end, tolerance) for start, end in zip(GPS_coords[:-1], GPS_coords[1:])]
+        leg_masks = np.stack([derived_bearing_mask(dir_depth_avg, leg['bearing_lower'], leg['bearing_upper']) for leg in leg_windows])
+        derived['advantage_legs'] = (('leg',) + dims, leg_masks, {
+            'direct_bearing': [leg['direct_bearing'] for leg in leg_windows],
+            'tolerance': tolerance
+        })
+
+    valid_magnitude = mag_depth_avg[~np.isnan(mag_depth_avg)]
+    derived.attrs = {key: depth_average.attrs[key] for key in ('model_name', 'model_datetime') if key in depth_average.attrs}
+    if valid_magnitude.size > 0:
+        cbar_levels, cbar_ticks, cbar_extend = format_contour_cbar(valid_magnitude, max_levels=10, extend_max=True)
+        derived.attrs.update({
+            'mag_min': float(valid_magnitude.min()),
+            'mag_max': float(valid_magnitude.max()),
+            'mag_mean': float(valid_magnitude.mean()),
+            'cbar_levels': [float(level) for level in cbar_levels],
+            'cbar_ticks': [float(tick) for tick in cbar_ticks],
+            'cbar_extend': cbar_extend
+        })
+
+    return derived
+
+### FUNCTION:
+def derived_attach(config, depth_average):
+
+    '''
+    Add the derived fields and summary statistics to a depth average dataset, so plots, exports and tiles read them instead of recomputing them.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - depth_average (xarray.Dataset): Depth-averaged model data.
+
+    Returns:
+    - depth_average (xarray.Dataset): The depth average with the derived variables and 'derived_*' attributes.
+    - derived (xarray.Dataset): The derived fields on their own.
+    '''
+
+    derived = derived_fields(config, depth_average)
+    depth_average = depth_average.assign({name: derived[name] for name in derived.data_vars})
+    depth_average.attrs.update({f"derived_{key}": value for key, value in derived.attrs.items() if key not in ('model_name', 'model_datetime')})
+
+    return depth_average, derived
+
+### FUNCTION:
+def derived_read(depth_average, levels=None, tolerance=None):
+
+    '''
+    Read the derived fields of a depth average for plotting, dropping those computed with other settings than the plot's.
+
+    Args:
+    - depth_average (xarray.Dataset): Depth-averaged model data, with or without derived fields.
+    - levels (list or None): Threshold boundaries (mag2 to mag5) the plot uses.
+        - default: None
+    - tolerance (float or None): Advantage tolerance the plot uses.
+        - default: None
+
+    Returns:
+    - derived (dict): 'threshold_classes', 'advantage_mask', 'max_mag' and 'cbar' when available.
+    '''
+
+    derived = {}
+    attrs = depth_average.attrs
+    if 'derived_mag_max' in attrs:
+        derived['max_mag'] = attrs['derived_mag_max']
+        derived['cbar'] = (np.asarray(attrs['derived_cbar_levels']), np.asarray(attrs['derived_cbar_ticks']), attrs['derived_cbar_extend'])
+    if 'threshold_class' in depth_average and (levels is None or np.allclose(depth_average['threshold_class'].attrs['levels'], levels)):
+        derived['threshold_classes'] = depth_average['threshold_class'].values
+    if 'advantage_route' in depth_average and (tolerance is None or np.isclose(depth_average['advantage_route'].attrs['tolerance'], tolerance)):
+        derived['advantage_mask'] = depth_average['advantage_route'].values.astype(bool)
+
+    return derived
+
+### FUNCTION:
+def derived_save(config, directory, derived):
+
+    '''
+    Save the derived fields of one model and datetime compactly, with a JSON summary for API consumers.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - directory (str): Data output directory of the datetime.
+    - derived (xarray.Dataset): Derived fields from 'derived_fields'.
+
+    Returns:
+    - derived_path (str): The path of the saved derived fields.
+    '''
+
+    mission_name = config['MISSION'].get('mission_name', 'UnknownMission')
+    model_name = derived.attrs['model_name']
+    file_datetime = format_save_datetime(derived.attrs['model_datetime'])
+
+    derived_path = storage_save(derived, os.path.join(directory, f"{mission_name}_{model_name}_DerivedFields_{file_datetime}"), **storage_config(config, 'depth_average'))
+
+    summary = {key: value for key, value in derived.attrs.items()}
+    summary.update({name: dict(derived[name].attrs) for name in derived.data_vars})
+    with open(os.path.join(directory, f"{mission_name}_{model_name}_DerivedSummary_{file_datetime}.json"), 'w') as file:
+        json.dump(summary, file, indent=2, default=str)
+
+    return derived_path
+
+### FUNCTION:
+def derived_stage(config, directory, model_datasets):
+
+    '''
+    Run the derived field stage of one datetime: attach the derived fields to the depth average of every model and save them when 'save_derived_fields' is set.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - directory (str): Data output directory of the datetime.
+    - model_datasets (list): (model data, depth average, bin average) tuple per model.
+
+    Returns:
+    - derived_datasets (list): The model dataset tuples with the derived depth averages.
+    '''
+
+    derived_datasets = []
+    for model_data, depth_average, bin_average in model_datasets:
+        depth_average, derived = derived_attach(config, depth_average)
+        derived_datasets.append((model_data, depth_average, bin_average))
+        if config['PRODUCT'].get('save_derived_fields'):
+            derived_path = derived_save(config, directory, derived)
+            print(f"{derived.attrs.get('model_name')} derived fields saved to: {derived_path}")
+
+    return derived_datasets
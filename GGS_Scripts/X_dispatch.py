@@ -0,0 +1,404 @@
+# =========================
+# IMPORTS
+# =========================
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+import datetime as dt
+import json
+import numpy as np
+import os
+import pickle
+import pyarrow as pa
+import shutil
+import tempfile
+import time
+import traceback
+
+from X_trace import trace_span, trace_collect, trace_peak_rss, trace_export
+
+# =========================
+
+DISPATCH_CONTEXT = {}
+
+# SHARED INPUT FUNCTIONS
+
+### FUNCTION:
+def dispatch_publish_gliders(glider_dataframes, directory):
+
+    '''
+    Write the glider track DataFrame once as an uncompressed Arrow IPC file that workers memory-map.
+
+    Args:
+    - glider_dataframes (pandas.DataFrame or None): The concatenated glider datasets.
+    - directory (str): Directory for the Arrow file.
+
+    Returns:
+    - glider_path (str or None): Path of the Arrow file, None if there is no glider data.
+    '''
+
+    if glider_dataframes is None:
+        return None
+
+    glider_path = os.path.join(directory, "gliders.arrow")
+    table = pa.Table.from_pandas(glider_dataframes)
+    with pa.OSFile(glider_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    return glider_path
+
+### FUNCTION:
+def dispatch_attach_gliders(glider_path):
+
+    '''
+    Read the glider track DataFrame from a memory-mapped Arrow IPC file.
+    Each column is converted on its own ('split_blocks'), so the numeric columns stay read-only views of the mapped file, shared by all workers through the page cache, instead of one copy per worker. Only the index and string columns are copied.
+
+    Args:
+    - glider_path (str or None): Path of the Arrow file.
+
+    Returns:
+    - glider_dataframes (pandas.DataFrame or None): The concatenated glider datasets, with read-only numeric columns.
+    '''
+
+    if glider_path is None:
+        return None
+
+    with pa.memory_map(glider_path, 'r') as source:
+        glider_dataframes = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+
+    return glider_dataframes
+
+### FUNCTION:
+def dispatch_worker_init(config, root_directory, glider_path):
+
+    '''
+    Publish the read-only run inputs to a worker process once, when the worker starts.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - root_directory (str): Root output directory.
+    - glider_path (str or None): Path of the Arrow file with the glider tracks.
+
+    Returns:
+    - None
+    '''
+
+    DISPATCH_CONTEXT.clear()
+    DISPATCH_CONTEXT.update({
+        'config': config,
+        'root_directory': root_directory,
+        'glider_path': glider_path
+    })
+
+### FUNCTION:
+def dispatch_context(task):
+
+    '''
+    Resolve the configuration, root directory and glider tracks of a task.
+    Values carried by the task itself take precedence over the worker context, so tasks can still be run directly.
+
+    Args:
+    - task (dict): Task identifiers, optionally with 'config_flag', 'root_directory_flag' and 'glider_data_flag'.
+
+    Returns:
+    - config (dict): Glider Guidance System mission configuration.
+    - root_directory (str): Root output directory.
+    - glider_dataframes (pandas.DataFrame or None): The concatenated glider datasets.
+    '''
+
+    config = task.get('config_flag', DISPATCH_CONTEXT.get('config'))
+    root_directory = task.get('root_directory_flag', DISPATCH_CONTEXT.get('root_directory'))
+
+    if 'glider_data_flag' in task:
+        glider_dataframes = task['glider_data_flag']
+    else:
+        if 'gliders' not in DISPATCH_CONTEXT:
+            DISPATCH_CONTEXT['gliders'] = dispatch_attach_gliders(DISPATCH_CONTEXT.get('glider_path'))
+        glider_dataframes = DISPATCH_CONTEXT['gliders']
+
+    return config, root_directory, glider_dataframes
+
+# TASK RECORD FUNCTIONS
+
+### FUNCTION:
+def dispatch_nested_workers(requested=None):
+
+    '''
+    Resolve the size of a process pool started from inside a task. Dispatched tasks already run one per CPU core, so nested pools default to a single process there.
+
+    Args:
+    - requested (int or None): Configured number of processes. None picks the default.
+        - default: None
+
+    Returns:
+    - num_workers (int): Number of processes: the configured number, else 1 inside a dispatched task, else the number of CPU cores.
+    '''
+
+    if requested:
+        return requested
+    if DISPATCH_CONTEXT.get('record') is not None:
+        return 1
+
+    return os.cpu_count() or 1
+
+### FUNCTION:
+@contextmanager
+def dispatch_stage(name):
+
+    '''
+    Time a task stage as a trace span and record it in the task record. Errors are printed, recorded and suppressed so the remaining stages still run.
+
+    Args:
+    - name (str): Name of the stage.
+
+    Returns:
+    - None
+    '''
+
+    stage = {'name': name, 'status': 'ok'}
+    start_time = time.perf_counter()
+    try:
+        with trace_span(name):
+            yield stage
+    except Exception as e:
+        stage['status'] = 'error'
+        dispatch_error(name, e)
+    finally:
+        stage['wall_time_s'] = time.perf_counter() - start_time
+        record = DISPATCH_CONTEXT.get('record')
+        if record is not None:
+            record['stages'].append(stage)
+
+### FUNCTION:
+def dispatch_error(name, error):
+
+    '''
+    Print and record an error of a task stage.
+
+    Args:
+    - name (str): Name of the stage.
+    - error (Exception): The error.
+
+    Returns:
+    - None
+    '''
+
+    print(f"Error during {name}: {error}")
+    record = DISPATCH_CONTEXT.get('record')
+    if record is not None:
+        record['errors'].append({'stage': name, 'error': f"{type(error).__name__}: {error}"})
+
+### FUNCTION:
+def dispatch_retry_policy(config):
+
+    '''
+    Read the task retry policy from the configuration.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+
+    Returns:
+    - policy (dict): Maximum retries, base retry delay in seconds (doubled after every attempt) and whether tasks with stage errors are retried.
+    '''
+
+    advanced_config = config.get('ADVANCED', {})
+    policy = {
+        'retries': advanced_config.get('task_retries', 0),
+        'delay': advanced_config.get('task_retry_delay', 30),
+        'retry_partial': advanced_config.get('task_retry_partial', False)
+    }
+
+    return policy
+
+# DISPATCH FUNCTIONS
+
+### FUNCTION:
+def dispatch_run(function, task, attempt=1, context=None):
+
+    '''
+    Run a task in a worker and collect its task record.
+
+    Args:
+    - function (callable): Task function (GGS_executioner or GGS_reprocessor).
+    - task (dict): Task identifiers.
+    - attempt (int): Attempt number of the task.
+        - default: 1
+    - context (tuple or None): (config, root directory, glider path) published to the worker before the task, for persistent workers shared across runs. None keeps the context set by the worker initializer.
+        - default: None
+
+    Returns:
+    - record (dict): Task record with the stages run, wall time, peak RSS, trace counters, trace events and errors.
+    '''
+
+    if context is not None:
+        dispatch_worker_init(*context)
+
+    record = {
+        'datetime_index': task['datetime_index'],
+        'attempt': attempt,
+        'pid': os.getpid(),
+        'started': time.time(),
+        'status': 'ok',
+        'stages': [],
+        'counters': {},
+        'trace': [],
+        'errors': []
+    }
+    DISPATCH_CONTEXT['record'] = record
+    trace_collect()
+    start_time = time.perf_counter()
+    try:
+        function(task)
+    except Exception as e:
+        record['status'] = 'failed'
+        record['errors'].append({'stage': 'task', 'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()})
+    finally:
+        DISPATCH_CONTEXT.pop('record', None)
+    record['wall_time_s'] = time.perf_counter() - start_time
+    record['peak_rss_mb'] = trace_peak_rss()
+    record['trace'], record['counters'] = trace_collect()
+    if record['status'] == 'ok' and record['errors']:
+        record['status'] = 'partial'
+
+    return record
+
+### FUNCTION:
+def dispatch_tasks(function, tasks, config, root_directory, glider_dataframes=None, num_workers=1, label="Task", executor=None):
+
+    '''
+    Run tasks in a process pool with the shared inputs published once instead of pickled into every task.
+    Failed tasks are retried under the configured policy, and a JSON run summary and run trace are written to the 'logs' directory.
+
+    Args:
+    - function (callable): Task function (GGS_executioner or GGS_reprocessor).
+    - tasks (list): Task identifier dictionaries.
+    - config (dict): Glider Guidance System mission configuration.
+    - root_directory (str): Root output directory.
+    - glider_dataframes (pandas.DataFrame or None): The concatenated glider datasets.
+        - default: None
+    - num_workers (int): Number of worker processes.
+        - default: 1
+    - label (str): Label printed for each task.
+        - default: 'Task'
+    - executor (concurrent.futures.ProcessPoolExecutor or None): Running worker pool to submit to, e.g. the warm workers of the GGS service. The run context is then sent with every task. None starts a pool of 'num_workers' for this run.
+        - default: None
+
+    Returns:
+    - summary (dict): Run summary with the dispatch overhead and the final record of every task.
+    '''
+
+    run_started = dt.datetime.now(dt.timezone.utc)
+    run_start = time.perf_counter()
+    policy = dispatch_retry_policy(config)
+    retry_statuses = ('failed', 'partial') if policy['retry_partial'] else ('failed',)
+
+    dispatch_directory = tempfile.mkdtemp(prefix="ggs_dispatch_")
+    try:
+        glider_path = dispatch_publish_gliders(glider_dataframes, dispatch_directory)
+        publish_time = time.perf_counter() - run_start
+
+        task_bytes = np.mean([len(pickle.dumps(task)) for task in tasks]) if tasks else 0
+        inline_bytes = len(pickle.dumps((config, glider_dataframes))) + task_bytes
+
+        records = {}
+        attempts = {}
+        trace_events, _ = trace_collect()
+        latencies = []
+        context = None
+        pool = executor
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=num_workers, initializer=dispatch_worker_init, initargs=(config, root_directory, glider_path))
+        else:
+            context = (config, root_directory, glider_path)
+        try:
+            print("Starting parallel processing with the following tasks:")
+            pending = {}
+            retries = []
+            for i, task in enumerate(tasks, start=1):
+                print(f"{label} {i}: {task['datetime_index']}")
+                pending[pool.submit(dispatch_run, function, task, context=context)] = (task, time.time())
+            while pending or retries:
+                # Retries wait out their backoff here, so no worker slot sleeps.
+                now = time.time()
+                for retry in [retry for retry in retries if retry[0] <= now]:
+                    retries.remove(retry)
+                    _, task, attempt = retry
+                    pending[pool.submit(dispatch_run, function, task, attempt=attempt, context=context)] = (task, now)
+                timeout = max(0, min(retry[0] for retry in retries) - now) if retries else None
+                if not pending:
+                    time.sleep(timeout)
+                    continue
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    continue
+                future = done.pop()
+                task, submitted = pending.pop(future)
+                key = task['datetime_index']
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {'datetime_index': key, 'attempt': attempts.get(key, 1), 'status': 'failed', 'stages': [], 'counters': {}, 'errors': [{'stage': 'dispatch', 'error': f"{type(e).__name__}: {e}"}]}
+                else:
+                    latencies.append(record['started'] - submitted)
+                trace_events.extend(record.pop('trace', []))
+                record['attempts'] = record['attempt']
+                attempts[key] = record['attempt']
+                records[key] = record
+
+                if record['status'] in retry_statuses and record['attempt'] <= policy['retries']:
+                    delay = policy['delay'] * 2 ** (record['attempt'] - 1)
+                    print(f"{label} {key} {record['status']} on attempt {record['attempt']}, retrying in {delay} s.")
+                    retries.append((time.time() + delay, task, record['attempt'] + 1))
+                else:
+                    print(f"{label} {key} finished: {record['status']} ({record.get('wall_time_s', 0):.1f} s, attempt {record['attempt']}).")
+        finally:
+            if executor is None:
+                pool.shutdown()
+    finally:
+        shutil.rmtree(dispatch_directory, ignore_errors=True)
+
+    summary = {
+        'run_started': run_started.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'function': function.__name__,
+        'num_workers': num_workers,
+        'retry_policy': policy,
+        'wall_time_s': time.perf_counter() - run_start,
+        'dispatch': {
+            'publish_time_s': publish_time,
+            'task_payload_bytes': float(task_bytes),
+            'inline_payload_bytes': float(inline_bytes),
+            'start_latency_mean_s': float(np.mean(latencies)) if latencies else None,
+            'start_latency_max_s': float(np.max(latencies)) if latencies else None
+        },
+        'tasks': [records[task['datetime_index']] for task in tasks if task['datetime_index'] in records]
+    }
+
+    print(f"\n### DISPATCH OVERHEAD ###\n")
+    print(f"Shared input publish time: {publish_time:.3f} s")
+    print(f"Task payload: {task_bytes / 1e3:.1f} kB per task (inline config and gliders: {inline_bytes / 1e3:.1f} kB per task)")
+    if latencies:
+        print(f"Task start latency (including queue wait): mean {np.mean(latencies):.3f} s, max {np.max(latencies):.3f} s")
+
+    print(f"\n### RUN SUMMARY ###\n")
+    print(f"{'Datetime':<22} {'Status':<8} {'Attempts':>8} {'Wall (s)':>9} {'Peak RSS (MB)':>14} {'Fetched (MB)':>13}")
+    for record in summary['tasks']:
+        peak_rss = record.get('peak_rss_mb')
+        fetched = record['counters'].get('bytes_fetched', 0) / 1e6
+        print(f"{record['datetime_index']:<22} {record['status']:<8} {record['attempts']:>8} {record.get('wall_time_s', 0):>9.1f} {peak_rss if peak_rss is not None else float('nan'):>14.1f} {fetched:>13.1f}")
+        for error in record['errors']:
+            print(f"    {error['stage']}: {error['error']}")
+
+    summary_directory = os.path.join(root_directory, "logs")
+    os.makedirs(summary_directory, exist_ok=True)
+    summary_path = os.path.join(summary_directory, f"run_summary_{run_started.strftime('%Y%m%dT%H%M%SZ')}.json")
+    with open(summary_path, 'w') as file:
+        json.dump(summary, file, indent=2, default=str)
+    print(f"Run summary saved to: {summary_path}")
+
+    main_events, _ = trace_collect()
+    trace_path = os.path.join(summary_directory, f"run_trace_{run_started.strftime('%Y%m%dT%H%M%SZ')}.json")
+    trace_export(trace_events + main_events, trace_path, chrome=config.get('ADVANCED', {}).get('trace_chrome', False), metadata={'run_started': summary['run_started'], 'function': function.__name__})
+
+    return summary
@@ -2,34 +2,64 @@
 # IMPORTS
 # =========================
 
-import cartopy.crs as ccrs
-from cartopy.io.shapereader import Reader
-import cartopy.feature as cfeature
-import cmocean.cm as cmo
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import csv
-import dask.array
 import datetime as dt
 from datetime import datetime as datetime
 from dateutil import parser
-from erddapy import ERDDAP
 import glob
 import heapq
-from joblib import Parallel, delayed
+import io
+import json
 import math
 from math import radians, cos, sin, asin, sqrt
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
-import matplotlib.colors as mcolors
-import matplotlib.lines as mlines
-import matplotlib.patches as mpatches
-import multiprocessing
 import numpy as np
 import os
 import pandas as pd
+from scipy.spatial import cKDTree
+import threading
+import time
+import urllib.parse
+import urllib.request
 import xarray as xr
 
+from X_lazy import lazy_import
+from X_trace import trace_function, trace_count
+
+aiohttp = lazy_import("aiohttp")
+ccrs = lazy_import("cartopy.crs")
+cfeature = lazy_import("cartopy.feature")
+shapereader = lazy_import("cartopy.io.shapereader")
+cmo = lazy_import("cmocean.cm")
+dask_array = lazy_import("dask.array")
+erddapy = lazy_import("erddapy")
+plt = lazy_import("matplotlib.pyplot")
+mticker = lazy_import("matplotlib.ticker")
+mcolors = lazy_import("matplotlib.colors")
+mlines = lazy_import("matplotlib.lines")
+mpatches = lazy_import("matplotlib.patches")
+
 # =========================
 
+REGRID_CACHE = {}
+GRID_LOCATORS = {}
+
+POSITION_LOCK = threading.Lock()
+
+PROFILE_VARIABLES = (
+    ('u', 'v'),
+    ('u_depth_avg', 'v_depth_avg', 'mag_depth_avg', 'dir_depth_avg'),
+    ('u_bin_avg', 'v_bin_avg', 'mag_bin_avg', 'dir_bin_avg')
+)
+
+PROFILE_SHADING = {
+    'RTOFS': ['cyan', 'orange', 'green'],
+    'CMEMS': ['cyan', 'orange', 'lawngreen'],
+    'GOFS': ['cyan', 'orange', 'lawngreen']
+}
+BASEMAP_CACHE = {}
+
 # OPERATIONAL FUNCTIONS
 
 ### FUNCTION:
@@ -64,6 +94,7 @@ def optimal_workers(power=1.0):
 # ALGORITHM FUNCTIONS
 
 ### FUNCTION:
+@trace_function()
 def compute_optimal_path(config, directory, model_dataset, glider_raw_speed=0.5):
     
     '''
@@ -84,7 +115,6 @@ def compute_optimal_path(config, directory, model_dataset, glider_raw_speed=0.5)
     
     model_name = model_dataset.attrs['model_name']
     print(f"\n### COMPUTING OPTIMAL PATH [{model_name}] ###\n")
-    start_time = print_starttime()
 
     model_name = model_dataset.attrs['model_name']
     csv_data = [("Segment Start", "Segment End", "Segment Time (s)", "Segment Distance (m)")]
@@ -106,12 +136,6 @@ def compute_optimal_path(config, directory, model_dataset, glider_raw_speed=0.5)
         time = distance / glider_raw_speed
         return [(start_lat, start_lon), (end_lat, end_lon)], time, distance
 
-    def convert_coord2grid(latitude, longitude):
-        '''Converts geographical latitude and longitude to the nearest index on the dataset grid.'''
-        latitude_index = np.argmin(np.abs(latitude_array - latitude))
-        longitude_index = np.argmin(np.abs(longitude_array - longitude))
-        return latitude_index, longitude_index
-    
     def convert_grid2coord(latitude_index, longitude_index):
         '''Converts dataset grid indices back to geographical latitude and longitude coordinates.'''
         latitude = latitude_array[latitude_index]
@@ -177,6 +201,7 @@ def compute_optimal_path(config, directory, model_dataset, glider_raw_speed=0.5)
         path_found = False
         while open_set:
             _, current = heapq.heappop(open_set)
+            trace_count('astar_nodes_expanded')
             if current == end_index:
                 path_found = True
                 break
@@ -200,14 +225,16 @@ def compute_optimal_path(config, directory, model_dataset, glider_raw_speed=0.5)
     mission_waypoints = [(float(lat), float(lon)) for lat, lon in mission_waypoints]
     latitude_array = model_dataset['lat'].values
     longitude_array = model_dataset['lon'].values
+    (waypoint_lat_indices, waypoint_lon_indices), _ = calculate_gridpoints(model_dataset, [lat for lat, _ in mission_waypoints], [lon for _, lon in mission_waypoints])
+    waypoint_indices = [(int(lat_index), int(lon_index)) for lat_index, lon_index in zip(waypoint_lat_indices, waypoint_lon_indices)]
     
     optimal_mission_path = []
     total_time = 0
     total_distance = 0
     
     for i in range(len(mission_waypoints) - 1):
-        start_index = convert_coord2grid(*mission_waypoints[i])
-        end_index = convert_coord2grid(*mission_waypoints[i + 1])
+        start_index = waypoint_indices[i]
+        end_index = waypoint_indices[i + 1]
         segment_path, segment_time, segment_distance = algorithm_a_star(model_dataset, start_index, end_index, glider_raw_speed)
         optimal_mission_path.extend(segment_path[:-1])
         total_time += segment_time
@@ -226,15 +253,14 @@ def compute_optimal_path(config, directory, model_dataset, glider_raw_speed=0.5)
         writer = csv.writer(file)
         writer.writerows(csv_data)
 
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
 
     return optimal_mission_path
 
 # DATA ACQUISITION FUNCTIONS
 
 ### FUNCTION:
-def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.timedelta(days=1), requested_variables=["time", "longitude", "latitude", "profile_id", "depth"], print_vars=False, target="all", request_timeout=5, enable_parallel=False):
+@trace_function()
+def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.timedelta(days=1), requested_variables=["time", "longitude", "latitude", "profile_id", "depth"], print_vars=False, target="all", request_timeout=5, enable_parallel=False, max_concurrency=8, max_retries=3, track_sync=False, track_resolution=None, cache_directory=None):
     
     '''
     Fetches active glider datasets from the IOOS Glider DAC ERDDAP server, focusing on specified targets within a given spatial extent and time frame.
@@ -253,15 +279,24 @@ def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.ti
         - default: "all"
     - request_timeout (int): The timeout for the ERDDAP requests.
         - default: 5
-    - enable_parallel (bool or int): Enables parallel downloads if True or an integer specifying the number of cores.
+    - enable_parallel (bool or int): An integer overrides the maximum number of concurrent requests. Requests are always made concurrently.
         - default: False
+    - max_concurrency (int): Maximum number of concurrent requests over the pooled keep-alive connections.
+        - default: 8
+    - max_retries (int): Number of retries of a failed request (timeouts, connection errors, HTTP 429 and 5xx), with exponential backoff.
+        - default: 3
+    - track_sync (bool): Track-sync mode. Requests only time, longitude and latitude with the time window and extent as server-side constraints and 'distinct()', keeps a local track cache per glider and only fetches observations newer than the last cached timestamp. Target gliders are requested directly, without the search.
+        - default: False
+    - track_resolution (str or None): Server-side track decimation in track-sync mode, as an ERDDAP 'orderByClosest' interval (e.g. '15minutes'). None keeps every observation.
+        - default: None
+    - cache_directory (str or None): Track cache directory. None uses 'data/gliders'.
+        - default: None
     
     Returns:
     - glider_dataframes (pandas.DataFrame): The concatenated glider datasets.
     '''
 
     print(f"\n### ACQUIRING GLIDER DATASETS ###\n")
-    start_time = print_starttime()
 
     if extent is None:
         extent = [-180, 180, -90, 90]
@@ -272,8 +307,7 @@ def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.ti
     formatted_start_date = start_date.strftime('%Y-%m-%dT%H:%M:%SZ')
     formatted_end_date = end_date.strftime('%Y-%m-%dT%H:%M:%SZ')
 
-    erddap_server = ERDDAP(server='https://data.ioos.us/gliders/erddap')
-    erddap_server.requests_kwargs = {'timeout': request_timeout}
+    erddap_server = erddapy.ERDDAP(server='https://data.ioos.us/gliders/erddap')
 
     search_params = {
         'min_time': formatted_start_date,
@@ -286,24 +320,40 @@ def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.ti
 
     search_url = erddap_server.get_search_url(search_for="gliders", response='csv', **search_params)
 
-    try:
-        search_results = pd.read_csv(search_url)
-    except Exception as error:
-        print(f"Error during initial glider search: {error}")
-        return pd.DataFrame()
-
-    glider_ids = search_results['Dataset ID'].values
-    print(f"Found {len(glider_ids)} Glider Datasets within search window: {formatted_start_date} to {formatted_end_date}")
-    print("Glider Indexes found:", ", ".join(glider_ids))
-
     target_glider_ids = []
     if target != "all":
         target_glider_ids = [target] if isinstance(target, str) else target
 
-    def available_variables(glider_id, print_vars):
+    concurrency = enable_parallel if isinstance(enable_parallel, int) and not isinstance(enable_parallel, bool) and enable_parallel > 0 else max_concurrency
+    fetch_statistics = {'requests': 0, 'retries': 0, 'bytes': 0}
+
+    async def fetch_text(session, semaphore, url):
+        for attempt in range(max_retries + 1):
+            try:
+                async with semaphore:
+                    async with session.get(url) as response:
+                        if response.status == 404:
+                            return ""
+                        if response.status == 429 or response.status >= 500:
+                            raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status, message=response.reason)
+                        response.raise_for_status()
+                        text = await response.text()
+                fetch_statistics['requests'] += 1
+                fetch_statistics['bytes'] += len(text)
+                return text
+            except aiohttp.ClientResponseError as error:
+                if error.status != 429 and error.status < 500 or attempt == max_retries:
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == max_retries:
+                    raise
+            fetch_statistics['retries'] += 1
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def available_variables(session, semaphore, glider_id, print_vars):
         info_url = erddap_server.get_info_url(dataset_id=glider_id, response="csv")
         try:
-            info = pd.read_csv(info_url)
+            info = pd.read_csv(io.StringIO(await fetch_text(session, semaphore, info_url)))
             available_vars = info[info['Variable Name'].notnull()]['Variable Name'].tolist()
             if print_vars:
                 print(f"Available variables for {glider_id}: {available_vars}")
@@ -312,11 +362,11 @@ def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.ti
             print(f"Error fetching available variables for glider {glider_id}: {error}")
             return []
 
-    def acquire_glider_dataset(glider_id):
+    async def acquire_glider_dataset(session, semaphore, glider_id):
         if target_glider_ids and glider_id not in target_glider_ids:
             return glider_id, pd.DataFrame()
 
-        available_vars = available_variables(glider_id, print_vars)
+        available_vars = await available_variables(session, semaphore, glider_id, print_vars)
         vars_to_request = [var for var in requested_variables if var in available_vars]
 
         missing_vars = set(requested_variables) - set(vars_to_request)
@@ -327,14 +377,20 @@ def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.ti
             print(f"No requested variables are available for glider {glider_id}.")
             return glider_id, pd.DataFrame()
 
-        erddap_server.constraints = {}
-        erddap_server.protocol = 'tabledap'
-        erddap_server.variables = vars_to_request
-        erddap_server.dataset_id = glider_id
+        data_url = erddap_server.get_download_url(
+            dataset_id=glider_id,
+            protocol='tabledap',
+            variables=vars_to_request,
+            response="csv",
+            constraints={}
+        )
 
         try:
-            dataset_df = erddap_server.to_pandas(
-                response="csv",
+            dataset_text = await fetch_text(session, semaphore, data_url)
+            if not dataset_text:
+                return glider_id, pd.DataFrame()
+            dataset_df = pd.read_csv(
+                io.StringIO(dataset_text),
                 index_col="time",
                 parse_dates=True,
                 skiprows=(1,)
@@ -351,12 +407,107 @@ def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.ti
             print(f"Error fetching dataset for glider {glider_id} with requested variables: {error}")
             return glider_id, pd.DataFrame()
 
-    if enable_parallel:
-        num_cores = multiprocessing.cpu_count() if isinstance(enable_parallel, bool) else enable_parallel
-        parallel_downloads = Parallel(n_jobs=num_cores)(delayed(acquire_glider_dataset)(glider_id) for glider_id in glider_ids)
-        glider_datasets = {glider: df for glider, df in parallel_downloads}
+    window_start, window_end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    window_start = window_start.tz_convert(None) if window_start.tzinfo else window_start
+    window_end = window_end.tz_convert(None) if window_end.tzinfo else window_end
+    track_directory = cache_directory or os.path.join(os.path.dirname(__file__), "data", "gliders")
+
+    async def acquire_glider_track(session, semaphore, glider_id):
+        # The cache holds one contiguous stretch of the full track (no extent constraint), so any mission extent and window can reuse it.
+        cache_path = os.path.join(track_directory, f"{glider_id}_track.parquet")
+        cached_df = pd.read_parquet(cache_path) if os.path.exists(cache_path) else pd.DataFrame()
+
+        if cached_df.empty:
+            requests = [{'time>=': formatted_start_date, 'time<=': formatted_end_date}]
+        else:
+            cached_start, cached_end = cached_df.index.min(), cached_df.index.max()
+            requests = []
+            if window_start < cached_start:
+                requests.append({'time>=': formatted_start_date, 'time<': cached_start.strftime('%Y-%m-%dT%H:%M:%SZ')})
+            if window_end > cached_end:
+                requests.append({'time>': cached_end.strftime('%Y-%m-%dT%H:%M:%SZ'), 'time<=': formatted_end_date})
+
+        new_dfs = []
+        for constraints in requests:
+            data_url = erddap_server.get_download_url(
+                dataset_id=glider_id,
+                protocol='tabledap',
+                variables=["time", "longitude", "latitude"],
+                response="csv",
+                constraints=constraints,
+                distinct=True
+            )
+            if track_resolution:
+                data_url += "&" + urllib.parse.quote(f'orderByClosest("time/{track_resolution}")')
+
+            try:
+                track_text = await fetch_text(session, semaphore, data_url)
+                if track_text:
+                    new_dfs.append(pd.read_csv(io.StringIO(track_text), index_col="time", parse_dates=True, skiprows=(1,)).tz_localize(None))
+            except Exception as error:
+                print(f"Error fetching track for glider {glider_id}: {error}")
+                new_dfs = []
+                break
+
+        new_dfs = [df for df in new_dfs if not df.empty]
+        track_df = pd.concat([cached_df] + new_dfs) if new_dfs else cached_df
+        if track_df.empty:
+            return glider_id, track_df
+        if new_dfs:
+            track_df = track_df[~track_df.index.duplicated(keep='last')].sort_index()
+            os.makedirs(track_directory, exist_ok=True)
+            track_df.to_parquet(f"{cache_path}.part")
+            os.replace(f"{cache_path}.part", cache_path)
+
+        in_window = (track_df.index >= window_start) & (track_df.index <= window_end)
+        in_extent = (track_df['longitude'] >= extent[0]) & (track_df['longitude'] <= extent[1]) & (track_df['latitude'] >= extent[2]) & (track_df['latitude'] <= extent[3])
+
+        return glider_id, track_df[in_window & in_extent]
+
+    async def acquire_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(sock_connect=request_timeout, sock_read=request_timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            if track_sync and target_glider_ids:
+                glider_ids = target_glider_ids
+            else:
+                try:
+                    search_results = pd.read_csv(io.StringIO(await fetch_text(session, semaphore, search_url)))
+                except Exception as error:
+                    print(f"Error during initial glider search: {error}")
+                    return None
+
+                glider_ids = search_results['Dataset ID'].values
+                print(f"Found {len(glider_ids)} Glider Datasets within search window: {formatted_start_date} to {formatted_end_date}")
+                print("Glider Indexes found:", ", ".join(glider_ids))
+
+            if track_sync:
+                glider_ids = [glider_id for glider_id in glider_ids if not target_glider_ids or glider_id in target_glider_ids]
+                return await asyncio.gather(*(acquire_glider_track(session, semaphore, glider_id) for glider_id in glider_ids))
+
+            return await asyncio.gather(*(acquire_glider_dataset(session, semaphore, glider_id) for glider_id in glider_ids))
+
+    fetch_start = time.perf_counter()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is None:
+        glider_downloads = asyncio.run(acquire_all())
     else:
-        glider_datasets = {glider: df for glider, df in (acquire_glider_dataset(glider_id) for glider_id in glider_ids)}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            glider_downloads = executor.submit(asyncio.run, acquire_all()).result()
+    fetch_time = time.perf_counter() - fetch_start
+
+    print(f"Glider acquisition: {fetch_statistics['requests']} requests, {fetch_statistics['retries']} retries, {fetch_statistics['bytes'] / 1e6:.2f} MB in {fetch_time:.2f} s (up to {concurrency} concurrent)")
+    trace_count('glider_requests', fetch_statistics['requests'])
+    trace_count('glider_retries', fetch_statistics['retries'])
+    trace_count('bytes_fetched', fetch_statistics['bytes'])
+
+    if glider_downloads is None:
+        return pd.DataFrame()
+    glider_datasets = {glider: df for glider, df in glider_downloads}
     
     non_empty_glider_datasets = {glider: df for glider, df in glider_datasets.items() if not df.empty}
 
@@ -369,12 +520,88 @@ def acquire_gliders(extent=None, target_date=dt.datetime.now(), date_delta=dt.ti
     except ValueError as e:
         print(f"Error during DataFrame concatenation: {e}")
         glider_dataframes = pd.DataFrame()
-        
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
 
     return glider_dataframes
 
+### FUNCTION:
+@trace_function(arg_names=('glider_id',))
+def acquire_glider_position(glider_id, request_timeout=5, cache_ttl=900, cache_directory=None):
+
+    '''
+    Fetch the latest position of one glider directly by its ERDDAP dataset ID, with an 'orderByMax("time")' query returning a single row.
+    Positions are cached on disk for a short time, so repeated config imports do not query the server again.
+
+    Args:
+    - glider_id (str): ERDDAP dataset ID of the glider.
+    - request_timeout (int): The timeout for the ERDDAP request.
+        - default: 5
+    - cache_ttl (float): Seconds a cached position is reused.
+        - default: 900
+    - cache_directory (str or None): Position cache directory. None uses 'data/gliders'.
+        - default: None
+
+    Returns:
+    - position (dict or None): Latest 'time', 'latitude' and 'longitude' of the glider, None if unavailable.
+    '''
+
+    cache_path = os.path.join(cache_directory or os.path.join(os.path.dirname(__file__), "data", "gliders"), "positions.json")
+    positions = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as file:
+                positions = json.load(file)
+        except ValueError:
+            positions = {}
+    cached = positions.get(glider_id)
+    if cached is not None and time.time() - cached['fetched'] < cache_ttl:
+        print(f"Using cached position of glider {glider_id} ({cached['time']}).")
+        return cached
+
+    erddap_server = erddapy.ERDDAP(server='https://data.ioos.us/gliders/erddap')
+    position_url = erddap_server.get_download_url(
+        dataset_id=glider_id,
+        protocol='tabledap',
+        variables=["time", "latitude", "longitude"],
+        response="csv",
+        constraints={}
+    ) + "&" + urllib.parse.quote('orderByMax("time")')
+
+    try:
+        with urllib.request.urlopen(position_url, timeout=request_timeout) as response:
+            position_text = response.read().decode()
+        trace_count('bytes_fetched', len(position_text))
+        position_df = pd.read_csv(io.StringIO(position_text), skiprows=(1,))
+        if position_df.empty:
+            print(f"No position found for glider {glider_id}.")
+            return None
+    except Exception as error:
+        print(f"Error fetching the latest position of glider {glider_id}: {error}")
+        return cached
+
+    position = {
+        'time': str(position_df['time'].iloc[-1]),
+        'latitude': float(position_df['latitude'].iloc[-1]),
+        'longitude': float(position_df['longitude'].iloc[-1]),
+        'fetched': time.time()
+    }
+    with POSITION_LOCK:
+        # Re-read the cache right before writing, so positions stored by other imports meanwhile are kept.
+        positions = {}
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path) as file:
+                    positions = json.load(file)
+            except ValueError:
+                positions = {}
+        positions[glider_id] = position
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        part_path = f"{cache_path}.{os.getpid()}.part"
+        with open(part_path, 'w') as file:
+            json.dump(positions, file, indent=2)
+        os.replace(part_path, cache_path)
+
+    return position
+
 # CALCULATE FUNCTIONS
 
 ### FUNCTION:
@@ -405,6 +632,154 @@ def calculate_bearing(lat1, lon1, lat2, lon2):
 
     return compass_bearing
 
+### CLASS:
+class GridLocator:
+
+    '''
+    Nearest gridpoint lookup built once per model grid. Regular lat/lon axes are indexed analytically, irregular 1D axes by binary search and curvilinear (2D) grids with a (lat, lon) KD-tree, matching the nearest point in lat/lon degrees.
+    '''
+
+    ### FUNCTION:
+    def __init__(self, latitude, longitude):
+
+        '''
+        Build the locator.
+
+        Args:
+        - latitude (np.ndarray): Latitude values (1D for rectilinear grids, 2D for curvilinear grids).
+        - longitude (np.ndarray): Longitude values (1D for rectilinear grids, 2D for curvilinear grids).
+
+        Returns:
+        - None
+        '''
+
+        self.latitude = np.asarray(latitude)
+        self.longitude = np.asarray(longitude)
+        self.rectilinear = self.latitude.ndim == 1 and self.longitude.ndim == 1
+        self.tree = None
+        if self.rectilinear:
+            self.lat_axis = self.regular_axis(self.latitude)
+            self.lon_axis = self.regular_axis(self.longitude)
+        else:
+            self.tree = cKDTree(np.column_stack([self.latitude.ravel(), self.longitude.ravel()]))
+
+    ### FUNCTION:
+    @staticmethod
+    def regular_axis(coordinate):
+
+        '''
+        Check whether a 1D coordinate is evenly spaced.
+
+        Args:
+        - coordinate (np.ndarray): 1D coordinate values.
+
+        Returns:
+        - axis (tuple or None): (start, step) of an evenly spaced coordinate, None otherwise.
+        '''
+
+        if len(coordinate) < 2:
+            return None
+        steps = np.diff(coordinate)
+        if steps[0] == 0 or not np.allclose(steps, steps[0], rtol=1e-6, atol=0):
+            return None
+
+        return float(coordinate[0]), float(steps[0])
+
+    ### FUNCTION:
+    def axis_index(self, coordinate, axis, targets):
+
+        '''
+        Calculate the nearest index of a 1D coordinate for many targets.
+
+        Args:
+        - coordinate (np.ndarray): 1D coordinate values.
+        - axis (tuple or None): (start, step) of an evenly spaced coordinate.
+        - targets (np.ndarray): Target values.
+
+        Returns:
+        - index (np.ndarray): Nearest index for every target.
+        '''
+
+        if axis is None:
+            index, _ = calculate_nearest_index(coordinate, targets)
+            return index
+        start, step = axis
+
+        return np.clip(np.rint((targets - start) / step), 0, len(coordinate) - 1).astype(int)
+
+    ### FUNCTION:
+    def query(self, target_lats, target_lons):
+
+        '''
+        Calculate the nearest gridpoints of many target points at once.
+
+        Args:
+        - target_lats (array-like): Target latitudes.
+        - target_lons (array-like): Target longitudes, same shape as the latitudes.
+
+        Returns:
+        - (y_index, x_index) (tuple): Index arrays of the nearest gridpoints.
+        - (lats, lons) (tuple): Coordinate arrays of the nearest gridpoints.
+        '''
+
+        target_lats = np.asarray(target_lats, dtype=float)
+        target_lons = np.asarray(target_lons, dtype=float)
+
+        if self.rectilinear:
+            y_index = self.axis_index(self.latitude, self.lat_axis, target_lats)
+            x_index = self.axis_index(self.longitude, self.lon_axis, target_lons)
+            return (y_index, x_index), (self.latitude[y_index], self.longitude[x_index])
+
+        _, flat_index = self.tree.query(np.column_stack([target_lats.ravel(), target_lons.ravel()]))
+        y_index, x_index = (index.reshape(target_lats.shape) for index in np.unravel_index(flat_index, self.latitude.shape))
+
+        return (y_index, x_index), (self.latitude[y_index, x_index], self.longitude[y_index, x_index])
+
+### FUNCTION:
+def calculate_grid_locator(latitude, longitude):
+
+    '''
+    Get the grid locator of a model grid, built once per grid and process and shared by all datasets on that grid (model data, depth and bin averages).
+
+    Args:
+    - latitude (array-like): Latitude values (1D for rectilinear grids, 2D for curvilinear grids).
+    - longitude (array-like): Longitude values (1D for rectilinear grids, 2D for curvilinear grids).
+
+    Returns:
+    - locator (GridLocator): The grid locator.
+    '''
+
+    latitude = np.asarray(latitude)
+    longitude = np.asarray(longitude)
+    grid_key = (latitude.shape, longitude.shape, float(latitude.flat[0]), float(latitude.flat[-1]), float(longitude.flat[0]), float(longitude.flat[-1]), float(np.nansum(latitude)), float(np.nansum(longitude)))
+
+    if grid_key not in GRID_LOCATORS:
+        if len(GRID_LOCATORS) >= 16:
+            GRID_LOCATORS.pop(next(iter(GRID_LOCATORS)))
+        GRID_LOCATORS[grid_key] = GridLocator(latitude, longitude)
+
+    return GRID_LOCATORS[grid_key]
+
+### FUNCTION:
+def calculate_gridpoints(model_data, target_lats, target_lons):
+
+    '''
+    Calculate the nearest XY gridpoints in a model dataset to many latitude and longitude pairs, e.g. waypoints or a glider track, accommodating both 1D and 2D lat/lon arrays.
+
+    Args:
+    - model_data (xarray.Dataset): The model dataset.
+    - target_lats (array-like): The target latitudes.
+    - target_lons (array-like): The target longitudes.
+
+    Returns:
+    - (y_index, x_index) (tuple): Index arrays of the nearest points in the dataset.
+    - (lat_index, lon_index) (tuple): Coordinate arrays of the nearest points in the dataset.
+    '''
+
+    locator = calculate_grid_locator(model_data['lat'].values, model_data['lon'].values)
+
+    return locator.query(target_lats, target_lons)
+
 ### FUNCTION:
 def calculate_gridpoint(model_data, target_lat, target_lon):
     
@@ -421,26 +796,152 @@ def calculate_gridpoint(model_data, target_lat, target_lon):
     - (lat_index, lon_index) (tuple): The coordinates of the nearest point in the dataset.
     '''
     
-    if 'lat' in model_data.dims and 'lon' in model_data.dims:
-        lat = model_data['lat'].values
-        lon = model_data['lon'].values
-        lon_grid, lat_grid = np.meshgrid(lon, lat)
-        squared_dist = (lat_grid - target_lat)**2 + (lon_grid - target_lon)**2
-    else:
-        lat_diff = model_data['lat'] - target_lat
-        lon_diff = model_data['lon'] - target_lon
-        squared_dist = lat_diff**2 + lon_diff**2
-    
-    y_index, x_index = np.unravel_index(squared_dist.argmin(), squared_dist.shape)
-    
-    if 'lat' in model_data.dims and 'lon' in model_data.dims:
-        lat_index = lat[y_index]
-        lon_index = lon[x_index]
+    (y_index, x_index), (lat_index, lon_index) = calculate_gridpoints(model_data, [target_lat], [target_lon])
+
+    return (int(y_index[0]), int(x_index[0])), (lat_index[0], lon_index[0])
+
+### FUNCTION:
+def calculate_threshold_runs(data, threshold):
+
+    '''
+    Find the runs of consecutive values above a threshold with a vectorized run-length encoding.
+
+    Args:
+    - data (array-like): 1D data array, e.g. a bin-averaged profile.
+    - threshold (float): Threshold value.
+
+    Returns:
+    - starts (numpy.ndarray): Start index of every run.
+    - ends (numpy.ndarray): End index (exclusive) of every run.
+    '''
+
+    above = np.asarray(data) > threshold
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], above.astype(np.int8), [0]))))
+
+    return edges[0::2], edges[1::2]
+
+### FUNCTION:
+def calculate_nearest_index(coordinate, targets):
+
+    '''
+    Calculate the index of the nearest value of a 1D coordinate array for many target values at once.
+
+    Args:
+    - coordinate (np.ndarray): 1D coordinate values (any order).
+    - targets (np.ndarray): Target values.
+
+    Returns:
+    - index (np.ndarray): Index of the nearest coordinate value for every target.
+    - valid (np.ndarray): Mask of targets that fall within the coordinate range (plus half a grid spacing).
+    '''
+
+    coordinate = np.asarray(coordinate)
+    targets = np.asarray(targets)
+
+    order = np.argsort(coordinate)
+    sorted_coordinate = coordinate[order]
+    if len(sorted_coordinate) == 1:
+        return np.zeros(targets.shape, dtype=int), np.ones(targets.shape, dtype=bool)
+
+    upper = np.clip(np.searchsorted(sorted_coordinate, targets), 1, len(sorted_coordinate) - 1)
+    lower = upper - 1
+    nearest = np.where(np.abs(targets - sorted_coordinate[lower]) <= np.abs(sorted_coordinate[upper] - targets), lower, upper)
+    spacing = np.abs(np.diff(sorted_coordinate)).max()
+    valid = (targets >= sorted_coordinate[0] - spacing / 2) & (targets <= sorted_coordinate[-1] + spacing / 2)
+
+    return order[nearest], valid
+
+### FUNCTION:
+def calculate_pixel_index(longitude, latitude, pixel_lons, pixel_lats, tree=None):
+
+    '''
+    Calculate the nearest source gridpoint for every pixel of a separable (longitude x latitude) pixel grid.
+
+    Args:
+    - longitude (np.ndarray): Source longitude values (1D for rectilinear grids, 2D for curvilinear grids).
+    - latitude (np.ndarray): Source latitude values (1D for rectilinear grids, 2D for curvilinear grids).
+    - pixel_lons (np.ndarray): 1D longitudes of the pixel columns.
+    - pixel_lats (np.ndarray): 1D latitudes of the pixel rows.
+    - tree (scipy.spatial.cKDTree or None): Prebuilt (lat, lon) tree for curvilinear grids, reused across calls.
+        - default: None
+
+    Returns:
+    - index (tuple): Index arrays selecting the (num_lats, num_lons) pixel grid from a source field.
+    - valid (np.ndarray): Mask of pixels covered by the source grid.
+    '''
+
+    longitude = np.asarray(longitude)
+    latitude = np.asarray(latitude)
+
+    if longitude.ndim == 1 and latitude.ndim == 1:
+        x_index, x_valid = calculate_nearest_index(longitude, pixel_lons)
+        y_index, y_valid = calculate_nearest_index(latitude, pixel_lats)
+        index = np.ix_(y_index, x_index)
+        valid = y_valid[:, None] & x_valid[None, :]
     else:
-        lat_index = model_data['lat'].isel(y=y_index, x=x_index).values
-        lon_index = model_data['lon'].isel(y=y_index, x=x_index).values
+        if tree is None:
+            tree = cKDTree(np.column_stack([latitude.ravel(), longitude.ravel()]))
+        pixel_lon_grid, pixel_lat_grid = np.meshgrid(pixel_lons, pixel_lats)
+        distance, flat_index = tree.query(np.column_stack([pixel_lat_grid.ravel(), pixel_lon_grid.ravel()]))
+        spacing = max(np.abs(np.diff(latitude, axis=0)).max(), np.abs(np.diff(longitude, axis=1)).max())
+        index = np.unravel_index(flat_index.reshape(len(pixel_lats), len(pixel_lons)), latitude.shape)
+        valid = (distance <= spacing).reshape(len(pixel_lats), len(pixel_lons))
+
+    return index, valid
+
+### FUNCTION:
+def calculate_raster_regrid(ax, longitude, latitude, fidelity=1.0, dpi=None):
+
+    '''
+    Calculate (and cache) the nearest source gridpoint for every pixel of the map projection grid covering an axes.
+
+    Args:
+    - ax (cartopy.mpl.geoaxes.GeoAxesSubplot): The cartopy map the raster will be drawn on. Its extent must already be set.
+    - longitude (array-like): Longitude values (1D for rectilinear grids, 2D for curvilinear grids).
+    - latitude (array-like): Latitude values (1D for rectilinear grids, 2D for curvilinear grids).
+    - fidelity (float): Fraction of the saved figure pixel resolution used for the raster.
+        - default: 1.0
+    - dpi (int or None): Resolution of the saved figure. The figure resolution when None.
+        - default: None
+
+    Returns:
+    - regrid (dict): The pixel grid extent in map coordinates, the source indices and the valid pixel mask.
+    '''
 
-    return (y_index, x_index), (lat_index, lon_index)
+    longitude = np.asarray(longitude)
+    latitude = np.asarray(latitude)
+
+    dpi = ax.figure.dpi if dpi is None else dpi
+    map_extent = tuple(float(value) for value in ax.get_extent(crs=ax.projection))
+    bbox = ax.get_window_extent().transformed(ax.figure.dpi_scale_trans.inverted())
+    num_x = max(2, int(round(bbox.width * dpi * fidelity)))
+    num_y = max(2, int(round(bbox.height * dpi * fidelity)))
+
+    grid_key = (longitude.shape, latitude.shape, float(longitude.flat[0]), float(longitude.flat[-1]), float(latitude.flat[0]), float(latitude.flat[-1]))
+    cache_key = (grid_key, ax.projection.proj4_init, map_extent, num_x, num_y)
+    if cache_key in REGRID_CACHE:
+        return REGRID_CACHE[cache_key]
+
+    x_step = (map_extent[1] - map_extent[0]) / num_x
+    y_step = (map_extent[3] - map_extent[2]) / num_y
+    x_centers = map_extent[0] + (np.arange(num_x) + 0.5) * x_step
+    y_centers = map_extent[2] + (np.arange(num_y) + 0.5) * y_step
+    pixel_lons = ccrs.PlateCarree().transform_points(ax.projection, x_centers, np.zeros(num_x))[:, 0]
+    pixel_lats = ccrs.PlateCarree().transform_points(ax.projection, np.zeros(num_y), y_centers)[:, 1]
+
+    tree = calculate_grid_locator(latitude, longitude).tree
+    index, valid = calculate_pixel_index(longitude, latitude, pixel_lons, pixel_lats, tree=tree)
+
+    regrid = {
+        'extent': map_extent,
+        'index': index,
+        'valid': valid
+    }
+    if len(REGRID_CACHE) >= 16:
+        REGRID_CACHE.pop(next(iter(REGRID_CACHE)))
+    REGRID_CACHE[cache_key] = regrid
+
+    return regrid
 
 ### FUNCTION:
 def calculate_ticks(extent, direction):
@@ -555,7 +1056,7 @@ def calculate_ticks(extent, direction):
 # PLOT FUNCTIONS
 
 ### FUNCTION:
-def plot_formatted_ticks(ax, extent_lon, extent_lat, proj=ccrs.Mercator(), fontsize=16, label_left=True, label_right=False, label_bottom=True, label_top=False, gridlines=True):
+def plot_formatted_ticks(ax, extent_lon, extent_lat, proj=None, fontsize=16, label_left=True, label_right=False, label_bottom=True, label_top=False, gridlines=True):
     
     '''
     Calculate and add formatted tick marks to the map based on longitude and latitude extents.
@@ -564,8 +1065,8 @@ def plot_formatted_ticks(ax, extent_lon, extent_lat, proj=ccrs.Mercator(), fonts
     - ax (matplotlib.axes._subplots.AxesSubplot): The axes to set the ticks for.
     - extent_lon (list): Longitude bounds of the map, [min_longitude, max_longitude].
     - extent_lat (list): Latitude bounds of the map, [min_latitude, max_latitude].
-    - proj (cartopy.crs class, optional): Define a projected coordinate system for ticks.
-        - default: ccrs.Mercator()
+    - proj (cartopy.crs class, optional): Define a projected coordinate system for ticks. None uses ccrs.Mercator().
+        - default: None
     - fontsize (int, optional): Font size of tick labels.
         - default: 10
     - label_left (bool, optional): Label the left side of the map.
@@ -584,6 +1085,8 @@ def plot_formatted_ticks(ax, extent_lon, extent_lat, proj=ccrs.Mercator(), fonts
     
     if not (len(extent_lon) == 2 and len(extent_lat) == 2):
         raise ValueError("extent_lon and extent_lat must each contain exactly two elements: [min_val, max_val].")
+    if proj is None:
+        proj = ccrs.Mercator()
     overall_extent = [extent_lon[0], extent_lon[1], extent_lat[0], extent_lat[1]]
     
     minor_lon_ticks, major_lon_ticks, major_lon_labels = calculate_ticks(overall_extent, 'longitude')
@@ -605,6 +1108,27 @@ def plot_formatted_ticks(ax, extent_lon, extent_lat, proj=ccrs.Mercator(), fonts
         gl.xlocator = mticker.FixedLocator(minor_lon_ticks)
         gl.ylocator = mticker.FixedLocator(minor_lat_ticks)
 
+### FUNCTION:
+def plot_basemap_source(path):
+
+    '''
+    Open a static basemap file once per process: the bathymetry NetCDF (lazily, in chunks) or the EEZ shapefile geometries.
+
+    Args:
+    - path (str): Path of the bathymetry NetCDF or of the EEZ shapefile.
+
+    Returns:
+    - source (xarray.Dataset or list): The bathymetry dataset, or the list of EEZ geometries.
+    '''
+
+    if path not in BASEMAP_CACHE:
+        if path.endswith('.shp'):
+            BASEMAP_CACHE[path] = list(shapereader.Reader(path).geometries())
+        else:
+            BASEMAP_CACHE[path] = xr.open_dataset(path, chunks={'lat': 1000, 'lon': 1000})
+
+    return BASEMAP_CACHE[path]
+
 ### FUNCTION:
 def plot_bathymetry(ax, config, model_data, isobath1=-100, isobath2=-1000, downsample="auto", show_legend=False):
     
@@ -629,7 +1153,7 @@ def plot_bathymetry(ax, config, model_data, isobath1=-100, isobath2=-1000, downs
     '''
 
     bathymetry_path = config['DATA']['bathymetry_path']
-    bathy_data = xr.open_dataset(bathymetry_path, chunks={'lat': 1000, 'lon': 1000})
+    bathy_data = plot_basemap_source(bathymetry_path)
     bathy_data = bathy_data.sel(lat=slice(model_data.lat.min(), model_data.lat.max()), lon=slice(model_data.lon.min(), model_data.lon.max()))
     
     if downsample == "auto":
@@ -648,7 +1172,7 @@ def plot_bathymetry(ax, config, model_data, isobath1=-100, isobath2=-1000, downs
 
     if downsample:
         bathy_data = bathy_data.coarsen(lat=25, lon=25, boundary='trim').mean()
-        ax.add_feature(cfeature.OCEAN, zorder=1)
+        plot_ocean(ax, config)
 
     bathy_data = bathy_data.compute()
 
@@ -678,6 +1202,47 @@ def plot_bathymetry(ax, config, model_data, isobath1=-100, isobath2=-1000, downs
         for text in bathymetry_legend.get_texts():
             text.set_color('black')
 
+### FUNCTION:
+def plot_ocean(ax, config):
+
+    '''
+    Fill the map with the ocean: the Natural Earth ocean feature, or a plain water background when 'show_basemap' is off.
+
+    Args:
+    - ax (cartopy.mpl.geoaxes.GeoAxesSubplot): The cartopy map.
+    - config (dict): Glider Guidance System mission configuration.
+
+    Returns:
+    - None
+    '''
+
+    if config['PRODUCT'].get('show_basemap', True):
+        ax.add_feature(cfeature.OCEAN, zorder=1)
+    else:
+        ax.set_facecolor(cfeature.COLORS['water'])
+
+### FUNCTION:
+def plot_land_features(ax, config):
+
+    '''
+    Add the coastlines, rivers, lakes and borders to the map, unless 'show_basemap' is off.
+
+    Args:
+    - ax (cartopy.mpl.geoaxes.GeoAxesSubplot): The cartopy map.
+    - config (dict): Glider Guidance System mission configuration.
+
+    Returns:
+    - None
+    '''
+
+    if not config['PRODUCT'].get('show_basemap', True):
+        return
+
+    ax.add_feature(cfeature.GSHHSFeature(scale='full'), edgecolor="black", facecolor="tan", linewidth=0.25, zorder=90)
+    ax.add_feature(cfeature.RIVERS, edgecolor="steelblue", linewidth=0.25, zorder=90)
+    ax.add_feature(cfeature.LAKES, edgecolor="black", facecolor="lightsteelblue", linewidth=0.25, zorder=90)
+    ax.add_feature(cfeature.BORDERS, edgecolor="black", linewidth=0.25, zorder=90)
+
 ### FUNCTION:
 def plot_streamlines(ax, longitude, latitude, u_depth_avg, v_depth_avg, density=2):
     
@@ -701,7 +1266,65 @@ def plot_streamlines(ax, longitude, latitude, u_depth_avg, v_depth_avg, density=
     streamplot.lines.set_alpha(1.0)
 
 ### FUNCTION:
-def plot_magnitude_contour(ax, fig, longitude, latitude, mag_depth_avg, max_levels=10, extend_max=True):
+def format_contour_cmap(cmap, levels, extend="neither"):
+
+    '''
+    Build the discrete colormap and norm that reproduce the band colors of a filled contour, so a raster drawn with them matches 'contourf'.
+    Like 'contourf', every band takes the color at its midpoint between the first and the last level, and the extended bands take the colormap under and over colors.
+
+    Args:
+    - cmap (matplotlib.colors.Colormap): Colormap of the filled contour.
+    - levels (array-like): Contour levels.
+    - extend (str): Extended bands. Options: 'neither', 'min', 'max' or 'both'.
+        - default: 'neither'
+
+    Returns:
+    - band_cmap (matplotlib.colors.ListedColormap): One color per band between the levels.
+    - band_norm (matplotlib.colors.BoundaryNorm): Norm mapping values to the bands.
+    '''
+
+    levels = np.asarray(levels, dtype=float)
+    midpoints = 0.5 * (levels[:-1] + levels[1:])
+    band_cmap = mcolors.ListedColormap(cmap(mcolors.Normalize(levels[0], levels[-1])(midpoints)))
+    band_cmap.set_under(cmap.get_under() if extend in ('min', 'both') else 'none')
+    band_cmap.set_over(cmap.get_over() if extend in ('max', 'both') else 'none')
+    band_cmap.set_bad('none')
+    band_norm = mcolors.BoundaryNorm(levels, band_cmap.N)
+
+    return band_cmap, band_norm
+
+### FUNCTION:
+def plot_raster_field(ax, longitude, latitude, field, fidelity=1.0, **kwargs):
+
+    '''
+    Resample a field to the map projection pixel grid once and draw it as an image, avoiding contour polygon reprojection.
+
+    Args:
+    - ax (cartopy.mpl.geoaxes.GeoAxesSubplot): The cartopy map to draw the field on.
+    - longitude (array-like): Longitude values.
+    - latitude (array-like): Latitude values.
+    - field (array-like): Field values on the longitude/latitude grid.
+    - fidelity (float): Fraction of the saved figure pixel resolution used for the raster.
+        - default: 1.0
+    - kwargs: Additional keyword arguments passed to 'imshow' (cmap, norm, alpha, zorder).
+
+    Returns:
+    - image (matplotlib.image.AxesImage): The drawn raster image.
+    '''
+
+    regrid = calculate_raster_regrid(ax, longitude, latitude, fidelity=fidelity)
+    field = np.asarray(field, dtype=float)
+
+    raster = field[regrid['index']]
+    raster = np.where(regrid['valid'], raster, np.nan)
+    raster = np.ma.masked_invalid(raster)
+
+    image = ax.imshow(raster, extent=regrid['extent'], transform=ax.projection, origin='lower', interpolation='nearest', **kwargs)
+
+    return image
+
+### FUNCTION:
+def plot_magnitude_contour(ax, fig, longitude, latitude, mag_depth_avg, max_levels=10, extend_max=True, render_mode="contour", fidelity=1.0, cbar=None):
     
     '''
     Plots a magnitude contour and adds a formatted color bar to the plot.
@@ -716,14 +1339,24 @@ def plot_magnitude_contour(ax, fig, longitude, latitude, mag_depth_avg, max_leve
         - default: 10
     - extend_max (bool): Whether to extend the maximum color level.
         - default: True
+    - render_mode (str): Rendering mode. Options: 'contour' or 'raster'.
+        - default: 'contour'
+    - fidelity (float): Fraction of the saved figure pixel resolution used in 'raster' mode.
+        - default: 1.0
+    - cbar (tuple or None): Precomputed (levels, ticks, extend) of the color bar, e.g. from the derived fields. Calculated from the magnitude when None.
+        - default: None
 
     Returns:
     - None
     '''
 
-    levels, ticks, extend = format_contour_cbar(mag_depth_avg, max_levels=max_levels, extend_max=extend_max)
+    levels, ticks, extend = cbar if cbar is not None else format_contour_cbar(mag_depth_avg, max_levels=max_levels, extend_max=extend_max)
     
-    contourf = ax.contourf(longitude, latitude, mag_depth_avg, levels=levels, cmap=cmo.speed, transform=ccrs.PlateCarree(), zorder=10, extend=extend)
+    if render_mode == "raster":
+        cmap, norm = format_contour_cmap(cmo.speed, levels, extend)
+        contourf = plot_raster_field(ax, longitude, latitude, mag_depth_avg, fidelity=fidelity, cmap=cmap, norm=norm, zorder=10)
+    else:
+        contourf = ax.contourf(longitude, latitude, mag_depth_avg, levels=levels, cmap=cmo.speed, transform=ccrs.PlateCarree(), zorder=10, extend=extend)
     
     cbar = fig.colorbar(contourf, orientation='vertical', extend=extend, ax=ax)
     cbar.set_label('Depth Averaged Current Magnitude (m/s)', labelpad=10)
@@ -732,7 +1365,7 @@ def plot_magnitude_contour(ax, fig, longitude, latitude, mag_depth_avg, max_leve
     format_cbar_position(ax, cbar)
 
 ### FUNCTION:
-def plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag3, mag4, mag5, threshold_legend=True):
+def plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag3, mag4, mag5, threshold_legend=True, render_mode="contour", fidelity=1.0, threshold_classes=None, max_mag=None):
     
     '''
     Adds threshold zones to the map.
@@ -749,12 +1382,21 @@ def plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag
     - mag5 (float): Fifth threshold magnitude.
     - threshold_legend (bool): Show legend.
         - default: True
+    - render_mode (str): Rendering mode. Options: 'contour' or 'raster'.
+        - default: 'contour'
+    - fidelity (float): Fraction of the saved figure pixel resolution used in 'raster' mode.
+        - default: 1.0
+    - threshold_classes (np.ndarray or None): Precomputed uint8 threshold class grid (classes 0 to 4 above mag2 to mag5, 255 for no data), drawn directly in 'raster' mode.
+        - default: None
+    - max_mag (float or None): Precomputed maximum magnitude. Calculated from the magnitude when None.
+        - default: None
     
     Returns:
     - None
     '''
 
-    max_mag = np.nanmax(mag_depth_avg)
+    if max_mag is None:
+        max_mag = np.nanmax(mag_depth_avg)
     max_label = f'{max_mag:.2f}'
 
     if max_mag <= mag1:
@@ -778,7 +1420,18 @@ def plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag
         colors = ['none', 'yellow', 'orange', 'orangered', 'maroon', 'maroon']
         labels = [None, f'{mag2} - {mag3} m/s', f'{mag3} - {mag4} m/s', f'{mag4} - {mag5} m/s', f'{mag5} - {max_label} m/s']
 
-    if levels:
+    if levels and render_mode == "raster" and threshold_classes is not None:
+        threshold_cmap = mcolors.ListedColormap(['none'] + colors[1:len(levels)-1] + [colors[len(levels)-2]] * (5 - (len(levels) - 1)))
+        threshold_norm = mcolors.BoundaryNorm(np.arange(-0.5, 5), threshold_cmap.N)
+        threshold_field = np.where(threshold_classes == 255, np.nan, threshold_classes)
+        threshold_contourf = plot_raster_field(ax, longitude, latitude, threshold_field, fidelity=fidelity, cmap=threshold_cmap, norm=threshold_norm, zorder=10)
+    elif levels and render_mode == "raster":
+        threshold_cmap = mcolors.ListedColormap(colors[:len(levels)-1])
+        threshold_cmap.set_under('none')
+        threshold_cmap.set_over(colors[len(levels)-2])
+        threshold_norm = mcolors.BoundaryNorm(levels, threshold_cmap.N)
+        threshold_contourf = plot_raster_field(ax, longitude, latitude, mag_depth_avg, fidelity=fidelity, cmap=threshold_cmap, norm=threshold_norm, zorder=10)
+    elif levels:
         threshold_contourf = ax.contourf(longitude, latitude, mag_depth_avg, levels=levels, colors=colors[:len(levels)-1], extend='both', transform=ccrs.PlateCarree(), zorder=10)
     
     patches = []
@@ -794,7 +1447,7 @@ def plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag
         ax.add_artist(threshold_legend)
 
 ### FUNCTION:
-def plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, tolerance, advantage_legend=True):
+def plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, tolerance, advantage_legend=True, render_mode="contour", fidelity=1.0, advantage_mask=None):
     
     '''
     Adds advantage zones to the map.
@@ -806,6 +1459,12 @@ def plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, toleran
     - tolerance (float): Tolerance for the advantage zones.
     - advantage_legend (bool): Show legend.
         - default: True
+    - render_mode (str): Rendering mode. Options: 'contour' or 'raster'.
+        - default: 'contour'
+    - fidelity (float): Fraction of the saved figure pixel resolution used in 'raster' mode.
+        - default: 1.0
+    - advantage_mask (np.ndarray or None): Precomputed boolean mask of the cells inside the bearing window, e.g. from the derived fields. Calculated from the direction when None.
+        - default: None
 
     Returns:
     - None
@@ -824,7 +1483,9 @@ def plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, toleran
     bearing_lower = (direct_bearing - tolerance) % 360
     bearing_upper = (direct_bearing + tolerance) % 360
 
-    if bearing_lower < bearing_upper:
+    if advantage_mask is not None:
+        mask = advantage_mask
+    elif bearing_lower < bearing_upper:
         mask = (dir_depth_avg >= bearing_lower) & (dir_depth_avg <= bearing_upper)
     else:
         mask = (dir_depth_avg >= bearing_lower) | (dir_depth_avg <= bearing_upper)
@@ -832,7 +1493,11 @@ def plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, toleran
     acceptable_bearing = np.full_like(dir_depth_avg, np.nan)
     acceptable_bearing[mask] = dir_depth_avg[mask]
 
-    advantage_contourf = ax.contourf(longitude, latitude, acceptable_bearing, levels=[bearing_lower, bearing_upper, 360], colors=['purple'], alpha=0.5, transform=ccrs.PlateCarree(), zorder=10)
+    if render_mode == "raster":
+        advantage_mask = np.where(mask, 1.0, np.nan)
+        advantage_contourf = plot_raster_field(ax, longitude, latitude, advantage_mask, fidelity=fidelity, cmap=mcolors.ListedColormap(['purple']), alpha=0.5, zorder=10)
+    else:
+        advantage_contourf = ax.contourf(longitude, latitude, acceptable_bearing, levels=[bearing_lower, bearing_upper, 360], colors=['purple'], alpha=0.5, transform=ccrs.PlateCarree(), zorder=10)
 
     if advantage_legend:
         bearing_label_lower = round((direct_bearing - tolerance) % 360)
@@ -862,23 +1527,11 @@ def plot_profile_thresholds(ax, data, threshold, color):
     '''
 
     depth_values = np.arange(len(data))
-    regions = []
-    start = None
-
-    for i, value in enumerate(data):
-        if value > threshold:
-            if start is None:
-                start = i
-        else:
-            if start is not None:
-                regions.append((start, i))
-                start = None
+    x_min, x_max = ax.get_xlim()
+    starts, ends = calculate_threshold_runs(data, threshold)
 
-    if start is not None:
-        regions.append((start, len(data)))
-
-    for start, end in regions:
-        ax.fill_betweenx(depth_values[start:end], ax.get_xlim()[0], ax.get_xlim()[1], color=color, alpha=0.25)
+    for start, end in zip(starts, ends):
+        ax.fill_betweenx(depth_values[start:end], x_min, x_max, color=color, alpha=0.25)
 
     ax.plot([], [], color=color, alpha=0.5, linewidth=10, label=f'Above Threshold = [{threshold}]')
 
@@ -906,267 +1559,100 @@ def plot_optimal_path(ax, config, model_depth_average, optimal_path):
         return
 
 ### FUNCTION:
-def profile_rtofs(axs, dataset, latitude_qc, longitude_qc, threshold):
-    
+def profile_extract(dataset, latitudes, longitudes):
+
     '''
-    Plot the RTOFS model data profiles for a given latitude and longitude.
+    Extract the model, depth average and bin average columns of one model at many stations, with one vectorized indexing call per dataset.
 
     Args:
-    - axs (list): List of matplotlib axes objects.
-    - dataset (tuple): Tuple containing the RTOFS model data, depth-averaged data, and bin-averaged data.
-    - latitude_qc (float): Target latitude value.
-    - longitude_qc (float): Target longitude value.
-    - threshold (float): Threshold value for shading.
+    - dataset (tuple): Tuple containing the model data, depth-averaged data, and bin-averaged data.
+    - latitudes (array-like): Station latitudes.
+    - longitudes (array-like): Station longitudes.
 
     Returns:
-    - None
+    - columns (dict): Per variable of 'PROFILE_VARIABLES', the values shaped (stations,) or (stations, depths/bins), with the 'depth' and 'bin_depth' levels, the 'model_name' and the gridpoint 'lat'/'lon' per station.
     '''
 
-    rtofs_model_data, rtofs_depth_average, rtofs_bin_average = dataset
-
-    (y_rtofs_model, x_rtofs_model), _ = calculate_gridpoint(rtofs_model_data, latitude_qc, longitude_qc)
-    (y_rtofs_avg, x_rtofs_avg), _ = calculate_gridpoint(rtofs_depth_average, latitude_qc, longitude_qc)
-    (y_rtofs_bin, x_rtofs_bin), _ = calculate_gridpoint(rtofs_bin_average, latitude_qc, longitude_qc)
-    
-    rtofs_model_u = rtofs_model_data['u'].isel(y=y_rtofs_model, x=x_rtofs_model).values
-    rtofs_avg_u = rtofs_depth_average['u_depth_avg'].isel(y=y_rtofs_avg, x=x_rtofs_avg).values
-    rtofs_avg_u = rtofs_avg_u.item()
-    rtofs_bin_u = rtofs_bin_average['u_bin_avg'].isel(y=y_rtofs_bin, x=x_rtofs_bin).values
-    rtofs_bin_u1d = rtofs_bin_u[0]
-
-    rtofs_model_v = rtofs_model_data['v'].isel(y=y_rtofs_model, x=x_rtofs_model).values
-    rtofs_avg_v = rtofs_depth_average['v_depth_avg'].isel(y=y_rtofs_avg, x=x_rtofs_avg).values
-    rtofs_avg_v = rtofs_avg_v.item()
-    rtofs_bin_v = rtofs_bin_average['v_bin_avg'].isel(y=y_rtofs_bin, x=x_rtofs_bin).values
-    rtofs_bin_v1d = rtofs_bin_v[0]
-
-    rtofs_avg_mag = rtofs_depth_average['mag_depth_avg'].isel(y=y_rtofs_avg, x=x_rtofs_avg).values
-    rtofs_avg_mag = rtofs_avg_mag.item()
-    rtofs_bin_mag = rtofs_bin_average['mag_bin_avg'].isel(y=y_rtofs_bin, x=x_rtofs_bin).values
-    rtofs_bin_mag1d = rtofs_bin_mag[0]
-
-    rtofs_bin_dir = rtofs_bin_average['dir_bin_avg'].isel(y=y_rtofs_bin, x=x_rtofs_bin).values
-    rtofs_bin_dir = np.mod(rtofs_bin_dir, 360)
-
-    rtofs_avg_dir = rtofs_depth_average['dir_depth_avg'].isel(y=y_rtofs_avg, x=x_rtofs_avg).values
-    rtofs_avg_dir = rtofs_avg_dir.item()
-    rtofs_avg_dir = np.mod(rtofs_avg_dir, 360)
-
-    rtofs_max_depth = rtofs_model_data.depth.max().item()
-    rtofs_max_bins = rtofs_max_depth + 1
-    rtofs_bin_depths = np.arange(rtofs_max_bins)
-
-    ax = axs[0]
-    ax.scatter(rtofs_model_u, rtofs_model_data.depth, marker='x', color='black', s=100, label='Model Datapoint', alpha=1.0, zorder=3)
-    ax.scatter(rtofs_bin_u, rtofs_bin_depths, label='1m Interpolation', color='cyan', alpha=1.0, zorder=2)
-    ax.axvline(x=rtofs_avg_u, label=f'Depth Average = [{rtofs_avg_u:.2f}]', color='darkcyan', linestyle='--', linewidth=2, zorder=1)
-    ax.set_xlabel('u Velocity (m/s)', fontsize=12, fontweight='bold')
-    ax.set_ylabel('Depth (m)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-
-    ax = axs[1]
-    ax.scatter(rtofs_model_v, rtofs_model_data.depth, label='Model Datapoint', marker='x', color='black', s=100, alpha=1.0, zorder=3)
-    ax.scatter(rtofs_bin_v, rtofs_bin_depths, label='1m Interpolation', color='orange', alpha=1.0, zorder=2)
-    ax.axvline(x=rtofs_avg_v, label=f'Depth Avgerage = [{rtofs_avg_v:.2f}]', color='darkorange', linestyle='--', linewidth=2, zorder=1)
-    ax.set_xlabel('v Velocity (m/s)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-
-    ax = axs[2]
-    ax.scatter(rtofs_bin_mag, rtofs_bin_depths, label='1m Interpolation', color='green', alpha=1.0, zorder=2)
-    ax.set_xlabel('Current Magnitude (m/s)', fontsize=12, fontweight='bold')
-    ax.axvline(x=rtofs_avg_mag, label=f'Depth Avgerage = [{rtofs_avg_mag:.2f}]', color='darkgreen', linestyle='--', linewidth=2, zorder=1)
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-
-    ax = axs[3]
-    ax.scatter(rtofs_bin_dir, rtofs_bin_depths, label='1m Interpolation', color='purple', alpha=1.0, zorder=2)
-    ax.axvline(x=rtofs_avg_dir, label=f'Depth Average = [{rtofs_avg_dir:.2f}]', color='darkviolet', linestyle='--', linewidth=2, zorder=1)
-    ax.set_xlabel('Current Direction (degrees)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-
-    shading_colors = ['cyan', 'orange', 'green']
-    for i, (data_1d, color) in enumerate(zip([rtofs_bin_u1d, rtofs_bin_v1d, rtofs_bin_mag1d], shading_colors)):
-        plot_profile_thresholds(axs[i], data_1d, threshold, color)
-
-    axs[0].set_ylabel('Depth (m)', fontsize=12, fontweight='bold')
-    for ax in axs:
-        ax.invert_yaxis()
-        ax.tick_params(axis='x', labelrotation=45)
-        ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-        handles, labels = ax.get_legend_handles_labels()
-        if labels:
-            ax.legend(handles, labels, loc='lower center', facecolor='lightgrey', edgecolor='black', framealpha=1.0, fontsize=14)
+    columns = {}
+    for model_dataset, variables in zip(dataset, PROFILE_VARIABLES):
+        (y_index, x_index), (lat_index, lon_index) = calculate_gridpoints(model_dataset, latitudes, longitudes)
+        y_dim, x_dim = model_dataset['lat'].dims if model_dataset['lat'].ndim == 2 else ('lat', 'lon')
+        selection = model_dataset[list(variables)]
+        if 'time' in selection.dims:
+            selection = selection.isel(time=0)
+        selection = selection.isel({y_dim: xr.DataArray(y_index, dims='station'), x_dim: xr.DataArray(x_index, dims='station')}).load()
+        for variable in variables:
+            columns[variable] = selection[variable].transpose('station', ...).values
+        columns.setdefault('lat', lat_index)
+        columns.setdefault('lon', lon_index)
+
+    columns['dir_bin_avg'] = np.mod(columns['dir_bin_avg'], 360)
+    columns['dir_depth_avg'] = np.mod(columns['dir_depth_avg'], 360)
+    columns['depth'] = dataset[0].depth.values
+    columns['bin_depth'] = dataset[2]['bin'].values
+    columns['model_name'] = dataset[1].attrs.get('model_name')
+
+    return columns
 
 ### FUNCTION:
-def profile_cmems(axs, dataset, latitude_qc, longitude_qc, threshold):
-    
+def profile_station(columns, station):
+
     '''
-    Plot the CMEMS model data profiles for a given latitude and longitude.
+    Select the columns of one station from the columns extracted at many stations.
 
     Args:
-    - axs (list): List of matplotlib axes objects.
-    - dataset (tuple): Tuple containing the CMEMS model data, depth-averaged data, and bin-averaged data.
-    - latitude_qc (float): Target latitude value.
-    - longitude_qc (float): Target longitude value.
-    - threshold (float): Threshold value for shading.
+    - columns (dict): Columns from 'profile_extract'.
+    - station (int): Station index.
 
     Returns:
-    - None
+    - station_columns (dict): Columns of the station, with 1D profiles and scalar depth averages.
     '''
 
-    cmems_model_data, cmems_depth_average, cmems_bin_average = dataset
-        
-    (y_cmems_model, x_cmems_model), _ = calculate_gridpoint(cmems_model_data, latitude_qc, longitude_qc)
-    (y_cmems_avg, x_cmems_avg), _ = calculate_gridpoint(cmems_depth_average, latitude_qc, longitude_qc)
-    (y_cmems_bin, x_cmems_bin), _ = calculate_gridpoint(cmems_bin_average, latitude_qc, longitude_qc)
-
-    cmems_model_u = cmems_model_data['u'].isel(lat=y_cmems_model, lon=x_cmems_model).values
-    cmems_avg_u = cmems_depth_average['u_depth_avg'].isel(lat=y_cmems_avg, lon=x_cmems_avg).values
-    cmems_avg_u = cmems_avg_u.item()
-    cmems_bin_u = cmems_bin_average['u_bin_avg'].isel(lat=y_cmems_bin, lon=x_cmems_bin).values
-    cmems_bin_u1d = cmems_bin_u[0]
-
-    cmems_model_v = cmems_model_data['v'].isel(lat=y_cmems_model, lon=x_cmems_model).values
-    cmems_avg_v = cmems_depth_average['v_depth_avg'].isel(lat=y_cmems_avg, lon=x_cmems_avg).values
-    cmems_avg_v = cmems_avg_v.item()
-    cmems_bin_v = cmems_bin_average['v_bin_avg'].isel(lat=y_cmems_bin, lon=x_cmems_bin).values
-    cmems_bin_v1d = cmems_bin_v[0]
-
-    cmems_avg_mag = cmems_depth_average['mag_depth_avg'].isel(lat=y_cmems_avg, lon=x_cmems_avg).values
-    cmems_avg_mag = cmems_avg_mag.item()
-    cmems_bin_mag = cmems_bin_average['mag_bin_avg'].isel(lat=y_cmems_bin, lon=x_cmems_bin).values
-    cmems_bin_mag1d = cmems_bin_mag[0]
-
-    cmems_bin_dir = cmems_bin_average['dir_bin_avg'].isel(lat=y_cmems_bin, lon=x_cmems_bin).values
-    cmems_bin_dir = np.mod(cmems_bin_dir, 360)
-
-    cmems_avg_dir = cmems_depth_average['dir_depth_avg'].isel(lat=y_cmems_bin, lon=x_cmems_bin).values
-    cmems_avg_dir = cmems_avg_dir.item()
-    cmems_avg_dir = np.mod(cmems_avg_dir, 360)
-
-    cmems_max_depth = cmems_model_data.depth.max().item()
-    cmems_max_bins = cmems_max_depth + 1
-    cmems_bin_depths = np.arange(cmems_max_bins)
-
-    ax = axs[0]
-    ax.scatter(cmems_model_u, cmems_model_data.depth, marker='x', color='black', s=100, label='Model Datapoint', alpha=1.0, zorder=3)
-    ax.scatter(cmems_bin_u, cmems_bin_depths, label='1m Interpolation', color='cyan', alpha=1.0, zorder=2)
-    ax.axvline(x=cmems_avg_u, label=f'Depth Average = [{cmems_avg_u:.2f}]', color='darkcyan', linestyle='--', linewidth=2, zorder=1)
-    ax.set_xlabel('u Velocity (m/s)', fontsize=12, fontweight='bold')
-    ax.set_ylabel('Depth (m)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-
-    ax = axs[1]
-    ax.scatter(cmems_model_v, cmems_model_data.depth, label='Model Datapoint', marker='x', color='black', s=100, alpha=1.0, zorder=3)
-    ax.scatter(cmems_bin_v, cmems_bin_depths, label='1m Interpolation', color='orange', alpha=1.0, zorder=2)
-    ax.axvline(x=cmems_avg_v, label=f'Depth Avgerage = [{cmems_avg_v:.2f}]', color='darkorange', linestyle='--', linewidth=2, zorder=1)
-    ax.set_xlabel('v Velocity (m/s)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-    
-    ax = axs[2]
-    ax.scatter(cmems_bin_mag, cmems_bin_depths, label='1m Interpolation', color='green', alpha=1.0, zorder=2)
-    ax.set_xlabel('Current Magnitude (m/s)', fontsize=12, fontweight='bold')
-    ax.axvline(x=cmems_avg_mag, label=f'Depth Avgerage = [{cmems_avg_mag:.2f}]', color='darkgreen', linestyle='--', linewidth=2, zorder=1)
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
+    station_columns = {}
+    for key, value in columns.items():
+        station_columns[key] = value[station] if key not in ('depth', 'bin_depth', 'model_name') else value
 
-    ax = axs[3]
-    ax.scatter(cmems_bin_dir, cmems_bin_depths, label='1m Interpolation', color='purple', alpha=1.0, zorder=2)
-    ax.axvline(x=cmems_avg_dir, label=f'Depth Average = [{cmems_avg_dir:.2f}]', color='darkviolet', linestyle='--', linewidth=2, zorder=1)
-    ax.set_xlabel('Current Direction (degrees)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-
-    shading_colors = ['cyan', 'orange', 'lawngreen']
-    for i, (data_1d, color) in enumerate(zip([cmems_bin_u1d, cmems_bin_v1d, cmems_bin_mag1d], shading_colors)):
-        plot_profile_thresholds(axs[i], data_1d, threshold, color)
-
-    axs[0].set_ylabel('Depth (m)', fontsize=12, fontweight='bold')
-    for ax in axs:
-        ax.invert_yaxis()
-        ax.tick_params(axis='x', labelrotation=45)
-        ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-        handles, labels = ax.get_legend_handles_labels()
-        if labels:
-            ax.legend(handles, labels, loc='lower center', facecolor='lightgrey', edgecolor='black', framealpha=1.0, fontsize=14)
+    return station_columns
 
 ### FUNCTION:
-def profile_gofs(axs, dataset, latitude_qc, longitude_qc, threshold):
-    
+def profile_plot(axs, columns, threshold):
+
     '''
-    Plot the GOFS model data profiles for a given latitude and longitude.
+    Plot the u, v, magnitude and direction profiles of one model at one station.
 
     Args:
     - axs (list): List of matplotlib axes objects.
-    - dataset (tuple): Tuple containing the GOFS model data, depth-averaged data, and bin-averaged data.
-    - latitude_qc (float): Target latitude value.
-    - longitude_qc (float): Target longitude value.
+    - columns (dict): Station columns from 'profile_station'.
     - threshold (float): Threshold value for shading.
 
     Returns:
     - None
     '''
 
-    gofs_model_data, gofs_depth_average, gofs_bin_average = dataset
-        
-    (y_gofs_model, x_gofs_model), _ = calculate_gridpoint(gofs_model_data, latitude_qc, longitude_qc)
-    (y_gofs_avg, x_gofs_avg), _ = calculate_gridpoint(gofs_depth_average, latitude_qc, longitude_qc)
-    (y_gofs_bin, x_gofs_bin), _ = calculate_gridpoint(gofs_bin_average, latitude_qc, longitude_qc)
-
-    gofs_model_u = gofs_model_data['u'].isel(lat=y_gofs_model, lon=x_gofs_model).values
-    gofs_avg_u = gofs_depth_average['u_depth_avg'].isel(lat=y_gofs_avg, lon=x_gofs_avg).values
-    gofs_avg_u = gofs_avg_u.item()
-    gofs_bin_u = gofs_bin_average['u_bin_avg'].isel(lat=y_gofs_bin, lon=x_gofs_bin).values
-    gofs_bin_u1d = gofs_bin_u[0]
-
-    gofs_model_v = gofs_model_data['v'].isel(lat=y_gofs_model, lon=x_gofs_model).values
-    gofs_avg_v = gofs_depth_average['v_depth_avg'].isel(lat=y_gofs_avg, lon=x_gofs_avg).values
-    gofs_avg_v = gofs_avg_v.item()
-    gofs_bin_v = gofs_bin_average['v_bin_avg'].isel(lat=y_gofs_bin, lon=x_gofs_bin).values
-    gofs_bin_v1d = gofs_bin_v[0]
-
-    gofs_avg_mag = gofs_depth_average['mag_depth_avg'].isel(lat=y_gofs_avg, lon=x_gofs_avg).values
-    gofs_avg_mag = gofs_avg_mag.item()
-    gofs_bin_mag = gofs_bin_average['mag_bin_avg'].isel(lat=y_gofs_bin, lon=x_gofs_bin).values
-    gofs_bin_mag1d = gofs_bin_mag[0]
-
-    gofs_bin_dir = gofs_bin_average['dir_bin_avg'].isel(lat=y_gofs_bin, lon=x_gofs_bin).values
-    gofs_bin_dir = np.mod(gofs_bin_dir, 360)
-
-    gofs_avg_dir = gofs_depth_average['dir_depth_avg'].isel(lat=y_gofs_avg, lon=x_gofs_avg).values
-    gofs_avg_dir = gofs_avg_dir.item()
-    gofs_avg_dir = np.mod(gofs_avg_dir, 360)
-
-    gofs_max_depth = gofs_model_data.depth.max().item()
-    gofs_max_bins = gofs_max_depth + 1
-    gofs_bin_depths = np.arange(gofs_max_bins)
-
     ax = axs[0]
-    ax.scatter(gofs_model_u, gofs_model_data.depth, marker='x', color='black', s=100, label='Model Datapoint', alpha=1.0, zorder=3)
-    ax.scatter(gofs_bin_u, gofs_bin_depths, label='1m Interpolation', color='cyan', alpha=1.0, zorder=2)
-    ax.axvline(x=gofs_avg_u, label=f'Depth Average = [{gofs_avg_u:.2f}]', color='darkcyan', linestyle='--', linewidth=2, zorder=1)
+    ax.scatter(columns['u'], columns['depth'], marker='x', color='black', s=100, label='Model Datapoint', alpha=1.0, zorder=3)
+    ax.scatter(columns['u_bin_avg'], columns['bin_depth'], label='1m Interpolation', color='cyan', alpha=1.0, zorder=2)
+    ax.axvline(x=columns['u_depth_avg'], label=f"Depth Average = [{columns['u_depth_avg']:.2f}]", color='darkcyan', linestyle='--', linewidth=2, zorder=1)
     ax.set_xlabel('u Velocity (m/s)', fontsize=12, fontweight='bold')
-    ax.set_ylabel('Depth (m)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
 
     ax = axs[1]
-    ax.scatter(gofs_model_v, gofs_model_data.depth, label='Model Datapoint', marker='x', color='black', s=100, alpha=1.0, zorder=3)
-    ax.scatter(gofs_bin_v, gofs_bin_depths, label='1m Interpolation', color='orange', alpha=1.0, zorder=2)
-    ax.axvline(x=gofs_avg_v, label=f'Depth Avgerage = [{gofs_avg_v:.2f}]', color='darkorange', linestyle='--', linewidth=2, zorder=1)
+    ax.scatter(columns['v'], columns['depth'], label='Model Datapoint', marker='x', color='black', s=100, alpha=1.0, zorder=3)
+    ax.scatter(columns['v_bin_avg'], columns['bin_depth'], label='1m Interpolation', color='orange', alpha=1.0, zorder=2)
+    ax.axvline(x=columns['v_depth_avg'], label=f"Depth Avgerage = [{columns['v_depth_avg']:.2f}]", color='darkorange', linestyle='--', linewidth=2, zorder=1)
     ax.set_xlabel('v Velocity (m/s)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
 
     ax = axs[2]
-    ax.scatter(gofs_bin_mag, gofs_bin_depths, label='1m Interpolation', color='green', alpha=1.0, zorder=2)
+    ax.scatter(columns['mag_bin_avg'], columns['bin_depth'], label='1m Interpolation', color='green', alpha=1.0, zorder=2)
+    ax.axvline(x=columns['mag_depth_avg'], label=f"Depth Avgerage = [{columns['mag_depth_avg']:.2f}]", color='darkgreen', linestyle='--', linewidth=2, zorder=1)
     ax.set_xlabel('Current Magnitude (m/s)', fontsize=12, fontweight='bold')
-    ax.axvline(x=gofs_avg_mag, label=f'Depth Avgerage = [{gofs_avg_mag:.2f}]', color='darkgreen', linestyle='--', linewidth=2, zorder=1)
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
-    
+
     ax = axs[3]
-    ax.scatter(gofs_bin_dir, gofs_bin_depths, label='1m Interpolation', color='purple', alpha=1.0, zorder=2)
-    ax.axvline(x=gofs_avg_dir, label=f'Depth Average = [{gofs_avg_dir:.2f}]', color='darkviolet', linestyle='--', linewidth=2, zorder=1)
+    ax.scatter(columns['dir_bin_avg'], columns['bin_depth'], label='1m Interpolation', color='purple', alpha=1.0, zorder=2)
+    ax.axvline(x=columns['dir_depth_avg'], label=f"Depth Average = [{columns['dir_depth_avg']:.2f}]", color='darkviolet', linestyle='--', linewidth=2, zorder=1)
     ax.set_xlabel('Current Direction (degrees)', fontsize=12, fontweight='bold')
-    ax.grid(color='lightgrey', linestyle='-', linewidth=0.5)
 
-    shading_colors = ['cyan', 'orange', 'lawngreen']
-    for i, (data_1d, color) in enumerate(zip([gofs_bin_u1d, gofs_bin_v1d, gofs_bin_mag1d], shading_colors)):
+    shading_colors = PROFILE_SHADING.get(columns['model_name'], PROFILE_SHADING['CMEMS'])
+    for i, (data_1d, color) in enumerate(zip([columns['u_bin_avg'], columns['v_bin_avg'], columns['mag_bin_avg']], shading_colors)):
         plot_profile_thresholds(axs[i], data_1d, threshold, color)
 
     axs[0].set_ylabel('Depth (m)', fontsize=12, fontweight='bold')
@@ -1237,7 +1723,7 @@ def plot_add_eez(ax, config, color='dimgrey', linewidth=3, zorder=90):
     eez_path = config['DATA']['eez_path']
 
     eez_feature = cfeature.ShapelyFeature(
-        Reader(eez_path).geometries(),
+        plot_basemap_source(eez_path),
         ccrs.PlateCarree(),
         edgecolor=color,
         facecolor='none',
@@ -1307,7 +1793,7 @@ def format_contour_cbar(magnitude, max_levels=10, extend_max=True):
     '''
 
     if isinstance(magnitude, xr.DataArray):
-        if isinstance(magnitude.data, dask.array.Array):
+        if isinstance(magnitude.data, dask_array.Array):
             magnitude = magnitude.compute()
         magnitude = magnitude.values
 
@@ -1524,57 +2010,3 @@ def convert_DD_to_DMS(DD):
     degree[negative_DD] *= -1
 
     return degree, minute, second
-
-# PRINT FUNCTIONS
-
-### FUNCTION:
-def print_starttime():
-
-    '''
-    Print the start time of the program.
-
-    Args:
-    - None
-
-    Returns:
-    - start_time (datetime.datetime): The start time of the program.
-    '''
-
-    start_time = dt.datetime.utcnow()
-    print(f"Start time (UTC): {start_time}")
-
-    return start_time
-
-### FUNCTION:
-def print_endtime():
-
-    '''
-    Print the end time of the program.
-
-    Args:
-    - None
-
-    Returns:
-    - end_time (datetime.datetime): The end time of the program.
-    '''
-
-    end_time = dt.datetime.utcnow()
-    print(f"End time (UTC): {end_time}")
-
-    return end_time
-
-### FUNCTION:
-def print_runtime(start_time, end_time):
-
-    '''
-    Print the runtime of the program.
-
-    Args:
-    - start_time (datetime.datetime): The start time of the program.
-    - end_time (datetime.datetime): The end time of the program.
-
-    Returns:
-    - None
-    '''
-
-    print(f"Run time: {end_time - start_time}")
@@ -7,7 +7,9 @@ import os
 from scipy.interpolate import interp1d
 import xarray as xr
 
-from X_functions import format_save_datetime, print_starttime, print_endtime, print_runtime
+from X_functions import format_save_datetime
+from X_storage import storage_save, storage_config
+from X_trace import trace_function
 
 # =========================
 
@@ -71,6 +73,7 @@ def interpolation_model(u, v, depths, max_bins, config_bins):
     return (u_bin_avg, v_bin_avg, mag_bin_avg, dir_bin_avg, u_depth_avg, v_depth_avg, mag_depth_avg, dir_depth_avg)
 
 ### FUNCTION:
+@trace_function()
 def interpolate_rtofs(config, directory, model_data, chunk=False, save_depth_average=True, save_bin_average=False):
     
     '''
@@ -94,7 +97,6 @@ def interpolate_rtofs(config, directory, model_data, chunk=False, save_depth_ave
     '''
 
     print("\n### INTERPOLATING RTOFS MODEL DATA ###\n")
-    start_time = print_starttime()
 
     if chunk:
         model_data = model_data.chunk({'y': 'auto', 'x': 'auto'})
@@ -144,18 +146,16 @@ def interpolate_rtofs(config, directory, model_data, chunk=False, save_depth_ave
     if save_depth_average:
         model_datetime = model_data.attrs['model_datetime']
         file_datetime = format_save_datetime(model_datetime)
-        model_depth_average.to_netcdf(os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_RTOFS_DepthAverage_{file_datetime}.nc"), unlimited_dims=['time'])
+        storage_save(model_depth_average, os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_RTOFS_DepthAverage_{file_datetime}"), **storage_config(config, 'depth_average'))
     if save_bin_average:
         model_datetime = model_data.attrs['model_datetime']
         file_datetime = format_save_datetime(model_datetime)
-        model_bin_average.to_netcdf(os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_RTOFS_BinAverage_{file_datetime}.nc"), unlimited_dims=['time'])
-    
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
-    
+        storage_save(model_bin_average, os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_RTOFS_BinAverage_{file_datetime}"), **storage_config(config, 'bin_average'))
+
     return model_depth_average, model_bin_average
 
 ### FUNCTION:
+@trace_function()
 def interpolate_cmems(config, directory, model_data, chunk=False, save_depth_average=True, save_bin_average=False):
 
     '''
@@ -179,7 +179,6 @@ def interpolate_cmems(config, directory, model_data, chunk=False, save_depth_ave
     '''
 
     print("\n### INTERPOLATING CMEMS MODEL DATA ###\n")
-    start_time = print_starttime()
 
     if chunk:
         model_data = model_data.chunk({'lat': 'auto', 'lon': 'auto'})
@@ -238,18 +237,16 @@ def interpolate_cmems(config, directory, model_data, chunk=False, save_depth_ave
     if save_depth_average:
         model_datetime = model_data.attrs['model_datetime']
         file_datetime = format_save_datetime(model_datetime)
-        model_depth_average.to_netcdf(os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_CMEMS_DepthAverage_{file_datetime}.nc"), unlimited_dims=['time'])
+        storage_save(model_depth_average, os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_CMEMS_DepthAverage_{file_datetime}"), **storage_config(config, 'depth_average'))
     if save_bin_average:
         model_datetime = model_data.attrs['model_datetime']
         file_datetime = format_save_datetime(model_datetime)
-        model_bin_average.to_netcdf(os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_CMEMS_BinAverage_{file_datetime}.nc"), unlimited_dims=['time'])
-    
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
-    
+        storage_save(model_bin_average, os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_CMEMS_BinAverage_{file_datetime}"), **storage_config(config, 'bin_average'))
+
     return model_depth_average, model_bin_average
 
 ### FUNCTION:
+@trace_function()
 def interpolate_gofs(config, directory, model_data, chunk=False, save_depth_average=True, save_bin_average=False):
     
     '''
@@ -273,7 +270,6 @@ def interpolate_gofs(config, directory, model_data, chunk=False, save_depth_aver
     '''
 
     print("\n### INTERPOLATING GOFS MODEL DATA ###\n")
-    start_time = print_starttime()
 
     if chunk:
         model_data = model_data.chunk({'lat': 'auto', 'lon': 'auto'})
@@ -323,13 +319,10 @@ def interpolate_gofs(config, directory, model_data, chunk=False, save_depth_aver
     if save_depth_average:
         model_datetime = model_data.attrs['model_datetime']
         file_datetime = format_save_datetime(model_datetime)
-        model_depth_average.to_netcdf(os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_GOFS_DepthAverage_{file_datetime}.nc"), unlimited_dims=['time'])
+        storage_save(model_depth_average, os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_GOFS_DepthAverage_{file_datetime}"), **storage_config(config, 'depth_average'))
     if save_bin_average:
         model_datetime = model_data.attrs['model_datetime']
         file_datetime = format_save_datetime(model_datetime)
-        model_bin_average.to_netcdf(os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_GOFS_BinAverage_{file_datetime}.nc"), unlimited_dims=['time'])
-    
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
+        storage_save(model_bin_average, os.path.join(directory, f"{config['MISSION'].get('mission_name', 'UnknownMission')}_GOFS_BinAverage_{file_datetime}"), **storage_config(config, 'bin_average'))
 
     return model_depth_average, model_bin_average
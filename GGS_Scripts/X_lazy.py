@@ -0,0 +1,89 @@
+# =========================
+# IMPORTS
+# =========================
+
+import importlib
+import types
+
+# =========================
+
+### CLASS:
+class LazyModule(types.ModuleType):
+
+    '''
+    Module placeholder that imports the real module on first attribute access.
+    '''
+
+    ### FUNCTION:
+    def __init__(self, name):
+
+        '''
+        Initialize the placeholder.
+
+        Args:
+        - name (str): Full name of the module (e.g. 'matplotlib.pyplot').
+
+        Returns:
+        - None
+        '''
+
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    ### FUNCTION:
+    def __getattr__(self, attribute):
+
+        '''
+        Import the module if needed and return one of its attributes.
+
+        Args:
+        - attribute (str): Attribute name.
+
+        Returns:
+        - value: The attribute of the imported module.
+        '''
+
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_module'] = module
+
+        return getattr(module, attribute)
+
+### FUNCTION:
+def lazy_import(name):
+
+    '''
+    Defer a heavy import (plotting, GIS or remote data stacks) until the module is first used, so data-only stages and worker processes do not pay for it.
+
+    Args:
+    - name (str): Full name of the module.
+
+    Returns:
+    - module (LazyModule or module): The already imported module, or a placeholder importing it on first use.
+    '''
+
+    module = importlib.sys.modules.get(name)
+    if module is not None:
+        return module
+
+    return LazyModule(name)
+
+### FUNCTION:
+def lazy_load(module):
+
+    '''
+    Import a lazily imported module now, e.g. to warm a long-lived worker.
+
+    Args:
+    - module (LazyModule or module): Module placeholder from 'lazy_import', or an imported module.
+
+    Returns:
+    - module (module): The imported module.
+    '''
+
+    if isinstance(module, LazyModule):
+        module.__getattr__('__name__')
+        return module.__dict__['_lazy_module']
+
+    return module
@@ -2,12 +2,14 @@
 # IMPORTS
 # =========================
 
-import copernicusmarine as cm
 from dateutil import parser
 import numpy as np
 import os
 import pandas as pd
-import xarray as xr
+
+from X_sources import SOURCE_OPEN_KWARGS, source_open, source_fetch
+from X_storage import storage_save, storage_config
+from X_trace import trace_function, trace_count
 
 # =========================
 
@@ -40,6 +42,7 @@ class RTOFS():
         self.grid_lats = None
 
     ### FUNCTION:
+    @trace_function()
     def rtofs_load(self, config, datetime_index):
         
         '''
@@ -53,55 +56,77 @@ class RTOFS():
         - None
         '''
 
-        rtofs_access = "https://tds.marine.rutgers.edu/thredds/dodsC/cool/rtofs/rtofs_us_east_scraped"
+        def rtofs_fetch(source):
+
+            rtofs_raw = source_open(source, datetime=datetime_index)
+            self.rtofs_standardize(config, rtofs_raw, datetime_index)
+            self.data_origin = self.data_origin.load()
+            self.data_origin.attrs['model_source'] = source['name']
 
         try:
-            rtofs_raw = xr.open_dataset(rtofs_access)
-            datetime = pd.Timestamp(datetime_index).tz_localize(None)
-            time_values = rtofs_raw.time.values
-            time_index = np.argmin(np.abs(time_values - np.datetime64(datetime)))
-            rtofs_raw = rtofs_raw.isel(time=time_index)
-
-            self.data_origin = rtofs_raw
-            self.x = self.data_origin.x.values
-            self.y = self.data_origin.y.values
-            self.grid_lons = self.data_origin.lon.values[0,:]
-            self.grid_lats = self.data_origin.lat.values[:,0]
-            
-            self.data_origin.attrs['model_datetime'] = str(rtofs_raw.time.values)
-            self.data_origin.attrs['model_name'] = 'RTOFS'
-
-            lats, lons = zip(*config['MISSION']['extent'])
-            min_lon, max_lon = min(lons), max(lons)
-            min_lat, max_lat = min(lats), max(lats)
-
-            lons_idx = np.interp([min_lon, max_lon], self.grid_lons, self.x)
-            lats_idx = np.interp([min_lat, max_lat], self.grid_lats, self.y)
-
-            extent = [
-                np.floor(lons_idx[0]).astype(int),
-                np.ceil(lons_idx[1]).astype(int),
-                np.floor(lats_idx[0]).astype(int),
-                np.ceil(lats_idx[1]).astype(int)
-            ]
-
-            self.data_origin = self.data_origin.isel(
-                x=slice(extent[0], extent[1]),
-                y=slice(extent[2], extent[3])
-            )
-
-            max_depth = config['MISSION']['max_depth']
-            depth_indices = self.data_origin.depth.values
-            target_depth_index = depth_indices[depth_indices >= max_depth][0]
-            self.data_origin = self.data_origin.sel(depth=slice(0, target_depth_index))
+            source_fetch(config, 'rtofs', rtofs_fetch)
         except Exception as e:
             print(f"Error fetching RTOFS data: {e}")
+
+    ### FUNCTION:
+    def rtofs_standardize(self, config, rtofs_raw, datetime_index):
+
+        '''
+        Select the datetime, subset and standardize raw RTOFS data.
+
+        Args:
+        - config (dict): Glider Guidance System mission configuration.
+        - rtofs_raw (xarray.Dataset): Raw RTOFS dataset (as served by THREDDS).
+        - datetime_index (str): Index of the datetime to select.
+
+        Returns:
+        - None
+        '''
+
+        datetime = pd.Timestamp(datetime_index).tz_localize(None)
+        time_values = rtofs_raw.time.values
+        time_index = np.argmin(np.abs(time_values - np.datetime64(datetime)))
+        rtofs_raw = rtofs_raw.isel(time=time_index)
+
+        self.data_origin = rtofs_raw
+        self.x = self.data_origin.x.values
+        self.y = self.data_origin.y.values
+        self.grid_lons = self.data_origin.lon.values[0,:]
+        self.grid_lats = self.data_origin.lat.values[:,0]
+            
+        self.data_origin.attrs['model_datetime'] = str(rtofs_raw.time.values)
+        self.data_origin.attrs['model_name'] = 'RTOFS'
+
+        lats, lons = zip(*config['MISSION']['extent'])
+        min_lon, max_lon = min(lons), max(lons)
+        min_lat, max_lat = min(lats), max(lats)
+
+        lons_idx = np.interp([min_lon, max_lon], self.grid_lons, self.x)
+        lats_idx = np.interp([min_lat, max_lat], self.grid_lats, self.y)
+
+        extent = [
+            np.floor(lons_idx[0]).astype(int),
+            np.ceil(lons_idx[1]).astype(int),
+            np.floor(lats_idx[0]).astype(int),
+            np.ceil(lats_idx[1]).astype(int)
+        ]
+
+        self.data_origin = self.data_origin.isel(
+            x=slice(extent[0], extent[1]),
+            y=slice(extent[2], extent[3])
+        )
+
+        max_depth = config['MISSION']['max_depth']
+        depth_indices = self.data_origin.depth.values
+        target_depth_index = depth_indices[depth_indices >= max_depth][0]
+        self.data_origin = self.data_origin.sel(depth=slice(0, target_depth_index))
+        trace_count('bytes_fetched', self.data_origin.nbytes)
     
     ### FUNCTION:
     def rtofs_save(self, config, directory, save_data=True):
         
         '''
-        Save the subset RTOFS data as a NetCDF file.
+        Save the subset RTOFS data as a chunked, compressed NetCDF file or Zarr store.
 
         Args:
         - config (dict): Glider Guidance System mission configuration.
@@ -117,9 +142,8 @@ class RTOFS():
         self.qc = self.data_origin.copy()
 
         if save_data:
-            rtofs_data_file = f"RTOFS_Data_{config['MISSION']['max_depth']}m.nc"
-            rtofs_data_path = os.path.join(directory, rtofs_data_file)
-            self.data.to_netcdf(rtofs_data_path)
+            rtofs_data_file = f"RTOFS_Data_{config['MISSION']['max_depth']}m"
+            rtofs_data_path = storage_save(self.data, os.path.join(directory, rtofs_data_file), **storage_config(config, 'model'))
             print(f"RTOFS Data saved to: {rtofs_data_path}")
 
 ### CLASS:
@@ -130,14 +154,16 @@ class CMEMS:
     '''
     
     ### FUNCTION:
-    def __init__(self, username, password) -> None:
+    def __init__(self, username=None, password=None) -> None:
         
         '''
         Initialize the CMEMS instance.
 
         Args:
-        - username (str): CMEMS username.
-        - password (str): CMEMS password.
+        - username (str or None): CMEMS username. None uses the credentials of the CMEMS source.
+            - default: None
+        - password (str or None): CMEMS password. None uses the credentials of the CMEMS source.
+            - default: None
 
         Returns:
         - None
@@ -150,6 +176,7 @@ class CMEMS:
         self.data_origin = None
 
     ### FUNCTION:
+    @trace_function()
     def cmems_load(self, config, datetime_index):
         
         '''
@@ -163,43 +190,47 @@ class CMEMS:
         - None
         '''
         
-        def cmems_fetch(dataset_id, min_lon, max_lon, min_lat, max_lat, start_datetime, end_datetime, variables, username, password):
-            
-            dataset = cm.open_dataset(
-                dataset_id=dataset_id,
-                minimum_longitude=min_lon,
-                maximum_longitude=max_lon,
-                minimum_latitude=min_lat,
-                maximum_latitude=max_lat,
-                start_datetime=start_datetime,
-                end_datetime=end_datetime,
-                variables=variables,
-                username=username,
-                password=password
-            )
-
-            return dataset
-
         datetime_index = parser.parse(datetime_index)
         formatted_datetime_index = datetime_index.strftime('%Y-%m-%dT%H:%M:%S')
-        start_datetime = end_datetime = formatted_datetime_index
 
         lats, lons = zip(*config['MISSION']['extent'])
-        min_lon, max_lon = min(lons), max(lons)
-        min_lat, max_lat = min(lats), max(lats)
+        subset = {
+            'minimum_longitude': min(lons),
+            'maximum_longitude': max(lons),
+            'minimum_latitude': min(lats),
+            'maximum_latitude': max(lats),
+            'start_datetime': formatted_datetime_index,
+            'end_datetime': formatted_datetime_index,
+            'variables': ["uo", "vo"]
+        }
+
+        def cmems_fetch(source):
+
+            if 'dataset_id' in source:
+                source = {**source, 'username': self.username or source.get('username'), 'password': self.password or source.get('password')}
+            cmems_raw = source_open(source, subset=subset, datetime=datetime_index)
+            self.cmems_standardize(config, cmems_raw, datetime_index)
+            self.data_origin = self.data_origin.load()
+            self.data_origin.attrs['model_source'] = source['name']
+
+        source_fetch(config, 'cmems', cmems_fetch)
 
-        self.data_origin = cmems_fetch(
-            dataset_id='cmems_mod_glo_phy-cur_anfc_0.083deg_PT6H-i',
-            min_lon=min_lon,
-            max_lon=max_lon,
-            min_lat=min_lat,
-            max_lat=max_lat,
-            start_datetime=start_datetime,
-            end_datetime=end_datetime,
-            variables=["uo", "vo"],
-            username=self.username,
-            password=self.password
-        )
+    ### FUNCTION:
+    def cmems_standardize(self, config, cmems_raw, datetime_index):
+
+        '''
+        Subset and standardize raw CMEMS data.
+
+        Args:
+        - config (dict): Glider Guidance System mission configuration.
+        - cmems_raw (xarray.Dataset): Raw CMEMS dataset (as returned by the Copernicus Marine toolbox).
+        - datetime_index (datetime.datetime): Datetime of the data.
+
+        Returns:
+        - None
+        '''
+
+        self.data_origin = cmems_raw
 
         self.data_origin.attrs['model_datetime'] = datetime_index.strftime('%Y-%m-%dT%H:%M:%S')
         self.data_origin.attrs['model_name'] = 'CMEMS'
@@ -213,12 +244,13 @@ class CMEMS:
         existing_vars = set(self.data_origin.variables.keys()) & set(rename_dict.keys())
         final_rename_dict = {k: rename_dict[k] for k in existing_vars}
         self.data_origin = self.data_origin.rename(final_rename_dict)
+        trace_count('bytes_fetched', self.data_origin.nbytes)
 
     ### FUNCTION:
     def cmems_save(self, config, directory, save_data=True):
         
         '''
-        Save the subset CMEMS data as a NetCDF file.
+        Save the subset CMEMS data as a chunked, compressed NetCDF file or Zarr store.
 
         Args:
         - config (dict): Glider Guidance System mission configuration.
@@ -234,9 +266,8 @@ class CMEMS:
         self.qc = self.data_origin.copy()
 
         if save_data:
-            cmems_data_file = f"CMEMS_Data_{config['MISSION']['max_depth']}m.nc"
-            cmems_data_path = os.path.join(directory, cmems_data_file)
-            self.data.to_netcdf(cmems_data_path)
+            cmems_data_file = f"CMEMS_Data_{config['MISSION']['max_depth']}m"
+            cmems_data_path = storage_save(self.data, os.path.join(directory, cmems_data_file), **storage_config(config, 'model'))
             print(f"CMEMS Data saved to: {cmems_data_path}")
 
 ### CLASS:
@@ -264,6 +295,7 @@ class GOFS:
         self.data_origin = None
 
     ### FUNCTION:
+    @trace_function()
     def gofs_load(self, config, datetime_index):
         
         '''
@@ -280,49 +312,71 @@ class GOFS:
         datetime_index = parser.parse(datetime_index)
         datetime_index = datetime_index.replace(tzinfo=None)
 
-        gofs_access = "https://tds.hycom.org/thredds/dodsC/GLBy0.08/expt_93.0"
+        def gofs_fetch(source):
+
+            gofs_raw = source_open(source, datetime=datetime_index, **SOURCE_OPEN_KWARGS['gofs'])
+            self.gofs_standardize(config, gofs_raw, datetime_index)
+            self.data_origin = self.data_origin.load()
+            self.data_origin.attrs['model_source'] = source['name']
 
         try:
-            gofs_raw = xr.open_dataset(gofs_access, drop_variables="tau")
-            gofs_raw = gofs_raw.sel(time=datetime_index, method='nearest')
+            source_fetch(config, 'gofs', gofs_fetch)
+        except Exception as e:
+            print(f"Error fetching GOFS data: {e}")
+
+    ### FUNCTION:
+    def gofs_standardize(self, config, gofs_raw, datetime_index):
+
+        '''
+        Select the datetime, subset and standardize raw GOFS data.
+
+        Args:
+        - config (dict): Glider Guidance System mission configuration.
+        - gofs_raw (xarray.Dataset): Raw GOFS dataset (as served by THREDDS).
+        - datetime_index (datetime.datetime): Datetime to select.
+
+        Returns:
+        - None
+        '''
 
-            gofs_raw['lon'] = ((gofs_raw['lon'] + 180) % 360) - 180
-            gofs_raw = gofs_raw.sortby(gofs_raw['lon'])
+        gofs_raw = gofs_raw.sel(time=datetime_index, method='nearest')
 
-            self.data_origin = gofs_raw
+        gofs_raw['lon'] = ((gofs_raw['lon'] + 180) % 360) - 180
+        gofs_raw = gofs_raw.sortby(gofs_raw['lon'])
 
-            self.data_origin.attrs['model_datetime'] = datetime_index.strftime('%Y-%m-%dT%H:%M:%S')
-            self.data_origin.attrs['model_name'] = 'GOFS'
+        self.data_origin = gofs_raw
 
-            lats, lons = zip(*config['MISSION']['extent'])
-            min_lon, max_lon = min(lons), max(lons)
-            min_lat, max_lat = min(lats), max(lats)
+        self.data_origin.attrs['model_datetime'] = datetime_index.strftime('%Y-%m-%dT%H:%M:%S')
+        self.data_origin.attrs['model_name'] = 'GOFS'
 
-            self.data_origin = self.data_origin.sel(lat=slice(min_lat, max_lat), lon=slice(min_lon, max_lon))
+        lats, lons = zip(*config['MISSION']['extent'])
+        min_lon, max_lon = min(lons), max(lons)
+        min_lat, max_lat = min(lats), max(lats)
 
-            max_depth = config['MISSION']['max_depth']
-            depth_indices = self.data_origin.depth.values
-            target_depth_index = np.searchsorted(depth_indices, max_depth, side='right') - 1
+        self.data_origin = self.data_origin.sel(lat=slice(min_lat, max_lat), lon=slice(min_lon, max_lon))
+
+        max_depth = config['MISSION']['max_depth']
+        depth_indices = self.data_origin.depth.values
+        target_depth_index = np.searchsorted(depth_indices, max_depth, side='right') - 1
             
-            self.data_origin = self.data_origin.isel(depth=slice(None, target_depth_index + 1))
-
-            rename_dict = {
-                "surf_el": "sea_surface_height",
-                "water_temp": "temperature",
-                "water_u": "u",
-                "water_v": "v"
-            }
-            existing_vars = set(self.data_origin.variables.keys()) & set(rename_dict.keys())
-            final_rename_dict = {k: rename_dict[k] for k in existing_vars}
-            self.data_origin = self.data_origin.rename(final_rename_dict)
-        except Exception as e:
-            print(f"Error fetching GOFS data: {e}")
+        self.data_origin = self.data_origin.isel(depth=slice(None, target_depth_index + 1))
+
+        rename_dict = {
+            "surf_el": "sea_surface_height",
+            "water_temp": "temperature",
+            "water_u": "u",
+            "water_v": "v"
+        }
+        existing_vars = set(self.data_origin.variables.keys()) & set(rename_dict.keys())
+        final_rename_dict = {k: rename_dict[k] for k in existing_vars}
+        self.data_origin = self.data_origin.rename(final_rename_dict)
+        trace_count('bytes_fetched', self.data_origin.nbytes)
 
     ### FUNCTION:
     def gofs_save(self, config, directory, save_data=True):
 
         '''
-        Save the subset GOFS data as a NetCDF file.
+        Save the subset GOFS data as a chunked, compressed NetCDF file or Zarr store.
 
         Args:
         - config (dict): Glider Guidance System mission configuration.
@@ -338,7 +392,6 @@ class GOFS:
         self.qc = self.data_origin.copy()
         
         if save_data:
-            gofs_data_file = f"GOFS_Data_{config['MISSION']['max_depth']}m.nc"
-            gofs_data_path = os.path.join(directory, gofs_data_file)
-            self.data.to_netcdf(gofs_data_path)
+            gofs_data_file = f"GOFS_Data_{config['MISSION']['max_depth']}m"
+            gofs_data_path = storage_save(self.data, os.path.join(directory, gofs_data_file), **storage_config(config, 'model'))
             print(f"GOFS Data saved to: {gofs_data_path}")
@@ -0,0 +1,280 @@
+# =========================
+# IMPORTS
+# =========================
+
+import copy
+import datetime as dt
+import glob
+import numpy as np
+import os
+import pandas as pd
+import re
+
+from X_sources import SOURCE_OPEN_KWARGS, source_open, source_fetch
+from X_trace import trace_function, trace_count
+
+# =========================
+
+PREFETCH_MODELS = {
+    'rtofs': 'enable_rtofs',
+    'cmems': 'enable_cmems',
+    'gofs': 'enable_gofs'
+}
+
+# PREFETCH CACHE FUNCTIONS
+
+### FUNCTION:
+def prefetch_cache_times(directory, model_key):
+
+    '''
+    List the datetimes held in the prefetch cache of a model.
+
+    Args:
+    - directory (str): Prefetch cache directory.
+    - model_key (str): Model key.
+
+    Returns:
+    - cache_times (set): Cached datetimes as '%Y%m%dT%HZ' strings.
+    '''
+
+    cache_times = set()
+    for file_path in glob.glob(os.path.join(directory, model_key, f"{model_key}_*.nc")):
+        match = re.search(r'_(\d{8}T\d{2}Z)\.nc$', file_path)
+        if match:
+            cache_times.add(match.group(1))
+
+    return cache_times
+
+### FUNCTION:
+def prefetch_union_config(configs):
+
+    '''
+    Combine mission configurations into one configuration covering the union of their extents and depths.
+
+    Args:
+    - configs (list): Glider Guidance System mission configurations.
+
+    Returns:
+    - union_config (dict): Configuration with the bounding extent, the deepest maximum depth and every model enabled by any mission.
+    '''
+
+    union_config = copy.deepcopy(configs[0])
+    lats = [lat for config in configs for lat, _ in config['MISSION']['extent']]
+    lons = [lon for config in configs for _, lon in config['MISSION']['extent']]
+    union_config['MISSION']['mission_name'] = "Prefetch"
+    union_config['MISSION']['extent'] = ((min(lats), min(lons)), (max(lats), max(lons)))
+    union_config['MISSION']['max_depth'] = max(config['MISSION']['max_depth'] for config in configs)
+    union_config['MODEL']['prefetch_cache'] = False
+    for flag in PREFETCH_MODELS.values():
+        union_config['MODEL'][flag] = any(config['MODEL'].get(flag) for config in configs)
+
+    return union_config
+
+# PREFETCH FETCH FUNCTIONS
+
+### FUNCTION:
+def prefetch_subset_request(config, start_datetime, end_datetime):
+
+    '''
+    Build the Copernicus Marine style subset of a prefetch request.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - start_datetime (datetime.datetime): First datetime.
+    - end_datetime (datetime.datetime): Last datetime.
+
+    Returns:
+    - subset (dict): Subset arguments for 'source_open'.
+    '''
+
+    lats, lons = zip(*config['MISSION']['extent'])
+    subset = {
+        'minimum_longitude': min(lons),
+        'maximum_longitude': max(lons),
+        'minimum_latitude': min(lats),
+        'maximum_latitude': max(lats),
+        'start_datetime': start_datetime.strftime('%Y-%m-%dT%H:%M:%S'),
+        'end_datetime': end_datetime.strftime('%Y-%m-%dT%H:%M:%S'),
+        'variables': ["uo", "vo"]
+    }
+
+    return subset
+
+### FUNCTION:
+def prefetch_catalog_times(config, model_key, start_datetime, end_datetime):
+
+    '''
+    List the datetimes a model's fastest healthy source currently serves within a time window.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - model_key (str): Model key.
+    - start_datetime (datetime.datetime): Window start.
+    - end_datetime (datetime.datetime): Window end.
+
+    Returns:
+    - catalog_times (pandas.DatetimeIndex): Available datetimes.
+    '''
+
+    catalog = {}
+
+    def catalog_fetch(source):
+
+        subset = prefetch_subset_request(config, start_datetime, end_datetime) if model_key == 'cmems' else None
+        dataset = source_open(source, subset=subset, **SOURCE_OPEN_KWARGS.get(model_key, {}))
+        catalog['times'] = pd.DatetimeIndex(dataset.time.values)
+
+    source_fetch(config, model_key, catalog_fetch)
+    catalog_times = catalog['times'][(catalog['times'] >= start_datetime) & (catalog['times'] <= end_datetime)]
+
+    return catalog_times
+
+### FUNCTION:
+def prefetch_subset(config, model_key, dataset, datetime):
+
+    '''
+    Subset a raw model dataset to one datetime, the configured extent and depth, keeping the server's layout so the model loaders can read it back.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - model_key (str): Model key.
+    - dataset (xarray.Dataset): Raw model dataset.
+    - datetime (pandas.Timestamp): Datetime to keep.
+
+    Returns:
+    - subset (xarray.Dataset): The subset dataset with a time dimension of length one.
+    '''
+
+    lats, lons = zip(*config['MISSION']['extent'])
+    min_lon, max_lon = min(lons), max(lons)
+    min_lat, max_lat = min(lats), max(lats)
+
+    time_index = int(np.argmin(np.abs(dataset.time.values - np.datetime64(datetime))))
+    subset = dataset.isel(time=[time_index])
+
+    if model_key == 'rtofs':
+        x_idx = np.interp([min_lon, max_lon], subset.lon.values[0, :], subset.x.values)
+        y_idx = np.interp([min_lat, max_lat], subset.lat.values[:, 0], subset.y.values)
+        subset = subset.isel(
+            x=slice(max(int(np.floor(x_idx[0])) - 1, 0), int(np.ceil(x_idx[1])) + 1),
+            y=slice(max(int(np.floor(y_idx[0])) - 1, 0), int(np.ceil(y_idx[1])) + 1)
+        )
+        subset = subset.assign_coords(x=np.arange(subset.sizes['x']), y=np.arange(subset.sizes['y']))
+    elif model_key == 'gofs':
+        subset = subset.sel(lat=slice(min_lat, max_lat))
+        min_lon_360, max_lon_360 = min_lon % 360, max_lon % 360
+        if min_lon_360 <= max_lon_360 and max_lon - min_lon < 360:
+            subset = subset.sel(lon=slice(min_lon_360, max_lon_360))
+
+    depths = subset.depth.values
+    depth_stop = int(np.searchsorted(depths, config['MISSION']['max_depth'], side='left')) + 1
+    subset = subset.isel(depth=slice(None, depth_stop))
+
+    return subset
+
+### FUNCTION:
+@trace_function(arg_names=('model_key',))
+def prefetch_model(config, model_key, datetime, directory):
+
+    '''
+    Fetch one datetime of a model for the union extent and write it to the prefetch cache.
+
+    Args:
+    - config (dict): Prefetch (union) configuration.
+    - model_key (str): Model key.
+    - datetime (pandas.Timestamp): Datetime to fetch.
+    - directory (str): Prefetch cache directory.
+
+    Returns:
+    - cache_path (str): Path of the cached file.
+    '''
+
+    model_directory = os.path.join(directory, model_key)
+    os.makedirs(model_directory, exist_ok=True)
+    cache_path = os.path.join(model_directory, f"{model_key}_{datetime.strftime('%Y%m%dT%HZ')}.nc")
+
+    def prefetch_fetch(source):
+
+        subset = prefetch_subset_request(config, datetime, datetime) if model_key == 'cmems' else None
+        dataset = source_open(source, subset=subset, **SOURCE_OPEN_KWARGS.get(model_key, {}))
+        dataset = prefetch_subset(config, model_key, dataset, datetime).load()
+        for variable in dataset.variables.values():
+            variable.encoding = {}
+        encoding = {name: {'zlib': True, 'complevel': 1} for name, variable in dataset.data_vars.items() if variable.dtype.kind in 'biuf'}
+        temporary_path = f"{cache_path}.part"
+        dataset.to_netcdf(temporary_path, encoding=encoding, unlimited_dims=['time'])
+        os.replace(temporary_path, cache_path)
+        trace_count('bytes_fetched', dataset.nbytes)
+
+    source_fetch(config, model_key, prefetch_fetch)
+    print(f"{model_key.upper()} {datetime.strftime('%Y-%m-%dT%H:%M:%SZ')} prefetched to: {cache_path}")
+
+    return cache_path
+
+### FUNCTION:
+def prefetch_prune(directory, retention_days=3):
+
+    '''
+    Delete cached model files older than the retention period.
+
+    Args:
+    - directory (str): Prefetch cache directory.
+    - retention_days (float): Days of model datetimes to keep.
+        - default: 3
+
+    Returns:
+    - removed (int): Number of files removed.
+    '''
+
+    cutoff = pd.Timestamp(dt.datetime.now(dt.timezone.utc).replace(tzinfo=None) - dt.timedelta(days=retention_days))
+    removed = 0
+    for model_key in PREFETCH_MODELS:
+        for cache_time in prefetch_cache_times(directory, model_key):
+            if pd.to_datetime(cache_time, format='%Y%m%dT%HZ') < cutoff:
+                os.remove(os.path.join(directory, model_key, f"{model_key}_{cache_time}.nc"))
+                removed += 1
+
+    return removed
+
+### FUNCTION:
+def prefetch_cycle(config, directory, window_days=1):
+
+    '''
+    Run one prefetch pass: fetch every datetime of the run window the sources serve and the cache does not hold yet.
+
+    Args:
+    - config (dict): Prefetch (union) configuration.
+    - directory (str): Prefetch cache directory.
+    - window_days (int): Days after today 00Z covered by the run window (6-hourly, as in GGS_main).
+        - default: 1
+
+    Returns:
+    - fetched (list): Paths of the newly cached files.
+    '''
+
+    window_start = pd.Timestamp(dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)).normalize()
+    window_end = window_start + pd.Timedelta(days=window_days)
+    run_times = pd.date_range(window_start, window_end, freq='6H')
+
+    fetched = []
+    for model_key, flag in PREFETCH_MODELS.items():
+        if not config['MODEL'].get(flag):
+            continue
+        cache_times = prefetch_cache_times(directory, model_key)
+        missing_times = [datetime for datetime in run_times if datetime.strftime('%Y%m%dT%HZ') not in cache_times]
+        if not missing_times:
+            continue
+        try:
+            catalog_times = prefetch_catalog_times(config, model_key, window_start, window_end)
+        except Exception as e:
+            print(f"Error reading the {model_key.upper()} catalog: {e}")
+            continue
+        for datetime in missing_times:
+            if datetime not in catalog_times:
+                continue
+            try:
+                fetched.append(prefetch_model(config, model_key, datetime, directory))
+            except Exception as e:
+                print(f"Error prefetching {model_key.upper()} {datetime}: {e}")
+
+    return fetched
@@ -2,25 +2,34 @@
 # IMPORTS
 # =========================
 
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-import cmocean.cm as cmo
-import geopandas as gpd
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
+from concurrent.futures import ProcessPoolExecutor
+import json
 import numpy as np
 import os
-from shapely.geometry import Point
-
-from X_functions import calculate_gridpoint, plot_formatted_ticks, plot_bathymetry, plot_profile_thresholds, plot_add_gliders, plot_optimal_path, plot_add_eez, plot_streamlines, plot_magnitude_contour, plot_threshold_zones, plot_advantage_zones, profile_rtofs, profile_cmems, profile_gofs, plot_glider_route, format_figure_titles, format_subplot_titles, format_subplot_headers, format_save_datetime, print_starttime, print_endtime, print_runtime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from X_functions import calculate_gridpoint, plot_formatted_ticks, plot_bathymetry, plot_ocean, plot_land_features, plot_profile_thresholds, plot_add_gliders, plot_optimal_path, plot_add_eez, plot_streamlines, plot_magnitude_contour, plot_threshold_zones, plot_advantage_zones, profile_extract, profile_station, profile_plot, plot_glider_route, format_figure_titles, format_subplot_titles, format_subplot_headers, format_save_datetime
+from X_derived import derived_read
+from X_lazy import lazy_import
+from X_trace import trace_function, trace_count
+
+ccrs = lazy_import("cartopy.crs")
+cmo = lazy_import("cmocean.cm")
+gpd = lazy_import("geopandas")
+matplotlib = lazy_import("matplotlib")
+plt = lazy_import("matplotlib.pyplot")
+mpatches = lazy_import("matplotlib.patches")
 
 # =========================
 
 ### FUNCTION:
-def GGS_plot_profiles(config, directory, datetime_index, model_datasets, latitude_qc=None, longitude_qc=None, threshold=0.5):
+@trace_function()
+def GGS_plot_profiles(config, directory, datetime_index, model_datasets, latitude_qc=None, longitude_qc=None, threshold=0.5, stations=None, workers=1):
     
     '''
-    Produce quality control profiles for 'u', 'v', 'magnitude', and 'direction' data at the specified point of interest.
+    Produce quality control profiles for 'u', 'v', 'magnitude', and 'direction' data at the specified point of interest, or at many QC stations.
 
     Args:
     - config (dict): The configuration dictionary.
@@ -29,21 +38,22 @@ def GGS_plot_profiles(config, directory, datetime_index, model_datasets, latitud
     - longitude_qc (float): The longitude of the point of interest.
     - threshold (float): The threshold value for the shading.
     - model_datasets (tuple): Tuple containing the three model datasets.
+    - stations (list or None): (lat, lon) pairs of the QC stations. When given, the columns of every model are extracted for all stations at once and one figure is saved per station.
+        - default: None
+    - workers (int): Number of processes rendering the station figures.
+        - default: 1
 
     Returns:
     - None
     '''
 
     print(f"\n### CREATING PROFILE PLOT ###\n")
-    start_time = print_starttime()
 
     valid_datasets = [dataset for dataset in model_datasets if dataset]
     num_datasets = len(valid_datasets)
 
     if num_datasets == 0:
         print("No datasets provided for plotting.")
-        end_time = print_endtime()
-        print_runtime(start_time, end_time)
         return
 
     for model, model_tuple in enumerate(model_datasets):
@@ -51,45 +61,113 @@ def GGS_plot_profiles(config, directory, datetime_index, model_datasets, latitud
         for dataset, item in enumerate(model_tuple):
             if item is None:
                 print(f"Invalid dataset tuple(s) provided for {model_name}. Skipping profile plot.")
-                end_time = print_endtime()
-                print_runtime(start_time, end_time)
                 return
             else:
                 continue
 
+    if stations:
+        GGS_plot_profile_stations(config, directory, datetime_index, valid_datasets, stations, threshold, workers)
+        return
+
+    file_datetime = format_save_datetime(datetime_index)
+    GGS_plot_profile_station({
+        'config': config,
+        'datetime_index': datetime_index,
+        'station': (latitude_qc, longitude_qc),
+        'columns': [profile_station(profile_extract(dataset, [latitude_qc], [longitude_qc]), 0) for dataset in valid_datasets],
+        'threshold': threshold,
+        'fig_path': os.path.join(directory, f"DepthAverageProfiles_{config['MISSION']['max_depth']}m_{file_datetime}.png")
+    })
+
+### FUNCTION:
+def GGS_plot_profile_stations(config, directory, datetime_index, model_datasets, stations, threshold=0.5, workers=1):
+
+    '''
+    Produce quality control profiles at many QC stations. The columns of every model are extracted for all stations with one vectorized indexing call per dataset, then the station figures are rendered in parallel.
+
+    Args:
+    - config (dict): The configuration dictionary.
+    - directory (str): The directory to save the plots and the station summary.
+    - datetime_index (str): Datetime index for the plots.
+    - model_datasets (list): Valid (model data, depth average, bin average) tuples.
+    - stations (list): (lat, lon) pairs of the QC stations.
+    - threshold (float): The threshold value for the shading.
+        - default: 0.5
+    - workers (int): Number of processes rendering the station figures.
+        - default: 1
+
+    Returns:
+    - None
+    '''
+
+    latitudes, longitudes = (np.asarray(values, dtype=float) for values in zip(*stations))
+    model_columns = [profile_extract(dataset, latitudes, longitudes) for dataset in model_datasets]
+
+    file_datetime = format_save_datetime(datetime_index)
+    jobs = [{
+        'config': config,
+        'datetime_index': datetime_index,
+        'station': (latitudes[i], longitudes[i]),
+        'columns': [profile_station(columns, i) for columns in model_columns],
+        'threshold': threshold,
+        'fig_path': os.path.join(directory, f"DepthAverageProfiles_{config['MISSION']['max_depth']}m_{file_datetime}_S{i + 1:02d}.png")
+    } for i in range(len(latitudes))]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=matplotlib.use, initargs=('Agg',)) as executor:
+            list(executor.map(GGS_plot_profile_station, jobs))
+    else:
+        for job in jobs:
+            GGS_plot_profile_station(job)
+
+    rows = []
+    for columns in model_columns:
+        for i in range(len(latitudes)):
+            rows.append({
+                'station': i + 1,
+                'latitude': latitudes[i],
+                'longitude': longitudes[i],
+                'model': columns['model_name'],
+                'model_latitude': columns['lat'][i],
+                'model_longitude': columns['lon'][i],
+                **{variable: columns[variable][i] for variable in ('u_depth_avg', 'v_depth_avg', 'mag_depth_avg', 'dir_depth_avg')}
+            })
+    summary_path = os.path.join(directory, f"DepthAverageProfiles_{config['MISSION']['max_depth']}m_{file_datetime}_Stations.csv")
+    pd.DataFrame(rows).to_csv(summary_path, index=False)
+    print(f"{len(jobs)} QC station profiles saved to: {directory}")
+
+### FUNCTION:
+def GGS_plot_profile_station(job):
+
+    '''
+    Render the quality control profile figure of one QC station from its extracted columns.
+
+    Args:
+    - job (dict): Station job from 'GGS_plot_profile_stations' with the config, datetime index, station, columns per model, threshold and figure path.
+
+    Returns:
+    - None
+    '''
+
+    model_columns = job['columns']
+    num_datasets = len(model_columns)
     fig, axs = plt.subplots(num_datasets, 4, figsize=(20, 10 * num_datasets))
     if num_datasets == 1:
         axs = np.array([axs])
 
-    profile_functions = {
-        'RTOFS': profile_rtofs,
-        'CMEMS': profile_cmems,
-        'GOFS': profile_gofs
-    }
-    
-    for i, dataset in enumerate(valid_datasets):
-        model_name = dataset[1].attrs.get('model_name')
-        profile_func = profile_functions.get(model_name)
-        if profile_func:
-            row_axes = axs[i, :]
-            profile_func(row_axes, dataset, latitude_qc, longitude_qc, threshold)
-    
-    subplot_titles = [dataset[0].attrs.get('model_name') for dataset in valid_datasets if dataset]
-    format_subplot_headers(axs, fig, subplot_titles)
+    for i, columns in enumerate(model_columns):
+        profile_plot(axs[i, :], columns, job['threshold'])
 
+    format_subplot_headers(axs, fig, [columns['model_name'] for columns in model_columns])
+    latitude_qc, longitude_qc = job['station']
     title_text = f"Vertical Profile Subplots - (Lat: {latitude_qc:.3f}, Lon: {longitude_qc:.3f})"
-    format_subplot_titles(fig, config, datetime_index, title=title_text)
+    format_subplot_titles(fig, job['config'], job['datetime_index'], title=title_text)
 
-    file_datetime = format_save_datetime(datetime_index)
-    fig_filename = f"DepthAverageProfiles_{config['MISSION']['max_depth']}m_{file_datetime}.png"
-    fig_path = os.path.join(directory, fig_filename)
-    fig.savefig(fig_path, dpi=300, bbox_inches='tight')
+    fig.savefig(job['fig_path'], dpi=300, bbox_inches='tight')
     plt.close(fig)
-    
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
 
 ### FUNCTION:
+@trace_function()
 def GGS_plot_magnitude(config, directory, datetime_index, model_datasets, latitude_qc=None, longitude_qc=None, density=2, gliders=None, show_waypoints=False, show_eez=False, show_qc=False, manual_extent=None, optimal_paths=None):
     
     '''
@@ -114,14 +192,14 @@ def GGS_plot_magnitude(config, directory, datetime_index, model_datasets, latitu
     '''
 
     print(f"\n### CREATING MAGNITUDE PLOT ###\n")
-    start_time = print_starttime()
+
+    render_mode = config['PRODUCT'].get('render_mode', 'contour')
+    raster_fidelity = config['PRODUCT'].get('raster_fidelity', 1.0)
 
     valid_datasets = [datasets for datasets in model_datasets if datasets is not None]
     num_datasets = len(valid_datasets)
     if num_datasets == 0:
         print("No datasets provided for plotting.")
-        end_time = print_endtime()
-        print_runtime(start_time, end_time)
         return
 
     def plot_magnitude(ax, config, model_depth_average, latitude_qc, longitude_qc, density, gliders, show_waypoints, show_qc, show_eez, manual_extent, optimal_path):
@@ -141,7 +219,8 @@ def GGS_plot_magnitude(config, directory, datetime_index, model_datasets, latitu
         ax.set_extent(map_extent, crs=ccrs.PlateCarree())
         plot_formatted_ticks(ax, map_extent[:2], map_extent[2:], proj=ccrs.PlateCarree(), fontsize=16, label_left=True, label_right=False, label_bottom=True, label_top=False, gridlines=True)
 
-        plot_magnitude_contour(ax, fig, longitude, latitude, mag_depth_avg, max_levels=10, extend_max=True)
+        derived = derived_read(model_depth_average)
+        plot_magnitude_contour(ax, fig, longitude, latitude, mag_depth_avg, max_levels=10, extend_max=True, render_mode=render_mode, fidelity=raster_fidelity, cbar=derived.get('cbar'))
         plot_streamlines(ax, longitude, latitude, u_depth_avg, v_depth_avg, density=density)
 
         if gliders is not None:
@@ -162,7 +241,7 @@ def GGS_plot_magnitude(config, directory, datetime_index, model_datasets, latitu
             (y_index, x_index), (lat_index, lon_index) = calculate_gridpoint(model_depth_average, latitude_qc, longitude_qc)
             qc_lon = model_depth_average['lon'].isel(x=x_index, y=y_index).values
             qc_lat = model_depth_average['lat'].isel(x=x_index, y=y_index).values
-            circle = Circle((qc_lon, qc_lat), radius=0.25, edgecolor='purple', facecolor='none', linewidth=2, transform=ccrs.PlateCarree(), zorder=95)
+            circle = mpatches.Circle((qc_lon, qc_lat), radius=0.25, edgecolor='purple', facecolor='none', linewidth=2, transform=ccrs.PlateCarree(), zorder=95)
             ax.add_patch(circle)
         
         if show_eez:
@@ -176,14 +255,11 @@ def GGS_plot_magnitude(config, directory, datetime_index, model_datasets, latitu
                 ax.add_artist(bathymetry_legend)
         except:
             print(f"!!!WARNING!!!: Bathymetry contouring was unsuccessful for {model_depth_average.attrs['model_name']}. Using default ocean color instead.")
-            ax.add_feature(cfeature.OCEAN, zorder=1)
+            plot_ocean(ax, config)
 
-        ax.add_feature(cfeature.GSHHSFeature(scale='full'), edgecolor="black", facecolor="tan", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.RIVERS, edgecolor="steelblue", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.LAKES, edgecolor="black", facecolor="lightsteelblue", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.BORDERS, edgecolor="black", linewidth=0.25, zorder=90)
+        plot_land_features(ax, config)
 
-    fig, axs = plt.subplots(1, num_datasets, subplot_kw={'projection': ccrs.Mercator()}, figsize=(10*num_datasets, 10))
+    fig, axs = plt.subplots(1, num_datasets, subplot_kw={'projection': ccrs.Mercator()}, figsize=(10*num_datasets, 10), dpi=300)
     if num_datasets == 1:
         axs = [axs]
     
@@ -203,11 +279,9 @@ def GGS_plot_magnitude(config, directory, datetime_index, model_datasets, latitu
     fig_path = os.path.join(directory, fig_filename)
     fig.savefig(fig_path, dpi=300, bbox_inches='tight')
     plt.close(fig)
-    
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
 
 ### FUNCTION:
+@trace_function()
 def GGS_plot_threshold(config, directory, datetime_index, model_datasets, latitude_qc=None, longitude_qc=None, density=2, mag1=0.0, mag2=0.2, mag3=0.3, mag4=0.4, mag5=0.5, gliders=None, show_waypoints=False, show_eez=False, show_qc=False, manual_extent=None, optimal_paths=None):
     
     '''
@@ -237,14 +311,14 @@ def GGS_plot_threshold(config, directory, datetime_index, model_datasets, latitu
     '''
 
     print(f"\n### CREATING THRESHOLD PLOT ###\n")
-    start_time = print_starttime()
+
+    render_mode = config['PRODUCT'].get('render_mode', 'contour')
+    raster_fidelity = config['PRODUCT'].get('raster_fidelity', 1.0)
 
     valid_datasets = [datasets for datasets in model_datasets if datasets is not None]
     num_datasets = len(valid_datasets)
     if num_datasets == 0:
         print("No datasets provided for plotting.")
-        end_time = print_endtime()
-        print_runtime(start_time, end_time)
         return
 
     def plot_threshold(ax, config, model_depth_average, latitude_qc, longitude_qc, density, mag1, mag2, mag3, mag4, mag5, gliders, show_waypoints, show_qc, show_eez, manual_extent, optimal_path):
@@ -264,7 +338,8 @@ def GGS_plot_threshold(config, directory, datetime_index, model_datasets, latitu
         ax.set_extent(map_extent, crs=ccrs.PlateCarree())
         plot_formatted_ticks(ax, map_extent[:2], map_extent[2:], proj=ccrs.PlateCarree(), fontsize=16, label_left=True, label_right=False, label_bottom=True, label_top=False, gridlines=True)
 
-        plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag3, mag4, mag5, threshold_legend=True)
+        derived = derived_read(model_depth_average, levels=[mag2, mag3, mag4, mag5])
+        plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag3, mag4, mag5, threshold_legend=True, render_mode=render_mode, fidelity=raster_fidelity, threshold_classes=derived.get('threshold_classes'), max_mag=derived.get('max_mag'))
         plot_streamlines(ax, longitude, latitude, u_depth_avg, v_depth_avg, density=density)
 
         if gliders is not None:
@@ -285,7 +360,7 @@ def GGS_plot_threshold(config, directory, datetime_index, model_datasets, latitu
             (y_index, x_index), (lat_index, lon_index) = calculate_gridpoint(model_depth_average, latitude_qc, longitude_qc)
             qc_lon = model_depth_average['lon'].isel(x=x_index, y=y_index).values
             qc_lat = model_depth_average['lat'].isel(x=x_index, y=y_index).values
-            circle = Circle((qc_lon, qc_lat), radius=0.25, edgecolor='purple', facecolor='none', linewidth=2, transform=ccrs.PlateCarree(), zorder=95)
+            circle = mpatches.Circle((qc_lon, qc_lat), radius=0.25, edgecolor='purple', facecolor='none', linewidth=2, transform=ccrs.PlateCarree(), zorder=95)
             ax.add_patch(circle)
 
         if show_eez:
@@ -299,14 +374,11 @@ def GGS_plot_threshold(config, directory, datetime_index, model_datasets, latitu
                 ax.add_artist(bathymetry_legend)
         except:
             print(f"!!!WARNING!!!: Bathymetry contouring was unsuccessful for {model_depth_average.attrs['model_name']}. Using default ocean color instead.")
-            ax.add_feature(cfeature.OCEAN, zorder=1)
+            plot_ocean(ax, config)
 
-        ax.add_feature(cfeature.GSHHSFeature(scale='full'), edgecolor="black", facecolor="tan", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.RIVERS, edgecolor="steelblue", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.LAKES, edgecolor="black", facecolor="lightsteelblue", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.BORDERS, edgecolor="black", linewidth=0.25, zorder=90)
+        plot_land_features(ax, config)
         
-    fig, axs = plt.subplots(1, num_datasets, subplot_kw={'projection': ccrs.Mercator()}, figsize=(10*num_datasets, 10))
+    fig, axs = plt.subplots(1, num_datasets, subplot_kw={'projection': ccrs.Mercator()}, figsize=(10*num_datasets, 10), dpi=300)
     if num_datasets == 1:
         axs = [axs]
 
@@ -327,10 +399,8 @@ def GGS_plot_threshold(config, directory, datetime_index, model_datasets, latitu
     fig.savefig(fig_path, dpi=300, bbox_inches='tight')
     plt.close(fig)
 
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
-
 ### FUNCTION:
+@trace_function()
 def GGS_plot_advantage(config, directory, datetime_index, model_datasets, latitude_qc=None, longitude_qc=None, density=2, tolerance=15, mag1=0.0, mag2=0.2, mag3=0.3, mag4=0.4, mag5=0.5, gliders=None, show_waypoints=False, show_eez=False, show_qc=False, manual_extent=None, optimal_paths=None):
     
     '''
@@ -361,20 +431,18 @@ def GGS_plot_advantage(config, directory, datetime_index, model_datasets, latitu
     '''
 
     print(f"\n### CREATING ADVANTAGE PLOT ###\n")
-    start_time = print_starttime()
+
+    render_mode = config['PRODUCT'].get('render_mode', 'contour')
+    raster_fidelity = config['PRODUCT'].get('raster_fidelity', 1.0)
 
     if not config['MISSION'].get('GPS_coords') or len(config['MISSION']['GPS_coords']) < 2:
         print("Insufficient GPS route coordinates provided. Skipping advantage zone plotting.")
-        end_time = print_endtime()
-        print_runtime(start_time, end_time)
         return
     
     valid_datasets = [datasets for datasets in model_datasets if datasets is not None]
     num_datasets = len(valid_datasets)
     if num_datasets == 0:
         print("No datasets provided for plotting.")
-        end_time = print_endtime()
-        print_runtime(start_time, end_time)
         return
 
     def plot_advantage(ax, config, model_depth_average, latitude_qc, longitude_qc, density, tolerance, mag1, mag2, mag3, mag4, mag5, gliders, show_waypoints, show_qc, show_eez, manual_extent, optimal_path):
@@ -395,8 +463,9 @@ def GGS_plot_advantage(config, directory, datetime_index, model_datasets, latitu
         ax.set_extent(map_extent, crs=ccrs.PlateCarree())
         plot_formatted_ticks(ax, map_extent[:2], map_extent[2:], proj=ccrs.PlateCarree(), fontsize=16, label_left=True, label_right=False, label_bottom=True, label_top=False, gridlines=True)
 
-        plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag3, mag4, mag5, threshold_legend=True)
-        plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, tolerance, advantage_legend=True)
+        derived = derived_read(model_depth_average, levels=[mag2, mag3, mag4, mag5], tolerance=tolerance)
+        plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, mag1, mag2, mag3, mag4, mag5, threshold_legend=True, render_mode=render_mode, fidelity=raster_fidelity, threshold_classes=derived.get('threshold_classes'), max_mag=derived.get('max_mag'))
+        plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, tolerance, advantage_legend=True, render_mode=render_mode, fidelity=raster_fidelity, advantage_mask=derived.get('advantage_mask'))
         plot_streamlines(ax, longitude, latitude, u_depth_avg, v_depth_avg, density=density)
 
         if gliders is not None:
@@ -417,7 +486,7 @@ def GGS_plot_advantage(config, directory, datetime_index, model_datasets, latitu
             (y_index, x_index), (lat_index, lon_index) = calculate_gridpoint(model_depth_average, latitude_qc, longitude_qc)
             qc_lon = model_depth_average['lon'].isel(x=x_index, y=y_index).values
             qc_lat = model_depth_average['lat'].isel(x=x_index, y=y_index).values
-            circle = Circle((qc_lon, qc_lat), radius=0.25, edgecolor='purple', facecolor='none', linewidth=2, transform=ccrs.PlateCarree(), zorder=95)
+            circle = mpatches.Circle((qc_lon, qc_lat), radius=0.25, edgecolor='purple', facecolor='none', linewidth=2, transform=ccrs.PlateCarree(), zorder=95)
             ax.add_patch(circle)
 
         if show_eez:
@@ -431,14 +500,11 @@ def GGS_plot_advantage(config, directory, datetime_index, model_datasets, latitu
                 ax.add_artist(bathymetry_legend)
         except:
             print(f"!!!WARNING!!!: Bathymetry contouring was unsuccessful for {model_depth_average.attrs['model_name']}. Using default ocean color instead.")
-            ax.add_feature(cfeature.OCEAN, zorder=1)
+            plot_ocean(ax, config)
 
-        ax.add_feature(cfeature.GSHHSFeature(scale='full'), edgecolor="black", facecolor="tan", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.RIVERS, edgecolor="steelblue", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.LAKES, edgecolor="black", facecolor="lightsteelblue", linewidth=0.25, zorder=90)
-        ax.add_feature(cfeature.BORDERS, edgecolor="black", linewidth=0.25, zorder=90)
+        plot_land_features(ax, config)
         
-    fig, axs = plt.subplots(1, num_datasets, subplot_kw={'projection': ccrs.Mercator()}, figsize=(10*num_datasets, 10))
+    fig, axs = plt.subplots(1, num_datasets, subplot_kw={'projection': ccrs.Mercator()}, figsize=(10*num_datasets, 10), dpi=300)
     if num_datasets == 1:
         axs = [axs]
 
@@ -459,52 +525,123 @@ def GGS_plot_advantage(config, directory, datetime_index, model_datasets, latitu
     fig.savefig(fig_path, dpi=300, bbox_inches='tight')
     plt.close(fig)
 
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
-    
 ### FUNCTION:
-def GGS_export_gpkg(directory, datetime_index, model_datasets):
+@trace_function()
+def GGS_export_gpkg(directory, datetime_index, model_datasets, export_formats=("csv", "gpkg"), chunk_size=250000):
     
     '''
-    Process and export data from model datasets to CSV and GeoPackage files.
+    Process and export data from model datasets to CSV, GeoPackage, GeoParquet and FlatGeobuf files.
+
+    The depth-averaged grid is streamed in row blocks of roughly 'chunk_size' points, so export memory stays flat as grids grow.
+    Geometries are built column-wise ('geopandas.points_from_xy' or raw WKB buffers) instead of per-point Shapely objects.
 
     Args:
     - directory (str): Directory to save the files.
     - datetime_index (str): Datetime index for the model datasets.
     - model_datasets (tuple): Tuple containing the model datasets.
+    - export_formats (list): Output formats. Options: 'csv', 'gpkg', 'parquet' (GeoParquet) and 'fgb' (FlatGeobuf).
+        - default: ('csv', 'gpkg')
+    - chunk_size (int): Approximate number of grid points written per block.
+        - default: 250000
 
     Returns:
     - None
     '''
 
     print(f"\n### CREATING GEODATAFRAME FILES ###\n")
-    start_time = print_starttime()
 
     valid_datasets = [datasets for datasets in model_datasets if datasets is not None]
     num_datasets = len(valid_datasets)
     if num_datasets == 0:
         print("No datasets provided for GeoDataFrame conversion.")
-        end_time = print_endtime()
-        print_runtime(start_time, end_time)
         return
 
+    try:
+        import pyogrio
+    except ImportError:
+        pyogrio = None
+
+    def export_point_wkb(longitude, latitude):
+        '''Builds a WKB point array directly from coordinate buffers (little-endian, 21 bytes per point).'''
+        points = np.empty(len(longitude), dtype=[('order', 'u1'), ('type', '<u4'), ('x', '<f8'), ('y', '<f8')])
+        points['order'] = 1
+        points['type'] = 1
+        points['x'] = longitude
+        points['y'] = latitude
+        offsets = np.arange(0, 21 * (len(longitude) + 1), 21, dtype=np.int32)
+        return pa.BinaryArray.from_buffers(pa.binary(), len(longitude), [None, pa.py_buffer(offsets), pa.py_buffer(points.tobytes())])
+
+    def export_write_vector(columns, path, driver, append):
+        '''Writes a block of points to a vector file through the columnar (Arrow) writer when available.'''
+        geodataframe = gpd.GeoDataFrame(columns, geometry=gpd.points_from_xy(columns['lon'], columns['lat']), crs="EPSG:4326")
+        if pyogrio is not None:
+            pyogrio.write_dataframe(geodataframe, path, driver=driver, append=append, use_arrow=True)
+        else:
+            geodataframe.to_file(path, driver=driver, mode='a' if append else 'w')
+
+    geoparquet_metadata = {
+        'version': '1.0.0',
+        'primary_column': 'geometry',
+        'columns': {'geometry': {'encoding': 'WKB', 'geometry_types': ['Point']}}
+    }
+    file_extensions = {'csv': 'csv', 'gpkg': 'gpkg', 'parquet': 'parquet', 'fgb': 'fgb'}
+
     file_datetime = format_save_datetime(datetime_index)
     for model_data, depth_average_data, bin_average_data in valid_datasets:
         model_name = depth_average_data.attrs['model_name']
-        csv_file = f"{model_name}_depth_average_{file_datetime}.csv"
-        csv_path = os.path.join(directory, csv_file)
-        gpkg_file = f"{model_name}_depth_average_{file_datetime}.gpkg"
-        gpkg_path = os.path.join(directory, gpkg_file)
-
-        dataframe = depth_average_data.to_dataframe().reset_index()
-        dataframe = dataframe[['lat', 'lon', 'mag_depth_avg', 'dir_depth_avg']]
-        dataframe.dropna(subset=['mag_depth_avg', 'dir_depth_avg'], inplace=True)
-        dataframe.to_csv(csv_path, index=False)
-
-        geometry = [Point(xy) for xy in zip(dataframe['lon'], dataframe['lat'])]
-        geodataframe = gpd.GeoDataFrame(dataframe, geometry=geometry)
-        geodataframe.crs = "EPSG:3857"
-        geodataframe.to_file(gpkg_path, driver="GPKG")
-
-    end_time = print_endtime()
-    print_runtime(start_time, end_time)
+        file_paths = {export_format: os.path.join(directory, f"{model_name}_depth_average_{file_datetime}.{file_extensions[export_format]}") for export_format in export_formats}
+        for file_path in file_paths.values():
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        if 'time' in depth_average_data.dims:
+            depth_average_data = depth_average_data.isel(time=0)
+        latitude = depth_average_data['lat'].values
+        longitude = depth_average_data['lon'].values
+        mag_depth_avg = depth_average_data['mag_depth_avg'].values
+        dir_depth_avg = depth_average_data['dir_depth_avg'].values
+        if latitude.ndim == 1:
+            latitude = np.broadcast_to(latitude[:, None], mag_depth_avg.shape)
+            longitude = np.broadcast_to(longitude[None, :], mag_depth_avg.shape)
+        derived_names = [name for name in ('threshold_class', 'advantage_route') if name in depth_average_data]
+
+        rows_per_chunk = max(1, chunk_size // mag_depth_avg.shape[1])
+        parquet_writer = None
+        first_block = True
+        num_points = 0
+        for row_start in range(0, mag_depth_avg.shape[0], rows_per_chunk):
+            rows = slice(row_start, row_start + rows_per_chunk)
+            block_mag = mag_depth_avg[rows].ravel()
+            block_dir = dir_depth_avg[rows].ravel()
+            valid = ~np.isnan(block_mag) & ~np.isnan(block_dir)
+            if not valid.any():
+                continue
+            columns = {
+                'lat': latitude[rows].ravel()[valid],
+                'lon': longitude[rows].ravel()[valid],
+                'mag_depth_avg': block_mag[valid],
+                'dir_depth_avg': block_dir[valid]
+            }
+            for name in derived_names:
+                columns[name] = depth_average_data[name].values[rows].ravel()[valid]
+            num_points += int(valid.sum())
+
+            if 'csv' in file_paths:
+                pd.DataFrame(columns).to_csv(file_paths['csv'], mode='w' if first_block else 'a', header=first_block, index=False)
+            if 'gpkg' in file_paths:
+                export_write_vector(columns, file_paths['gpkg'], "GPKG", append=not first_block)
+            if 'fgb' in file_paths:
+                export_write_vector(columns, file_paths['fgb'], "FlatGeobuf", append=not first_block)
+            if 'parquet' in file_paths:
+                table = pa.table({**columns, 'geometry': export_point_wkb(columns['lon'], columns['lat'])})
+                if parquet_writer is None:
+                    schema = table.schema.with_metadata({b'geo': json.dumps(geoparquet_metadata).encode()})
+                    parquet_writer = pq.ParquetWriter(file_paths['parquet'], schema)
+                parquet_writer.write_table(table)
+            first_block = False
+
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+        trace_count('points_exported', num_points)
+        print(f"{model_name}: {num_points} points exported to {', '.join(file_paths)}.")
@@ -0,0 +1,436 @@
+# =========================
+# IMPORTS
+# =========================
+
+from concurrent.futures import ProcessPoolExecutor
+import gc
+from multiprocessing import shared_memory
+import numpy as np
+import os
+import xarray as xr
+
+from X_functions import plot_magnitude_contour, plot_threshold_zones, plot_advantage_zones
+from X_products import GGS_plot_magnitude, GGS_plot_threshold, GGS_plot_advantage, GGS_plot_profiles
+from X_lazy import lazy_import
+from X_trace import trace_function
+
+ccrs = lazy_import("cartopy.crs")
+matplotlib = lazy_import("matplotlib")
+backend_agg = lazy_import("matplotlib.backends.backend_agg")
+mfigure = lazy_import("matplotlib.figure")
+
+# =========================
+
+# SHARED MEMORY FUNCTIONS
+
+### FUNCTION:
+def render_share_dataset(dataset):
+
+    '''
+    Publish the arrays of a dataset into shared memory so render workers can attach to them without pickling.
+
+    Args:
+    - dataset (xarray.Dataset or None): The dataset to publish.
+
+    Returns:
+    - descriptor (dict or None): Picklable description of the shared dataset (names, shapes, dtypes, dims and attrs).
+    - handles (list): The shared memory blocks backing the dataset. The caller must close and unlink them once rendering is finished.
+    '''
+
+    if dataset is None:
+        return None, []
+
+    handles = []
+    variables = {}
+    for name, variable in dataset.variables.items():
+        values = variable.values
+        spec = {
+            'dims': variable.dims,
+            'attrs': dict(variable.attrs),
+            'is_coord': name in dataset.coords
+        }
+        if values.dtype.kind not in 'biufcmM' or values.ndim == 0 or values.nbytes == 0:
+            # Scalars (e.g. a scalar time coordinate) travel inline with their 0-d shape.
+            spec['values'] = values
+        else:
+            values = np.ascontiguousarray(values)
+            shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+            shared_values = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)
+            shared_values[...] = values
+            handles.append(shm)
+            spec['shm_name'] = shm.name
+            spec['shape'] = values.shape
+            spec['dtype'] = values.dtype.str
+        variables[name] = spec
+
+    descriptor = {
+        'variables': variables,
+        'attrs': dict(dataset.attrs)
+    }
+
+    return descriptor, handles
+
+### FUNCTION:
+def render_attach_dataset(descriptor):
+
+    '''
+    Rebuild a read-only dataset from a shared memory descriptor.
+
+    Args:
+    - descriptor (dict or None): Descriptor produced by 'render_share_dataset'.
+
+    Returns:
+    - dataset (xarray.Dataset or None): Dataset backed by the shared memory blocks.
+    - handles (list): The attached shared memory blocks. Close them once the dataset is no longer referenced.
+    '''
+
+    if descriptor is None:
+        return None, []
+
+    handles = []
+    data_vars = {}
+    coords = {}
+    for name, spec in descriptor['variables'].items():
+        if 'shm_name' in spec:
+            shm = shared_memory.SharedMemory(name=spec['shm_name'])
+            values = np.ndarray(spec['shape'], dtype=np.dtype(spec['dtype']), buffer=shm.buf)
+            values.flags.writeable = False
+            handles.append(shm)
+        else:
+            values = spec['values']
+        variable = xr.Variable(spec['dims'], values, attrs=spec['attrs'])
+        if spec['is_coord']:
+            coords[name] = variable
+        else:
+            data_vars[name] = variable
+
+    dataset = xr.Dataset(data_vars, coords=coords, attrs=descriptor['attrs'])
+
+    return dataset, handles
+
+### FUNCTION:
+def render_release(handles, unlink=False):
+
+    '''
+    Close (and optionally unlink) shared memory blocks.
+
+    Args:
+    - handles (list): Shared memory blocks to release.
+    - unlink (bool): Unlink the blocks as well. Only the publishing process should unlink.
+        - default: False
+
+    Returns:
+    - None
+    '''
+
+    for shm in handles:
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+### FUNCTION:
+def render_attach_models(model_descriptors):
+
+    '''
+    Attach every shared dataset of a list of model descriptor tuples.
+
+    Args:
+    - model_descriptors (list): Shared memory descriptor tuples (model, depth average, bin average) per model.
+
+    Returns:
+    - model_datasets (list): List of (model, depth average, bin average) dataset tuples.
+    - handles (list): The attached shared memory blocks.
+    '''
+
+    handles = []
+    model_datasets = []
+    for descriptors in model_descriptors:
+        datasets = []
+        for descriptor in descriptors:
+            dataset, dataset_handles = render_attach_dataset(descriptor)
+            datasets.append(dataset)
+            handles.extend(dataset_handles)
+        model_datasets.append(tuple(datasets))
+
+    return model_datasets, handles
+
+# RENDER JOB FUNCTIONS
+
+RENDER_PRODUCTS = {
+    'magnitude': ('create_magnitude_plot', GGS_plot_magnitude),
+    'threshold': ('create_threshold_plot', GGS_plot_threshold),
+    'advantage': ('create_advantage_plot', GGS_plot_advantage),
+    'profiles': ('create_profile_plot', GGS_plot_profiles)
+}
+
+### FUNCTION:
+def render_product_kwargs(config, product, gliders=None, optimal_paths=None):
+
+    '''
+    Build the keyword arguments for a product plotting function from the configuration.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - product (str): Product name. Options: 'magnitude', 'threshold', 'advantage' or 'profiles'.
+    - gliders (pandas.DataFrame or None): Glider data for plotting.
+        - default: None
+    - optimal_paths (list or None): Optimal paths per model.
+        - default: None
+
+    Returns:
+    - kwargs (dict): Keyword arguments for the product plotting function.
+    '''
+
+    product_config = config['PRODUCT']
+
+    kwargs = {
+        'latitude_qc': product_config['latitude_qc'],
+        'longitude_qc': product_config['longitude_qc']
+    }
+    if product == 'profiles':
+        kwargs['threshold'] = 0.5
+        stations = product_config.get('qc_stations')
+        if stations == 'waypoints':
+            stations = config['MISSION']['GPS_coords']
+        kwargs['stations'] = [tuple(station) for station in stations] if stations else None
+        kwargs['workers'] = product_config.get('profile_workers') or 1
+        return kwargs
+
+    kwargs.update({
+        'density': product_config['density'],
+        'gliders': gliders,
+        'show_waypoints': product_config['show_waypoints'],
+        'show_eez': product_config['show_eez'],
+        'show_qc': product_config['show_qc'],
+        'manual_extent': product_config['manual_extent'],
+        'optimal_paths': optimal_paths
+    })
+    if product in ('threshold', 'advantage'):
+        kwargs.update({key: product_config[key] for key in ('mag1', 'mag2', 'mag3', 'mag4', 'mag5')})
+    if product == 'advantage':
+        kwargs['tolerance'] = product_config['tolerance']
+
+    return kwargs
+
+### FUNCTION:
+def render_build_jobs(config, directory, datetime_index, model_descriptors, gliders=None, optimal_paths=None, per_model=False):
+
+    '''
+    Split the enabled products into independent render jobs (product x datetime, optionally per model panel).
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - directory (str): Directory to save the plots.
+    - datetime_index (str): Datetime index for the plots.
+    - model_descriptors (list): Shared memory descriptor tuples (model, depth average, bin average) per model.
+    - gliders (pandas.DataFrame or None): Glider data for plotting.
+        - default: None
+    - optimal_paths (list or None): Optimal paths per model.
+        - default: None
+    - per_model (bool): Render every model panel as its own job and figure.
+        - default: False
+
+    Returns:
+    - jobs (list): List of render job dictionaries.
+    '''
+
+    if optimal_paths is None:
+        optimal_paths = [None] * len(model_descriptors)
+
+    jobs = []
+    for product, (flag, _) in RENDER_PRODUCTS.items():
+        if not config['PRODUCT'][flag]:
+            continue
+        if per_model:
+            for descriptors, optimal_path in zip(model_descriptors, optimal_paths):
+                model_name = descriptors[1]['attrs']['model_name']
+                jobs.append({
+                    'product': product,
+                    'config': config,
+                    'directory': os.path.join(directory, model_name),
+                    'datetime_index': datetime_index,
+                    'model_descriptors': [descriptors],
+                    'kwargs': render_product_kwargs(config, product, gliders=gliders, optimal_paths=[optimal_path])
+                })
+        else:
+            jobs.append({
+                'product': product,
+                'config': config,
+                'directory': directory,
+                'datetime_index': datetime_index,
+                'model_descriptors': model_descriptors,
+                'kwargs': render_product_kwargs(config, product, gliders=gliders, optimal_paths=optimal_paths)
+            })
+
+    return jobs
+
+### FUNCTION:
+def render_worker_init():
+
+    '''
+    Initialize a render worker with the non-interactive Agg backend.
+
+    Args:
+    - None
+
+    Returns:
+    - None
+    '''
+
+    matplotlib.use('Agg', force=True)
+
+### FUNCTION:
+def render_execute(job):
+
+    '''
+    Execute a single render job against datasets attached from shared memory.
+
+    Args:
+    - job (dict): Render job dictionary produced by 'render_build_jobs'.
+
+    Returns:
+    - product (str): The product that was rendered.
+    '''
+
+    _, plot_function = RENDER_PRODUCTS[job['product']]
+    model_datasets, handles = render_attach_models(job['model_descriptors'])
+
+    try:
+        os.makedirs(job['directory'], exist_ok=True)
+        plot_function(job['config'], job['directory'], job['datetime_index'], model_datasets, **job['kwargs'])
+    finally:
+        model_datasets = None
+        gc.collect()
+        render_release(handles)
+
+    return job['product']
+
+# RENDER POOL FUNCTIONS
+
+### FUNCTION:
+@trace_function()
+def GGS_render_products(config, directory, datetime_index, model_datasets, gliders=None, optimal_paths=None):
+
+    '''
+    Render all enabled plot products for a datetime, using a dedicated render worker pool when configured.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - directory (str): Directory to save the plots.
+    - datetime_index (str): Datetime index for the plots.
+    - model_datasets (list): List of (model, depth average, bin average) dataset tuples.
+    - gliders (pandas.DataFrame or None): Glider data for plotting.
+        - default: None
+    - optimal_paths (list or None): Optimal paths per model.
+        - default: None
+
+    Returns:
+    - None
+    '''
+
+    render_workers = config['PRODUCT'].get('render_workers') or 1
+    per_model = config['PRODUCT'].get('render_per_model', False)
+
+    if render_workers <= 1 and not per_model:
+        for product, (flag, plot_function) in RENDER_PRODUCTS.items():
+            if config['PRODUCT'][flag]:
+                plot_function(config, directory, datetime_index, model_datasets, **render_product_kwargs(config, product, gliders=gliders, optimal_paths=optimal_paths))
+        return
+
+    print(f"\n### RENDERING PRODUCTS [{render_workers} WORKERS] ###\n")
+
+    handles = []
+    model_descriptors = []
+    try:
+        for model_tuple in model_datasets:
+            descriptors = []
+            for dataset in model_tuple:
+                descriptor, dataset_handles = render_share_dataset(dataset)
+                descriptors.append(descriptor)
+                handles.extend(dataset_handles)
+            model_descriptors.append(tuple(descriptors))
+
+        jobs = render_build_jobs(config, directory, datetime_index, model_descriptors, gliders=gliders, optimal_paths=optimal_paths, per_model=per_model)
+
+        if render_workers <= 1:
+            for job in jobs:
+                render_execute(job)
+        else:
+            with ProcessPoolExecutor(max_workers=min(render_workers, max(1, len(jobs))), initializer=render_worker_init) as executor:
+                for job, future in [(job, executor.submit(render_execute, job)) for job in jobs]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error during {job['product']} rendering for {datetime_index}: {e}")
+    finally:
+        render_release(handles, unlink=True)
+
+# QUALITY CONTROL FUNCTIONS
+
+### FUNCTION:
+def render_visual_diff(config, model_depth_average, product="magnitude", fidelity=1.0, dpi=100, tolerance=32):
+
+    '''
+    Render the field layer of a map product in both 'contour' and 'raster' modes and compare the two images pixel by pixel.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - model_depth_average (xarray.Dataset): Depth-averaged model data.
+    - product (str): Map product to compare. Options: 'magnitude', 'threshold' or 'advantage'.
+        - default: 'magnitude'
+    - fidelity (float): Fraction of the figure pixel resolution used in 'raster' mode.
+        - default: 1.0
+    - dpi (int): Resolution of the compared images.
+        - default: 100
+    - tolerance (int): Maximum per-channel difference (0-255) for two pixels to be considered equal.
+        - default: 32
+
+    Returns:
+    - visual_diff (dict): Mismatched pixel fraction, mean absolute difference and the per-pixel difference image.
+    '''
+
+    longitude = model_depth_average.lon.values.squeeze()
+    latitude = model_depth_average.lat.values.squeeze()
+    mag_depth_avg = model_depth_average['mag_depth_avg'].values.squeeze()
+    dir_depth_avg = model_depth_average['dir_depth_avg'].values.squeeze()
+    product_config = config['PRODUCT']
+    magnitudes = [product_config[key] for key in ('mag1', 'mag2', 'mag3', 'mag4', 'mag5')]
+
+    def render_image(render_mode):
+        fig = mfigure.Figure(figsize=(10, 10), dpi=dpi)
+        backend_agg.FigureCanvasAgg(fig)
+        ax = fig.add_subplot(1, 1, 1, projection=ccrs.Mercator())
+        ax.set_extent([float(np.nanmin(longitude)), float(np.nanmax(longitude)), float(np.nanmin(latitude)), float(np.nanmax(latitude))], crs=ccrs.PlateCarree())
+        ax.set_axis_off()
+        if product == "magnitude":
+            plot_magnitude_contour(ax, fig, longitude, latitude, mag_depth_avg, render_mode=render_mode, fidelity=fidelity)
+        elif product == "threshold":
+            plot_threshold_zones(ax, longitude, latitude, mag_depth_avg, *magnitudes, threshold_legend=False, render_mode=render_mode, fidelity=fidelity)
+        elif product == "advantage":
+            plot_advantage_zones(ax, config, longitude, latitude, dir_depth_avg, product_config['tolerance'], advantage_legend=False, render_mode=render_mode, fidelity=fidelity)
+        else:
+            raise ValueError(f"Invalid product for visual diff: {product}")
+        fig.canvas.draw()
+        image = np.asarray(fig.canvas.buffer_rgba())[:, :, :3].astype(np.int16)
+        return image
+
+    contour_image = render_image("contour")
+    raster_image = render_image("raster")
+
+    difference = np.abs(contour_image - raster_image).max(axis=2)
+    visual_diff = {
+        'product': product,
+        'fidelity': fidelity,
+        'mismatch_fraction': float((difference > tolerance).mean()),
+        'mean_abs_diff': float(difference.mean()),
+        'difference': difference
+    }
+    print(f"Visual diff [{product}, fidelity {fidelity}]: {visual_diff['mismatch_fraction']:.2%} of pixels differ, mean difference {visual_diff['mean_abs_diff']:.2f}")
+
+    return visual_diff
@@ -0,0 +1,407 @@
+# =========================
+# IMPORTS
+# =========================
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import copy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+
+from X_functions import plot_basemap_source
+from X_lazy import lazy_import, lazy_load
+from X_sources import MODEL_SOURCES, SOURCE_OPEN_KWARGS, source_registry, source_catalog
+
+cfeature = lazy_import("cartopy.feature")
+cmo = lazy_import("cmocean.cm")
+matplotlib = lazy_import("matplotlib")
+plt = lazy_import("matplotlib.pyplot")
+
+# =========================
+
+SERVICE_CATALOG_TTL = 1800
+
+# WARM WORKER FUNCTIONS
+
+### FUNCTION:
+def service_worker_init(config):
+
+    '''
+    Warm a service worker once, when it starts: import the plotting and GIS stacks, load the basemap files and coastlines of the configured extent and open the remote model catalogs.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration used for warming (extent, basemap paths and enabled models).
+
+    Returns:
+    - None
+    '''
+
+    matplotlib.use('Agg', force=True)
+    for module in (plt, cmo, cfeature):
+        lazy_load(module)
+
+    try:
+        plot_basemap_source(config['DATA']['bathymetry_path'])
+        plot_basemap_source(config['DATA']['eez_path'])
+        (min_lat, min_lon), (max_lat, max_lon) = config['MISSION']['extent']
+        extent = (min_lon, max_lon, min_lat, max_lat)
+        for feature in (cfeature.GSHHSFeature(scale='full'), cfeature.RIVERS, cfeature.LAKES, cfeature.BORDERS):
+            list(feature.intersecting_geometries(extent))
+    except Exception as e:
+        print(f"Error warming the basemaps: {e}")
+
+    for model_key in MODEL_SOURCES:
+        if not config['MODEL'].get(f"enable_{model_key}"):
+            continue
+        for source in source_registry(config, model_key):
+            if not source.get('catalog_ttl'):
+                continue
+            try:
+                source_catalog(source, **SOURCE_OPEN_KWARGS.get(model_key, {}))
+            except Exception as e:
+                print(f"Error opening the {model_key.upper()} catalog {source['name']}: {e}")
+
+### FUNCTION:
+def service_ping():
+
+    '''
+    Answer a liveness check from a service worker.
+
+    Args:
+    - None
+
+    Returns:
+    - pid (int): Process ID of the worker.
+    '''
+
+    return os.getpid()
+
+### FUNCTION:
+def service_pool(config, num_workers):
+
+    '''
+    Start the warm worker pool and wait until every worker is warm.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration used for warming.
+    - num_workers (int): Number of worker processes.
+
+    Returns:
+    - executor (concurrent.futures.ProcessPoolExecutor): The warm worker pool.
+    - warm_time (float): Seconds spent starting and warming the workers.
+    '''
+
+    start_time = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=num_workers, initializer=service_worker_init, initargs=(config,))
+    pids = {future.result() for future in [executor.submit(service_ping) for _ in range(num_workers)]}
+    warm_time = time.perf_counter() - start_time
+    print(f"{len(pids)} of {num_workers} service workers warm in {warm_time:.1f} s.")
+
+    return executor, warm_time
+
+# RUN QUEUE FUNCTIONS
+
+### FUNCTION:
+def service_start(run_function, config, num_workers=1, power=1, catalog_ttl=SERVICE_CATALOG_TTL):
+
+    '''
+    Start the GGS service: the warm worker pool and the thread running queued run requests one after another on it.
+
+    Args:
+    - run_function (callable): Function running one request (GGS_main), called with power, path, config_name, overrides, datetimes and executor.
+    - config (dict): Glider Guidance System mission configuration used for warming.
+    - num_workers (int): Number of warm worker processes.
+        - default: 1
+    - power (float): Fraction of the CPU cores reported for each run.
+        - default: 1
+    - catalog_ttl (float): Seconds the workers keep a remote model catalog open, unless a request overrides 'source_catalog_ttl'.
+        - default: SERVICE_CATALOG_TTL
+
+    Returns:
+    - service (dict): Service state: worker pool, run queue, run records and settings.
+    '''
+
+    config = copy.deepcopy(config)
+    config['MODEL'].setdefault('source_catalog_ttl', catalog_ttl)
+    executor, warm_time = service_pool(config, num_workers)
+
+    service = {
+        'run_function': run_function,
+        'config': config,
+        'executor': executor,
+        'num_workers': num_workers,
+        'power': power,
+        'catalog_ttl': catalog_ttl,
+        'queue': queue.Queue(),
+        'runs': {},
+        'run_ids': itertools.count(1),
+        'lock': threading.Lock(),
+        'started': time.time(),
+        'warm_time_s': warm_time
+    }
+    threading.Thread(target=service_runner, args=(service,), daemon=True).start()
+
+    return service
+
+### FUNCTION:
+def service_submit(service, request):
+
+    '''
+    Validate a run request and add it to the run queue.
+
+    Args:
+    - service (dict): Service state.
+    - request (dict): Run request with a 'config_name', and optionally 'overrides' (settings per config section), 'datetimes' (datetime indexes to process) and 'path' ('local' or 'rucool').
+
+    Returns:
+    - run (dict): Public record of the queued run.
+    '''
+
+    if not isinstance(request, dict) or not isinstance(request.get('config_name'), str):
+        raise ValueError("A run request needs a 'config_name'.")
+    overrides = copy.deepcopy(request.get('overrides') or {})
+    if not isinstance(overrides, dict) or not all(isinstance(settings, dict) for settings in overrides.values()):
+        raise ValueError("'overrides' must map config sections to settings.")
+    datetimes = request.get('datetimes')
+    if datetimes is not None and not isinstance(datetimes, list):
+        raise ValueError("'datetimes' must be a list of datetime indexes.")
+    overrides.setdefault('MODEL', {}).setdefault('source_catalog_ttl', service['catalog_ttl'])
+
+    with service['lock']:
+        run_id = str(next(service['run_ids']))
+        run = {
+            'id': run_id,
+            'config_name': request['config_name'],
+            'overrides': overrides,
+            'datetimes': datetimes,
+            'path': request.get('path', "local"),
+            'status': 'queued',
+            'submitted': time.time(),
+            'started': None,
+            'finished': None,
+            'tasks': [],
+            'error': None
+        }
+        service['runs'][run_id] = run
+    service['queue'].put(run_id)
+
+    return service_view(service, run)
+
+### FUNCTION:
+def service_runner(service):
+
+    '''
+    Run the queued requests one after another on the warm worker pool. The pool is restarted when a worker died; if the restart fails, the run is marked failed and the next run tries again.
+
+    Args:
+    - service (dict): Service state.
+
+    Returns:
+    - None
+    '''
+
+    while True:
+        run = service['runs'][service['queue'].get()]
+        try:
+            service['executor'].submit(service_ping).result()
+        except (BrokenProcessPool, RuntimeError):
+            # RuntimeError: the pool was shut down after an earlier restart failed.
+            print("Service worker pool broken, restarting it.")
+            service['executor'].shutdown(wait=False)
+            try:
+                service['executor'], service['warm_time_s'] = service_pool(service['config'], service['num_workers'])
+            except Exception as e:
+                run['status'] = 'failed'
+                run['error'] = f"Worker pool restart failed: {type(e).__name__}: {e}"
+                run['finished'] = time.time()
+                traceback.print_exc()
+                continue
+
+        run['status'] = 'running'
+        run['started'] = time.time()
+        print(f"\n### SERVICE RUN {run['id']}: {run['config_name']} ###\n")
+        try:
+            summary = service['run_function'](
+                power=service['power'],
+                path=run['path'],
+                config_name=run['config_name'],
+                overrides=run['overrides'],
+                datetimes=run['datetimes'],
+                executor=service['executor']
+            )
+            if summary is None:
+                run['status'] = 'failed'
+                run['error'] = "Configuration import failed."
+            else:
+                run['tasks'] = [{key: record.get(key) for key in ('datetime_index', 'status', 'attempts', 'wall_time_s', 'errors')} for record in summary['tasks']]
+                run['status'] = 'ok' if all(task['status'] == 'ok' for task in run['tasks']) else 'partial'
+        except Exception as e:
+            run['status'] = 'failed'
+            run['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        run['finished'] = time.time()
+        print(f"Service run {run['id']} finished: {run['status']} ({run['finished'] - run['started']:.1f} s).")
+
+### FUNCTION:
+def service_view(service, run):
+
+    '''
+    Build the public record of a run, with its queue position and timings.
+
+    Args:
+    - service (dict): Service state.
+    - run (dict): Run record.
+
+    Returns:
+    - view (dict): Run record with 'queue_position', 'queue_wait_s' and 'wall_time_s'.
+    '''
+
+    view = {key: value for key, value in run.items()}
+    queued_ids = list(service['queue'].queue)
+    view['queue_position'] = queued_ids.index(run['id']) + 1 if run['id'] in queued_ids else None
+    view['queue_wait_s'] = (run['started'] or time.time()) - run['submitted']
+    view['wall_time_s'] = (run['finished'] or time.time()) - run['started'] if run['started'] else None
+
+    return view
+
+### FUNCTION:
+def service_status(service):
+
+    '''
+    Summarize the service state.
+
+    Args:
+    - service (dict): Service state.
+
+    Returns:
+    - status (dict): Uptime, worker count, warm-up time and run counts per status.
+    '''
+
+    statuses = [run['status'] for run in service['runs'].values()]
+    status = {
+        'uptime_s': time.time() - service['started'],
+        'num_workers': service['num_workers'],
+        'warm_time_s': service['warm_time_s'],
+        'catalog_ttl': service['catalog_ttl'],
+        'queued': service['queue'].qsize(),
+        'runs': {name: statuses.count(name) for name in ('queued', 'running', 'ok', 'partial', 'failed')}
+    }
+
+    return status
+
+# HTTP API FUNCTIONS
+
+### CLASS:
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+
+    '''
+    HTTP request handler of the GGS service API:
+    - POST /runs: queue a run request (JSON body), answered with the run record.
+    - GET /runs: list the run records.
+    - GET /runs/<id>: run record.
+    - GET /status: service state.
+    '''
+
+    service = None
+
+    ### FUNCTION:
+    def log_message(self, format, *args):
+
+        '''
+        Silence the per-request log lines.
+        '''
+
+        pass
+
+    ### FUNCTION:
+    def send_json(self, status, body):
+
+        '''
+        Send a JSON response.
+
+        Args:
+        - status (int): HTTP status code.
+        - body (dict or list): Response body.
+
+        Returns:
+        - None
+        '''
+
+        content = json.dumps(body, indent=2, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    ### FUNCTION:
+    def do_GET(self):
+
+        '''
+        Answer the status and run record requests.
+        '''
+
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        if parts == ['status']:
+            self.send_json(200, service_status(self.service))
+        elif parts == ['runs']:
+            self.send_json(200, [service_view(self.service, run) for run in list(self.service['runs'].values())])
+        elif len(parts) == 2 and parts[0] == 'runs' and parts[1] in self.service['runs']:
+            self.send_json(200, service_view(self.service, self.service['runs'][parts[1]]))
+        else:
+            self.send_json(404, {'error': f"Unknown resource {self.path}"})
+
+    ### FUNCTION:
+    def do_POST(self):
+
+        '''
+        Answer a run request.
+        '''
+
+        if self.path.split('?')[0].rstrip('/') != '/runs':
+            self.send_json(404, {'error': f"Unknown resource {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            run = service_submit(self.service, request)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        self.send_json(202, run)
+
+### FUNCTION:
+def service_serve(service, host="127.0.0.1", port=8090, background=True):
+
+    '''
+    Serve the GGS service API over HTTP.
+
+    Args:
+    - service (dict): Service state from 'service_start'.
+    - host (str): Host to bind.
+        - default: '127.0.0.1'
+    - port (int): Port to bind (0 picks a free port).
+        - default: 8090
+    - background (bool): Serve from a daemon thread and return immediately, instead of serving forever.
+        - default: True
+
+    Returns:
+    - server (http.server.ThreadingHTTPServer): The running server.
+    '''
+
+    handler = type('ServiceHandler', (ServiceRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+
+    print(f"GGS service accepting run requests at {server.base_url}/runs ({service['num_workers']} warm workers)")
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+
+    return server
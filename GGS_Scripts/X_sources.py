@@ -0,0 +1,349 @@
+# =========================
+# IMPORTS
+# =========================
+
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os
+import pandas as pd
+import threading
+import time
+import urllib.request
+
+import xarray as xr
+
+from X_lazy import lazy_import
+from X_trace import trace_count
+
+cm = lazy_import("copernicusmarine")
+
+# =========================
+
+MODEL_SOURCES = {
+    'rtofs': [
+        {'name': 'rutgers', 'url': "https://tds.marine.rutgers.edu/thredds/dodsC/cool/rtofs/rtofs_us_east_scraped"}
+    ],
+    'cmems': [
+        {'name': 'copernicus', 'dataset_id': "cmems_mod_glo_phy-cur_anfc_0.083deg_PT6H-i"}
+    ],
+    'gofs': [
+        {'name': 'hycom', 'url': "https://tds.hycom.org/thredds/dodsC/GLBy0.08/expt_93.0"}
+    ]
+}
+
+SOURCE_OPEN_KWARGS = {
+    'gofs': {'drop_variables': "tau"}
+}
+
+SOURCE_CREDENTIAL_ENV = {
+    'username': "COPERNICUSMARINE_SERVICE_USERNAME",
+    'password': "COPERNICUSMARINE_SERVICE_PASSWORD"
+}
+
+SOURCE_STATE = {}
+SOURCE_DATASETS = {}
+SOURCE_LOCK = threading.Lock()
+
+# SOURCE REGISTRY FUNCTIONS
+
+### FUNCTION:
+def source_cache_directory(config=None):
+
+    '''
+    Resolve the prefetch cache directory.
+
+    Args:
+    - config (dict or None): Glider Guidance System mission configuration. A string 'prefetch_cache' in the MODEL section overrides the default directory.
+        - default: None
+
+    Returns:
+    - directory (str): The prefetch cache directory ('data/prefetch' by default).
+    '''
+
+    prefetch_cache = config['MODEL'].get('prefetch_cache') if config is not None else None
+    if isinstance(prefetch_cache, str):
+        return prefetch_cache
+
+    return os.path.join(os.path.dirname(__file__), "data", "prefetch")
+
+### FUNCTION:
+def source_registry(config, model_key):
+
+    '''
+    List the data sources of a model from the configuration, falling back to the operational servers.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - model_key (str): Model key. Options: 'rtofs', 'cmems' or 'gofs'.
+
+    Returns:
+    - sources (list): Source dictionaries in configured order, after the prefetch cache when enabled. Each has a 'name' and one of 'url' (OPeNDAP or HTTP byte-range, with the 'catalog_ttl' it is kept open for), 'directory' (local cache of model files) or 'dataset_id' (Copernicus Marine, with the 'username' and 'password' of the source, else of 'cmems_username'/'cmems_password' in the MODEL section, else of the Copernicus Marine environment variables).
+    '''
+
+    configured = (config['MODEL'].get('sources') or {}).get(model_key)
+    endpoint = (config['MODEL'].get('endpoints') or {}).get(model_key)
+    if configured is None:
+        configured = ([endpoint] if endpoint else []) + ['default']
+
+    sources = []
+    if config['MODEL'].get('prefetch_cache'):
+        sources.append({
+            'name': 'prefetch',
+            'directory': os.path.join(source_cache_directory(config), model_key),
+            'pattern': f"{model_key}_{{datetime}}.nc"
+        })
+    for entry in configured:
+        if entry == 'default':
+            sources.extend(dict(source) for source in MODEL_SOURCES[model_key])
+            continue
+        source = {'url': entry} if isinstance(entry, str) else dict(entry)
+        source.setdefault('name', source.get('url') or source.get('directory') or source.get('dataset_id'))
+        sources.append(source)
+    catalog_ttl = config['MODEL'].get('source_catalog_ttl', 0)
+    for source in sources:
+        if 'url' in source:
+            source.setdefault('catalog_ttl', catalog_ttl)
+        if 'dataset_id' in source:
+            for key, variable in SOURCE_CREDENTIAL_ENV.items():
+                if not source.get(key):
+                    source[key] = config['MODEL'].get(f"cmems_{key}") or os.environ.get(variable)
+
+    return sources
+
+### FUNCTION:
+def source_probe(source, timeout=5):
+
+    '''
+    Check the health and latency of a data source with a minimal request.
+
+    Args:
+    - source (dict): Source dictionary.
+    - timeout (float): Request timeout in seconds.
+        - default: 5
+
+    Returns:
+    - probe (dict): Health, latency in seconds (None when not measured) and error of the source.
+    '''
+
+    start = time.perf_counter()
+    probe = {'healthy': True, 'latency_s': None, 'error': None, 'time': time.time()}
+    try:
+        if 'directory' in source:
+            if not glob.glob(os.path.join(source['directory'], source.get('pattern', '*.nc').replace('{datetime}', '*'))):
+                raise FileNotFoundError(f"no model files in {source['directory']}")
+        elif 'url' in source or 'probe_url' in source:
+            url = source.get('probe_url') or source['url'].split('#')[0]
+            if source.get('probe_url') is None and '/dodsC/' in url:
+                url = f"{url}.das"
+            request = urllib.request.Request(url, headers={'Range': 'bytes=0-0'})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read(1)
+        else:
+            return probe
+        probe['latency_s'] = time.perf_counter() - start
+    except Exception as e:
+        probe['healthy'] = False
+        probe['error'] = str(e)
+
+    return probe
+
+### FUNCTION:
+def source_rank(config, model_key):
+
+    '''
+    Order the data sources of a model by health and measured latency. Probes run concurrently and are cached per process for 'source_probe_ttl' seconds.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - model_key (str): Model key. Options: 'rtofs', 'cmems' or 'gofs'.
+
+    Returns:
+    - ranked_sources (list): Source dictionaries, healthy sources first (fastest first), then unhealthy sources as a last resort.
+    '''
+
+    sources = source_registry(config, model_key)
+    if len(sources) == 1 or not config['MODEL'].get('source_probing', True):
+        return sources
+
+    probe_timeout = config['MODEL'].get('source_probe_timeout', 5)
+    probe_ttl = config['MODEL'].get('source_probe_ttl', 600)
+    with SOURCE_LOCK:
+        state = SOURCE_STATE.setdefault(model_key, {})
+        stale_sources = [source for source in sources if time.time() - state.get(source['name'], {}).get('time', 0) > probe_ttl]
+    if stale_sources:
+        with ThreadPoolExecutor(max_workers=len(stale_sources)) as executor:
+            probes = list(executor.map(lambda source: source_probe(source, probe_timeout), stale_sources))
+        with SOURCE_LOCK:
+            for source, probe in zip(stale_sources, probes):
+                state[source['name']] = probe
+                status = f"{probe['latency_s']:.2f} s" if probe['latency_s'] is not None else "ok" if probe['healthy'] else f"unhealthy ({probe['error']})"
+                print(f"{model_key.upper()} source {source['name']}: {status}")
+
+    def rank_key(item):
+        position, source = item
+        probe = state.get(source['name'], {})
+        latency = probe.get('latency_s')
+        return (not probe.get('healthy', True), latency is None, latency or 0, position)
+
+    ranked_sources = [source for _, source in sorted(enumerate(sources), key=rank_key)]
+
+    return ranked_sources
+
+### FUNCTION:
+def source_failed(model_key, source, error):
+
+    '''
+    Mark a data source unhealthy after a failed fetch, so later fetches in this process prefer the other sources until the probe expires.
+
+    Args:
+    - model_key (str): Model key.
+    - source (dict): Source dictionary that failed.
+    - error (Exception): The error raised.
+
+    Returns:
+    - None
+    '''
+
+    with SOURCE_LOCK:
+        SOURCE_STATE.setdefault(model_key, {})[source['name']] = {'healthy': False, 'latency_s': None, 'error': str(error), 'time': time.time()}
+
+### FUNCTION:
+def source_warmup(config):
+
+    '''
+    Probe the data sources of every enabled model concurrently, so later fetches in this process start from ranked sources.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+
+    Returns:
+    - probes (dict): Probe result per model key and source name.
+    '''
+
+    model_sources = [(model_key, source) for model_key in MODEL_SOURCES if config['MODEL'].get(f"enable_{model_key}") for source in source_registry(config, model_key)]
+    if not model_sources:
+        return {}
+
+    probe_timeout = config['MODEL'].get('source_probe_timeout', 5)
+    with ThreadPoolExecutor(max_workers=len(model_sources)) as executor:
+        results = list(executor.map(lambda item: source_probe(item[1], probe_timeout), model_sources))
+
+    probes = {}
+    with SOURCE_LOCK:
+        for (model_key, source), probe in zip(model_sources, results):
+            SOURCE_STATE.setdefault(model_key, {})[source['name']] = probe
+            probes.setdefault(model_key, {})[source['name']] = probe
+
+    return probes
+
+# SOURCE ACCESS FUNCTIONS
+
+### FUNCTION:
+def source_open(source, subset=None, datetime=None, **kwargs):
+
+    '''
+    Open a model dataset from a data source.
+
+    Args:
+    - source (dict): Source dictionary.
+    - subset (dict or None): Copernicus Marine style subset ('minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude', 'start_datetime', 'end_datetime', 'variables'), applied server-side for Copernicus sources and lazily otherwise.
+        - default: None
+    - datetime (str, datetime.datetime or None): Datetime being fetched, filled into a '{datetime}' placeholder of a directory source pattern as '%Y%m%dT%HZ'.
+        - default: None
+    - **kwargs: Extra arguments for xarray (e.g. drop_variables).
+
+    Returns:
+    - dataset (xarray.Dataset): The lazily opened dataset.
+    '''
+
+    if 'dataset_id' in source:
+        return cm.open_dataset(
+            dataset_id=source['dataset_id'],
+            username=source.get('username'),
+            password=source.get('password'),
+            **(subset or {})
+        )
+
+    if 'directory' in source:
+        pattern = source.get('pattern', '*.nc')
+        if '{datetime}' in pattern:
+            pattern = pattern.format(datetime=pd.Timestamp(datetime).strftime('%Y%m%dT%HZ'))
+        files = sorted(glob.glob(os.path.join(source['directory'], pattern)))
+        if not files:
+            raise FileNotFoundError(f"No model files in {source['directory']}")
+        dataset = xr.open_mfdataset(files, combine='by_coords', **kwargs)
+    elif source.get('catalog_ttl'):
+        dataset = source_catalog(source, **kwargs)
+    else:
+        dataset = xr.open_dataset(source['url'], **kwargs)
+
+    if subset is not None:
+        dataset = dataset[subset['variables']].sel(
+            longitude=slice(subset['minimum_longitude'], subset['maximum_longitude']),
+            latitude=slice(subset['minimum_latitude'], subset['maximum_latitude']),
+            time=slice(subset['start_datetime'], subset['end_datetime'])
+        )
+
+    return dataset
+
+### FUNCTION:
+def source_catalog(source, **kwargs):
+
+    '''
+    Open a remote model catalog once per process and reuse it for 'catalog_ttl' seconds, so repeated fetches skip the metadata requests. The catalog is reopened afterwards to pick up new forecast datetimes.
+
+    Args:
+    - source (dict): Source dictionary with a 'url'.
+    - **kwargs: Extra arguments for xarray (e.g. drop_variables).
+
+    Returns:
+    - dataset (xarray.Dataset): The lazily opened dataset.
+    '''
+
+    key = (source['url'], repr(sorted(kwargs.items())))
+    with SOURCE_LOCK:
+        cached = SOURCE_DATASETS.get(key)
+    if cached is not None and time.time() - cached['time'] <= source['catalog_ttl']:
+        trace_count('catalog_reuses')
+        return cached['dataset']
+
+    dataset = xr.open_dataset(source['url'], **kwargs)
+    with SOURCE_LOCK:
+        SOURCE_DATASETS[key] = {'dataset': dataset, 'time': time.time()}
+    if cached is not None:
+        cached['dataset'].close()
+
+    return dataset
+
+### FUNCTION:
+def source_fetch(config, model_key, fetch_function):
+
+    '''
+    Run a model fetch against the fastest healthy source, failing over to the next source when it raises.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - model_key (str): Model key. Options: 'rtofs', 'cmems' or 'gofs'.
+    - fetch_function (callable): Function taking a source dictionary that opens, subsets and loads the model data.
+
+    Returns:
+    - source (dict): The source the data was fetched from.
+    '''
+
+    errors = []
+    for source in source_rank(config, model_key):
+        try:
+            fetch_function(source)
+            print(f"{model_key.upper()} data fetched from source: {source['name']}")
+            return source
+        except Exception as e:
+            errors.append(f"{source['name']}: {e}")
+            if not isinstance(e, FileNotFoundError):
+                source_failed(model_key, source, e)
+                with SOURCE_LOCK:
+                    for key in [key for key in SOURCE_DATASETS if key[0] == source.get('url')]:
+                        SOURCE_DATASETS.pop(key)
+            trace_count('source_failovers')
+            print(f"{model_key.upper()} source {source['name']} failed ({e}), trying the next source.")
+
+    raise RuntimeError(f"All {model_key.upper()} sources failed. " + "; ".join(errors))
@@ -0,0 +1,210 @@
+# =========================
+# IMPORTS
+# =========================
+
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import os
+import re
+import threading
+import time
+
+from X_synthetic import synthetic_rtofs, synthetic_cmems, synthetic_gofs
+
+# =========================
+
+STANDIN_FIXTURES = {
+    'rtofs': ("rtofs_us_east.nc", synthetic_rtofs),
+    'cmems': ("cmems_mod_glo_phy-cur_anfc.nc", synthetic_cmems),
+    'gofs': ("gofs_expt_93.nc", synthetic_gofs)
+}
+
+# STAND-IN DATA FUNCTIONS
+
+### FUNCTION:
+def standin_write_fixtures(directory, config, grid_size=(300, 300), num_depths=40, datetime_index="2024-01-01T00:00:00Z", overwrite=False):
+
+    '''
+    Write synthetic RTOFS, CMEMS and GOFS aggregations for the stand-in server. Existing (e.g. recorded) files are kept unless overwritten.
+
+    Args:
+    - directory (str): Directory served by the stand-in server.
+    - config (dict): Glider Guidance System mission configuration (the synthetic grids cover its extent).
+    - grid_size (tuple): Number of horizontal grid points.
+        - default: (300, 300)
+    - num_depths (int): Number of depth levels.
+        - default: 40
+    - datetime_index (str): First datetime of the aggregations.
+        - default: '2024-01-01T00:00:00Z'
+    - overwrite (bool): Regenerate files that already exist.
+        - default: False
+
+    Returns:
+    - fixture_files (dict): File name per model key ('rtofs', 'cmems', 'gofs').
+    '''
+
+    os.makedirs(directory, exist_ok=True)
+    fixture_files = {}
+    for model_key, (file_name, synthetic_function) in STANDIN_FIXTURES.items():
+        file_path = os.path.join(directory, file_name)
+        if overwrite or not os.path.exists(file_path):
+            dataset = synthetic_function(config, grid_size=grid_size, num_depths=num_depths, datetime_index=datetime_index)
+            encoding = {name: {'zlib': True, 'complevel': 1, 'chunksizes': (1, 1) + dataset[name].shape[2:]} for name in dataset.data_vars}
+            dataset.to_netcdf(file_path, engine='netcdf4', format='NETCDF4', encoding=encoding)
+            print(f"Stand-in fixture written: {file_path}")
+        fixture_files[model_key] = file_name
+
+    return fixture_files
+
+# STAND-IN SERVER FUNCTIONS
+
+### CLASS:
+class StandinRequestHandler(SimpleHTTPRequestHandler):
+
+    '''
+    HTTP request handler serving model files with byte-range support and simulated network latency and bandwidth.
+    '''
+
+    latency = 0.0
+    bandwidth = None
+    statistics = None
+    statistics_lock = threading.Lock()
+    block_size = 65536
+
+    ### FUNCTION:
+    def log_message(self, format, *args):
+
+        '''
+        Silence the per-request log lines.
+        '''
+
+        pass
+
+    ### FUNCTION:
+    def send_head(self):
+
+        '''
+        Answer a GET or HEAD request, honouring a single 'Range' header.
+
+        Returns:
+        - file (file object or None): Open file positioned at the start of the requested range.
+        '''
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404, "File not found")
+            return None
+
+        file = open(path, 'rb')
+        file_size = os.fstat(file.fileno()).st_size
+        range_match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range', ''))
+        if range_match and (range_match.group(1) or range_match.group(2)):
+            if range_match.group(1):
+                start = int(range_match.group(1))
+                end = int(range_match.group(2)) if range_match.group(2) else file_size - 1
+            else:
+                start = max(0, file_size - int(range_match.group(2)))
+                end = file_size - 1
+            end = min(end, file_size - 1)
+            if start > end:
+                file.close()
+                self.send_error(416, "Requested range not satisfiable")
+                return None
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{file_size}")
+        else:
+            start, end = 0, file_size - 1
+            self.send_response(200)
+
+        file.seek(start)
+        self.range_length = end - start + 1
+        self.send_header('Content-Type', 'application/x-netcdf')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(self.range_length))
+        self.end_headers()
+
+        return file
+
+    ### FUNCTION:
+    def copyfile(self, source, outputfile):
+
+        '''
+        Copy the requested byte range to the client, throttled to the configured bandwidth.
+        '''
+
+        remaining = self.range_length
+        while remaining > 0:
+            block = source.read(min(self.block_size, remaining))
+            if not block:
+                break
+            outputfile.write(block)
+            remaining -= len(block)
+            if self.bandwidth:
+                time.sleep(len(block) / self.bandwidth)
+
+        if self.statistics is not None:
+            with self.statistics_lock:
+                self.statistics['requests'] += 1
+                self.statistics['bytes_served'] += self.range_length - remaining
+
+### FUNCTION:
+def standin_serve(directory, host="127.0.0.1", port=8080, latency=0.0, bandwidth=None, background=True):
+
+    '''
+    Serve a directory of model files over HTTP with byte-range support, as a local stand-in for the THREDDS/OPeNDAP and Copernicus servers.
+
+    Args:
+    - directory (str): Directory of the model files.
+    - host (str): Host to bind.
+        - default: '127.0.0.1'
+    - port (int): Port to bind (0 picks a free port).
+        - default: 8080
+    - latency (float): Simulated latency added to every request, in seconds.
+        - default: 0.0
+    - bandwidth (float or None): Simulated bandwidth in bytes per second. None is unthrottled.
+        - default: None
+    - background (bool): Serve from a daemon thread and return immediately, instead of serving forever.
+        - default: True
+
+    Returns:
+    - server (http.server.ThreadingHTTPServer): The running server. Its 'statistics' attribute counts requests and bytes served.
+    '''
+
+    statistics = {'requests': 0, 'bytes_served': 0}
+    handler = type('StandinHandler', (StandinRequestHandler,), {
+        'latency': latency,
+        'bandwidth': bandwidth,
+        'statistics': statistics,
+        '__init__': lambda self, *args, **kwargs: StandinRequestHandler.__init__(self, *args, directory=directory, **kwargs)
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.statistics = statistics
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+
+    print(f"Stand-in server serving {directory} at {server.base_url} (latency {latency} s, bandwidth {bandwidth or 'unlimited'} B/s)")
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+
+    return server
+
+### FUNCTION:
+def standin_endpoints(base_url, fixture_files):
+
+    '''
+    Build the model endpoint configuration pointing the model classes at a stand-in server.
+
+    Args:
+    - base_url (str): Base URL of the stand-in server.
+    - fixture_files (dict): File name per model key.
+
+    Returns:
+    - endpoints (dict): Endpoint URL per model key, for config['MODEL']['endpoints']. '#mode=bytes' makes netCDF open the file lazily with HTTP range requests.
+    '''
+
+    endpoints = {model_key: f"{base_url}/{file_name}#mode=bytes" for model_key, file_name in fixture_files.items()}
+
+    return endpoints
@@ -0,0 +1,464 @@
+# =========================
+# IMPORTS
+# =========================
+
+import datetime as dt
+import json
+import netCDF4
+from numcodecs import Blosc
+import os
+import pandas as pd
+import shutil
+import time
+import xarray as xr
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# =========================
+
+STORAGE_LAYOUTS = ('map', 'profile', 'balanced')
+STORAGE_KEEP_ENCODING = ('dtype', '_FillValue', 'scale_factor', 'add_offset', 'units', 'calendar')
+STORAGE_TIME_ENCODING = {'units': 'hours since 1970-01-01', 'calendar': 'standard', 'dtype': 'float64'}
+
+# STORAGE FUNCTIONS
+
+### FUNCTION:
+def storage_chunks(dataset, layout="balanced"):
+
+    '''
+    Calculate the chunk shape of every dimension of a dataset for a storage layout.
+
+    Args:
+    - dataset (xarray.Dataset): The dataset to chunk.
+    - layout (str): Chunk layout. Options:
+        - 'map': one vertical level per chunk with large horizontal tiles, for reading per-bin (or per-depth) map slabs.
+        - 'profile': full water columns in small horizontal tiles, for reading vertical profiles.
+        - 'balanced': medium horizontal tiles and vertical blocks, a compromise between both access patterns.
+        - default: 'balanced'
+
+    Returns:
+    - chunks (dict): Chunk size per dimension.
+    '''
+
+    if layout not in STORAGE_LAYOUTS:
+        raise ValueError(f"Invalid storage layout: {layout}. Options: {', '.join(STORAGE_LAYOUTS)}.")
+
+    horizontal_chunk = {'map': 512, 'profile': 16, 'balanced': 64}[layout]
+    vertical_chunk = {'map': 1, 'profile': None, 'balanced': 50}[layout]
+
+    chunks = {}
+    for dim, size in dataset.sizes.items():
+        if dim == 'time':
+            chunks[dim] = 1
+        elif dim in ('bin', 'depth'):
+            chunks[dim] = size if vertical_chunk is None else min(size, vertical_chunk)
+        else:
+            chunks[dim] = min(size, horizontal_chunk)
+
+    return chunks
+
+### FUNCTION:
+def storage_save(dataset, path, storage_format="netcdf", layout="balanced", compression_level=4):
+
+    '''
+    Save a GGS dataset as chunked, compressed NetCDF4 or Zarr.
+
+    Args:
+    - dataset (xarray.Dataset): The dataset to save.
+    - path (str): Output path without extension. '.nc' or '.zarr' is appended based on the storage format.
+    - storage_format (str): Storage format. Options: 'netcdf' (NetCDF4 with zlib and shuffle) or 'zarr' (Blosc zstd with shuffle).
+        - default: 'netcdf'
+    - layout (str): Chunk layout. Options: 'map', 'profile' or 'balanced'.
+        - default: 'balanced'
+    - compression_level (int): Compression level.
+        - default: 4
+
+    Returns:
+    - output_path (str): The path of the saved dataset.
+    '''
+
+    start_time = time.perf_counter()
+
+    dataset = dataset.copy()
+    for variable in dataset.variables.values():
+        variable.encoding = {key: value for key, value in variable.encoding.items() if key in STORAGE_KEEP_ENCODING}
+
+    chunks = storage_chunks(dataset, layout=layout)
+    unlimited_dims = ['time'] if 'time' in dataset.dims else None
+
+    if storage_format == "zarr":
+        output_path = f"{path}.zarr"
+        compressor = Blosc(cname='zstd', clevel=compression_level, shuffle=Blosc.SHUFFLE)
+        encoding = {name: {'compressor': compressor} for name in dataset.data_vars}
+        dataset.chunk(chunks).to_zarr(output_path, mode='w', encoding=encoding, consolidated=True)
+    elif storage_format == "netcdf":
+        output_path = f"{path}.nc"
+        encoding = {}
+        for name, variable in dataset.data_vars.items():
+            if variable.dtype.kind not in 'biuf' or variable.ndim == 0:
+                continue
+            encoding[name] = {
+                'zlib': True,
+                'shuffle': True,
+                'complevel': compression_level,
+                'chunksizes': tuple(chunks[dim] for dim in variable.dims)
+            }
+        dataset.to_netcdf(output_path, engine='netcdf4', format='NETCDF4', encoding=encoding, unlimited_dims=unlimited_dims)
+    else:
+        raise ValueError(f"Invalid storage format: {storage_format}. Options: 'netcdf' or 'zarr'.")
+
+    write_time = time.perf_counter() - start_time
+    print(f"Saved {output_path} ({storage_size(output_path) / 1e6:.1f} MB, {layout} layout) in {write_time:.2f} s")
+
+    return output_path
+
+### FUNCTION:
+def storage_open(path, chunks=None):
+
+    '''
+    Lazily open a GGS dataset saved as NetCDF or Zarr.
+
+    Args:
+    - path (str): Path of the '.nc' file or '.zarr' store.
+    - chunks (dict or None): Dask chunks to open with. None opens without dask.
+        - default: None
+
+    Returns:
+    - dataset (xarray.Dataset): The lazily opened dataset.
+    '''
+
+    if path.rstrip(os.sep).endswith('.zarr'):
+        return xr.open_zarr(path, chunks=chunks, consolidated=True)
+
+    return xr.open_dataset(path, chunks=chunks)
+
+### FUNCTION:
+def storage_size(path):
+
+    '''
+    Calculate the size on disk of a file or a directory store.
+
+    Args:
+    - path (str): Path of the file or directory.
+
+    Returns:
+    - size (int): Size in bytes.
+    '''
+
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+
+    return os.path.getsize(path)
+
+### FUNCTION:
+def storage_config(config, kind):
+
+    '''
+    Read the storage settings for a dataset kind from the configuration.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - kind (str): Dataset kind. Options: 'model', 'depth_average' or 'bin_average'.
+
+    Returns:
+    - settings (dict): Keyword arguments for 'storage_save' (storage_format, layout and compression_level).
+    '''
+
+    default_layouts = {'model': 'balanced', 'depth_average': 'map', 'bin_average': 'balanced'}
+    model_config = config['MODEL']
+    layouts = model_config.get('storage_layout') or {}
+
+    settings = {
+        'storage_format': model_config.get('storage_format', 'netcdf'),
+        'layout': layouts.get(kind, default_layouts[kind]) if isinstance(layouts, dict) else layouts,
+        'compression_level': model_config.get('storage_compression', 4)
+    }
+
+    return settings
+
+### FUNCTION:
+def storage_read_attrs(path):
+
+    '''
+    Read the global attributes of a GGS dataset saved as NetCDF or Zarr without opening its variables.
+
+    Args:
+    - path (str): Path of the '.nc' file or '.zarr' store.
+
+    Returns:
+    - attrs (dict): Global attributes of the dataset.
+    '''
+
+    if path.rstrip(os.sep).endswith('.zarr'):
+        for metadata_file in ('.zmetadata', '.zattrs'):
+            metadata_path = os.path.join(path, metadata_file)
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as file:
+                    metadata = json.load(file)
+                return metadata['metadata'].get('.zattrs', {}) if metadata_file == '.zmetadata' else metadata
+        return {}
+
+    with netCDF4.Dataset(path, 'r') as dataset:
+        attrs = {name: dataset.getncattr(name) for name in dataset.ncattrs()}
+
+    return attrs
+
+### FUNCTION:
+def storage_group_files(paths):
+
+    '''
+    Group GGS dataset files by model datetime and model name using only their metadata.
+
+    Args:
+    - paths (list): Paths of '.nc' files or '.zarr' stores.
+
+    Returns:
+    - groups (dict): Model datetime (ISO format) mapped to a dictionary of model name to path, sorted by datetime.
+    '''
+
+    groups = {}
+    for path in paths:
+        try:
+            attrs = storage_read_attrs(path)
+            model_datetime = pd.Timestamp(attrs['model_datetime']).tz_localize(None).strftime('%Y-%m-%dT%H:%M:%SZ')
+            model_name = attrs['model_name']
+        except Exception as e:
+            print(f"Skipping {path}, missing GGS metadata: {e}")
+            continue
+        if model_name in groups.setdefault(model_datetime, {}):
+            print(f"Duplicate {model_name} file for {model_datetime}: {path}, keeping {groups[model_datetime][model_name]}")
+            continue
+        groups[model_datetime][model_name] = path
+
+    return dict(sorted(groups.items()))
+
+# ROLLING STORE FUNCTIONS
+
+### FUNCTION:
+def storage_store_path(directory, mission_name, model_name, storage_format="zarr"):
+
+    '''
+    Build the path of the rolling depth average store of a mission and model.
+
+    Args:
+    - directory (str): Store directory.
+    - mission_name (str): Name of the mission.
+    - model_name (str): Name of the model.
+    - storage_format (str): Storage format. Options: 'netcdf' or 'zarr'.
+        - default: 'zarr'
+
+    Returns:
+    - store_path (str): Path of the store.
+    '''
+
+    extension = 'zarr' if storage_format == "zarr" else 'nc'
+    store_path = os.path.join(directory, f"{mission_name}_{model_name}_DepthAverage_Store.{extension}")
+
+    return store_path
+
+### FUNCTION:
+def storage_store_times(store_path):
+
+    '''
+    Read the time index of a rolling store.
+
+    Args:
+    - store_path (str): Path of the store.
+
+    Returns:
+    - times (dict): Store position and issue time per model datetime (ISO format), empty if the store does not exist.
+    '''
+
+    index_path = f"{store_path.rstrip(os.sep)}.index.json"
+    if os.path.exists(index_path):
+        with open(index_path) as file:
+            return json.load(file)
+    if not os.path.exists(store_path):
+        return {}
+
+    with storage_open(store_path) as store:
+        time_values = pd.to_datetime(store['time'].values)
+    times = {time_value.isoformat(): {'position': position, 'issued': None} for position, time_value in enumerate(time_values)}
+
+    return times
+
+### FUNCTION:
+def storage_append(dataset, store_path, layout="map", compression_level=4):
+
+    '''
+    Append a depth average time slice to a rolling store along the unlimited 'time' dimension.
+    A re-issued forecast time overwrites its existing slice in place instead of being appended again.
+
+    Args:
+    - dataset (xarray.Dataset): Depth average dataset with a single time step and a 'model_datetime' attribute.
+    - store_path (str): Path of the store ('.zarr' or '.nc').
+    - layout (str): Chunk layout used when the store is created. Options: 'map', 'profile' or 'balanced'.
+        - default: 'map'
+    - compression_level (int): Compression level used when the store is created.
+        - default: 4
+
+    Returns:
+    - position (int): Position of the slice along the store 'time' dimension.
+    '''
+
+    model_datetime = pd.Timestamp(dataset.attrs['model_datetime']).tz_localize(None)
+    time_key = model_datetime.isoformat()
+    dataset = dataset.assign_coords(time=[model_datetime.to_datetime64()])
+    dataset.attrs = {key: value for key, value in dataset.attrs.items() if key != 'model_datetime'}
+
+    storage_format = "zarr" if store_path.rstrip(os.sep).endswith('.zarr') else "netcdf"
+    store_directory = os.path.dirname(store_path)
+    os.makedirs(store_directory, exist_ok=True)
+    index_path = f"{store_path.rstrip(os.sep)}.index.json"
+
+    with open(f"{store_path.rstrip(os.sep)}.lock", 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        times = storage_store_times(store_path)
+        if not times:
+            dataset['time'].encoding = dict(STORAGE_TIME_ENCODING)
+            storage_save(dataset, os.path.splitext(store_path.rstrip(os.sep))[0], storage_format=storage_format, layout=layout, compression_level=compression_level)
+            position = 0
+        else:
+            position = times[time_key]['position'] if time_key in times else len(times)
+            action = "Overwrote" if time_key in times else "Appended"
+            time_dataset = dataset.drop_vars([name for name, variable in dataset.variables.items() if 'time' not in variable.dims])
+            if storage_format == "zarr":
+                for variable in time_dataset.variables.values():
+                    variable.encoding = {}
+                if time_key in times:
+                    time_dataset.to_zarr(store_path, mode='r+', region={'time': slice(position, position + 1)}, consolidated=True)
+                else:
+                    time_dataset.to_zarr(store_path, mode='a', append_dim='time', consolidated=True)
+            else:
+                with netCDF4.Dataset(store_path, 'a') as store:
+                    store_time = store.variables['time']
+                    store_time[position] = netCDF4.date2num(model_datetime.to_pydatetime(), store_time.units, getattr(store_time, 'calendar', 'standard'))
+                    for name, variable in time_dataset.data_vars.items():
+                        if store.variables[name].shape[1:] != variable.shape[1:]:
+                            raise ValueError(f"Grid of {name} does not match the store grid: {variable.shape[1:]} != {store.variables[name].shape[1:]}.")
+                        store.variables[name][position] = variable.values[0]
+            print(f"{action} {time_key} at position {position} of {store_path}")
+
+        times[time_key] = {'position': position, 'issued': dt.datetime.now(dt.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+        with open(index_path, 'w') as file:
+            json.dump(dict(sorted(times.items())), file, indent=2)
+
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return position
+
+### FUNCTION:
+def storage_load_range(store_path, start_datetime=None, end_datetime=None):
+
+    '''
+    Load the depth average time slices of a rolling store within a datetime range.
+    Slices appended in time order are read as a single contiguous block.
+
+    Args:
+    - store_path (str): Path of the store.
+    - start_datetime (str or None): Start of the range (inclusive). None for the first slice.
+        - default: None
+    - end_datetime (str or None): End of the range (inclusive). None for the last slice.
+        - default: None
+
+    Returns:
+    - dataset (xarray.Dataset): The time slices within the range, sorted by time.
+    '''
+
+    times = storage_store_times(store_path)
+    start = pd.Timestamp(start_datetime).tz_localize(None) if start_datetime else pd.Timestamp.min
+    end = pd.Timestamp(end_datetime).tz_localize(None) if end_datetime else pd.Timestamp.max
+    positions = sorted(entry['position'] for key, entry in times.items() if start <= pd.Timestamp(key) <= end)
+
+    store = storage_open(store_path)
+    if not positions:
+        return store.isel(time=slice(0, 0))
+    if positions[-1] - positions[0] + 1 == len(positions):
+        dataset = store.isel(time=slice(positions[0], positions[-1] + 1))
+    else:
+        dataset = store.isel(time=positions)
+    dataset = dataset.sortby('time').load()
+    store.close()
+
+    return dataset
+
+# STORAGE REPORT FUNCTIONS
+
+### FUNCTION:
+def storage_report(dataset, directory, name="storage_report", storage_formats=("netcdf", "zarr"), layouts=STORAGE_LAYOUTS, keep_files=False):
+
+    '''
+    Measure write time, size on disk and read time of the map and profile access patterns for every storage format and layout.
+
+    Args:
+    - dataset (xarray.Dataset): The dataset to measure (typically a bin average dataset).
+    - directory (str): Directory for the measurement files and the JSON report.
+    - name (str): Base name of the measurement files and report.
+        - default: 'storage_report'
+    - storage_formats (tuple): Storage formats to measure.
+        - default: ('netcdf', 'zarr')
+    - layouts (tuple): Chunk layouts to measure.
+        - default: ('map', 'profile', 'balanced')
+    - keep_files (bool): Keep the measurement files instead of deleting them.
+        - default: False
+
+    Returns:
+    - report (list): One dictionary of measurements per (format, layout).
+    '''
+
+    print(f"\n### MEASURING STORAGE LAYOUTS: {name} ###\n")
+
+    os.makedirs(directory, exist_ok=True)
+    vertical_dim = next((dim for dim in ('bin', 'depth') if dim in dataset.dims), None)
+    horizontal_dims = [dim for dim in dataset.dims if dim not in ('time', 'bin', 'depth')]
+    column_index = {dim: dataset.sizes[dim] // 2 for dim in horizontal_dims}
+
+    report = []
+    for storage_format in storage_formats:
+        for layout in layouts:
+            start_time = time.perf_counter()
+            output_path = storage_save(dataset, os.path.join(directory, f"{name}_{layout}"), storage_format=storage_format, layout=layout)
+            write_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            with storage_open(output_path) as stored:
+                map_slab = stored.isel({vertical_dim: 0}) if vertical_dim else stored
+                map_slab.load()
+            map_read_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            with storage_open(output_path) as stored:
+                stored.isel(column_index).load()
+            profile_read_time = time.perf_counter() - start_time
+
+            report.append({
+                'storage_format': storage_format,
+                'layout': layout,
+                'write_time_s': write_time,
+                'size_mb': storage_size(output_path) / 1e6,
+                'map_read_time_s': map_read_time,
+                'profile_read_time_s': profile_read_time
+            })
+
+            if not keep_files:
+                if os.path.isdir(output_path):
+                    shutil.rmtree(output_path)
+                else:
+                    os.remove(output_path)
+
+    print(f"{'Format':<8} {'Layout':<9} {'Write (s)':>10} {'Size (MB)':>10} {'Map read (s)':>13} {'Profile read (s)':>17}")
+    for entry in report:
+        print(f"{entry['storage_format']:<8} {entry['layout']:<9} {entry['write_time_s']:>10.2f} {entry['size_mb']:>10.1f} {entry['map_read_time_s']:>13.3f} {entry['profile_read_time_s']:>17.3f}")
+
+    report_path = os.path.join(directory, f"{name}.json")
+    with open(report_path, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Storage report saved to: {report_path}")
+
+    return report
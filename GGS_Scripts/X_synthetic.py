@@ -0,0 +1,354 @@
+# =========================
+# IMPORTS
+# =========================
+
+import numpy as np
+import os
+import pandas as pd
+import xarray as xr
+
+# =========================
+
+# SYNTHETIC GRID FUNCTIONS
+
+### FUNCTION:
+def synthetic_depths(num_depths=40, max_depth=1000):
+
+    '''
+    Generate model depth levels that are dense near the surface and reach past the mission maximum depth.
+
+    Args:
+    - num_depths (int): Number of depth levels.
+        - default: 40
+    - max_depth (int): Mission maximum depth in meters.
+        - default: 1000
+
+    Returns:
+    - depths (numpy.ndarray): Unique, increasing depth levels in meters, starting at 0.
+    '''
+
+    depths = np.unique(np.round(np.linspace(0, 1, num_depths) ** 2 * max_depth * 1.5))
+
+    return depths.astype(np.float32)
+
+### FUNCTION:
+def synthetic_currents(longitude, latitude, depths, time_offset=0.0, seed=0):
+
+    '''
+    Generate a smooth eddy field of u/v currents with depth decay, an island land mask and a variable sea floor.
+
+    Args:
+    - longitude (numpy.ndarray): 2D longitude grid.
+    - latitude (numpy.ndarray): 2D latitude grid.
+    - depths (numpy.ndarray): Depth levels in meters.
+    - time_offset (float): Phase shift of the eddies (in fractions of a cycle) for successive time steps.
+        - default: 0.0
+    - seed (int): Random seed of the eddy centers and the sea floor.
+        - default: 0
+
+    Returns:
+    - u (numpy.ndarray): Eastward current (depth, y, x) in m/s, NaN on land and below the sea floor.
+    - v (numpy.ndarray): Northward current (depth, y, x) in m/s, NaN on land and below the sea floor.
+    '''
+
+    rng = np.random.default_rng(seed)
+    lon_min, lon_max = longitude.min(), longitude.max()
+    lat_min, lat_max = latitude.min(), latitude.max()
+    lon_norm = (longitude - lon_min) / max(lon_max - lon_min, 1e-6)
+    lat_norm = (latitude - lat_min) / max(lat_max - lat_min, 1e-6)
+
+    phase = 2 * np.pi * time_offset
+    streamfunction = np.sin(np.pi * lat_norm) * np.sin(2 * np.pi * lon_norm + phase)
+    for center_lon, center_lat, radius, strength in zip(rng.uniform(0.2, 0.8, 3), rng.uniform(0.2, 0.8, 3), rng.uniform(0.05, 0.15, 3), rng.choice([-1, 1], 3)):
+        streamfunction += strength * np.exp(-((lon_norm - center_lon) ** 2 + (lat_norm - center_lat) ** 2) / radius ** 2)
+    streamfunction_dy, streamfunction_dx = np.gradient(streamfunction)
+    speed_scale = 0.8 / max(np.hypot(streamfunction_dx, streamfunction_dy).max(), 1e-12)
+    surface_u = -streamfunction_dy * speed_scale
+    surface_v = streamfunction_dx * speed_scale
+
+    decay = np.exp(-depths / 400.0)[:, None, None]
+    u = surface_u[None, :, :] * decay
+    v = surface_v[None, :, :] * decay
+
+    island = ((lon_norm - 0.3) ** 2 + (lat_norm - 0.7) ** 2) < 0.05 ** 2
+    sea_floor = depths.max() * (0.3 + 0.7 * np.clip(lon_norm + 0.1 * rng.standard_normal(lon_norm.shape), 0, 1))
+    invalid = island[None, :, :] | (depths[:, None, None] > sea_floor[None, :, :])
+    u[invalid] = np.nan
+    v[invalid] = np.nan
+
+    return u.astype(np.float32), v.astype(np.float32)
+
+### FUNCTION:
+def synthetic_extent(config, padding=1.0):
+
+    '''
+    Calculate the padded latitude and longitude bounds of a mission extent.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - padding (float): Padding in degrees around the mission extent.
+        - default: 1.0
+
+    Returns:
+    - bounds (tuple): (min_lat, max_lat, min_lon, max_lon) in degrees.
+    '''
+
+    lats, lons = zip(*config['MISSION']['extent'])
+    bounds = (min(lats) - padding, max(lats) + padding, min(lons) - padding, max(lons) + padding)
+
+    return bounds
+
+# SYNTHETIC MODEL FUNCTIONS
+
+### FUNCTION:
+def synthetic_rtofs(config, grid_size=(300, 300), num_depths=40, num_times=4, datetime_index="2024-01-01T00:00:00Z", seed=0):
+
+    '''
+    Generate a raw RTOFS-style dataset: curvilinear 'y'/'x' grid with 2D 'lat'/'lon', several time steps and variables 'u'/'v'.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - grid_size (tuple): Number of (y, x) grid points.
+        - default: (300, 300)
+    - num_depths (int): Number of depth levels.
+        - default: 40
+    - num_times (int): Number of 6-hourly time steps, starting at the datetime index.
+        - default: 4
+    - datetime_index (str): First datetime of the dataset.
+        - default: '2024-01-01T00:00:00Z'
+    - seed (int): Random seed.
+        - default: 0
+
+    Returns:
+    - rtofs_raw (xarray.Dataset): Raw RTOFS-style dataset, as passed to 'RTOFS.rtofs_standardize'.
+    '''
+
+    min_lat, max_lat, min_lon, max_lon = synthetic_extent(config)
+    num_y, num_x = grid_size
+    y = np.arange(num_y)
+    x = np.arange(num_x)
+    lon_1d = np.linspace(min_lon, max_lon, num_x)
+    lat_1d = np.linspace(min_lat, max_lat, num_y)
+    # The warp vanishes on the first row and column, which the loader interpolates on, so they stay monotonic.
+    warp = 0.25 * np.outer(np.sin(np.linspace(0, np.pi, num_y)), np.sin(np.linspace(0, np.pi, num_x)))
+    longitude = lon_1d[None, :] + warp * (lon_1d[1] - lon_1d[0])
+    latitude = lat_1d[:, None] + warp * (lat_1d[1] - lat_1d[0])
+
+    depths = synthetic_depths(num_depths, config['MISSION']['max_depth'])
+    times = pd.date_range(pd.Timestamp(datetime_index).tz_localize(None), periods=num_times, freq='6h')
+    currents = [synthetic_currents(longitude, latitude, depths, time_offset=i / 16, seed=seed) for i in range(num_times)]
+
+    rtofs_raw = xr.Dataset({
+        'u': (('time', 'depth', 'y', 'x'), np.stack([u for u, _ in currents])),
+        'v': (('time', 'depth', 'y', 'x'), np.stack([v for _, v in currents]))
+    }, coords={
+        'time': times.values,
+        'depth': depths,
+        'y': y,
+        'x': x,
+        'lat': (('y', 'x'), latitude),
+        'lon': (('y', 'x'), longitude)
+    })
+
+    return rtofs_raw
+
+### FUNCTION:
+def synthetic_cmems(config, grid_size=(300, 300), num_depths=40, datetime_index="2024-01-01T00:00:00Z", seed=1):
+
+    '''
+    Generate a raw CMEMS-style dataset: rectilinear 'latitude'/'longitude' grid, a single time step and variables 'uo'/'vo'.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - grid_size (tuple): Number of (latitude, longitude) grid points.
+        - default: (300, 300)
+    - num_depths (int): Number of depth levels.
+        - default: 40
+    - datetime_index (str): Datetime of the dataset.
+        - default: '2024-01-01T00:00:00Z'
+    - seed (int): Random seed.
+        - default: 1
+
+    Returns:
+    - cmems_raw (xarray.Dataset): Raw CMEMS-style dataset, as passed to 'CMEMS.cmems_standardize'.
+    '''
+
+    min_lat, max_lat, min_lon, max_lon = synthetic_extent(config, padding=0.0)
+    num_lat, num_lon = grid_size
+    lat_1d = np.linspace(min_lat, max_lat, num_lat)
+    lon_1d = np.linspace(min_lon, max_lon, num_lon)
+    longitude, latitude = np.meshgrid(lon_1d, lat_1d)
+
+    depths = synthetic_depths(num_depths, config['MISSION']['max_depth']) + np.float32(0.494)
+    u, v = synthetic_currents(longitude, latitude, depths, seed=seed)
+
+    cmems_raw = xr.Dataset({
+        'uo': (('time', 'depth', 'latitude', 'longitude'), u[None]),
+        'vo': (('time', 'depth', 'latitude', 'longitude'), v[None])
+    }, coords={
+        'time': [pd.Timestamp(datetime_index).tz_localize(None).to_datetime64()],
+        'depth': depths,
+        'latitude': lat_1d,
+        'longitude': lon_1d
+    })
+
+    return cmems_raw
+
+### FUNCTION:
+def synthetic_gofs(config, grid_size=(300, 300), num_depths=40, num_times=4, datetime_index="2024-01-01T00:00:00Z", seed=2):
+
+    '''
+    Generate a raw GOFS-style dataset: rectilinear 'lat'/'lon' grid with 0-360 longitudes, several time steps and variables 'water_u'/'water_v'.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - grid_size (tuple): Number of (lat, lon) grid points.
+        - default: (300, 300)
+    - num_depths (int): Number of depth levels.
+        - default: 40
+    - num_times (int): Number of 3-hourly time steps, starting at the datetime index.
+        - default: 4
+    - datetime_index (str): First datetime of the dataset.
+        - default: '2024-01-01T00:00:00Z'
+    - seed (int): Random seed.
+        - default: 2
+
+    Returns:
+    - gofs_raw (xarray.Dataset): Raw GOFS-style dataset, as passed to 'GOFS.gofs_standardize'.
+    '''
+
+    min_lat, max_lat, min_lon, max_lon = synthetic_extent(config)
+    num_lat, num_lon = grid_size
+    lat_1d = np.linspace(min_lat, max_lat, num_lat)
+    lon_1d = np.linspace(min_lon, max_lon, num_lon)
+    longitude, latitude = np.meshgrid(lon_1d, lat_1d)
+
+    depths = synthetic_depths(num_depths, config['MISSION']['max_depth'])
+    times = pd.date_range(pd.Timestamp(datetime_index).tz_localize(None), periods=num_times, freq='3h')
+    currents = [synthetic_currents(longitude, latitude, depths, time_offset=i / 32, seed=seed) for i in range(num_times)]
+
+    gofs_raw = xr.Dataset({
+        'water_u': (('time', 'depth', 'lat', 'lon'), np.stack([u for u, _ in currents])),
+        'water_v': (('time', 'depth', 'lat', 'lon'), np.stack([v for _, v in currents]))
+    }, coords={
+        'time': times.values,
+        'depth': depths,
+        'lat': lat_1d,
+        'lon': np.mod(lon_1d, 360)
+    })
+    gofs_raw = gofs_raw.sortby('lon')
+
+    return gofs_raw
+
+# SYNTHETIC MISSION FUNCTIONS
+
+### FUNCTION:
+def synthetic_bathymetry(config, path, resolution=0.05):
+
+    '''
+    Write a GEBCO-style bathymetry file ('elevation' on 'lat'/'lon') covering the mission extent.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - path (str): Output path of the NetCDF file.
+    - resolution (float): Grid resolution in degrees.
+        - default: 0.05
+
+    Returns:
+    - path (str): Output path of the NetCDF file.
+    '''
+
+    min_lat, max_lat, min_lon, max_lon = synthetic_extent(config)
+    lat_1d = np.arange(min_lat, max_lat + resolution, resolution)
+    lon_1d = np.arange(min_lon, max_lon + resolution, resolution)
+    lon_norm = (lon_1d[None, :] - min_lon) / (max_lon - min_lon)
+    lat_norm = (lat_1d[:, None] - min_lat) / (max_lat - min_lat)
+    elevation = -5000 * np.clip(lon_norm, 0.02, 1) * (0.8 + 0.2 * np.cos(2 * np.pi * lat_norm))
+    elevation = np.where(((lon_norm - 0.3) ** 2 + (lat_norm - 0.7) ** 2) < 0.05 ** 2, 50, elevation)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    xr.Dataset({'elevation': (('lat', 'lon'), elevation.astype(np.float32))}, coords={'lat': lat_1d, 'lon': lon_1d}).to_netcdf(path)
+
+    return path
+
+### FUNCTION:
+def synthetic_config(directory, extent=((30.0, -75.0), (40.0, -60.0)), max_depth=1000, mission_name="Synthetic"):
+
+    '''
+    Build a complete Glider Guidance System mission configuration for offline runs, with a synthetic bathymetry file.
+
+    Args:
+    - directory (str): Directory for the synthetic bathymetry file.
+    - extent (tuple): Mission extent as ((min_lat, min_lon), (max_lat, max_lon)).
+        - default: ((30.0, -75.0), (40.0, -60.0))
+    - max_depth (int): Mission maximum depth in meters.
+        - default: 1000
+    - mission_name (str): Mission name.
+        - default: 'Synthetic'
+
+    Returns:
+    - config (dict): Glider Guidance System mission configuration.
+    '''
+
+    (min_lat, min_lon), (max_lat, max_lon) = extent
+    center_lat, center_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    waypoints = [
+        [min_lat + 0.2 * (max_lat - min_lat), min_lon + 0.2 * (max_lon - min_lon)],
+        [center_lat, center_lon],
+        [max_lat - 0.2 * (max_lat - min_lat), max_lon - 0.2 * (max_lon - min_lon)]
+    ]
+
+    config = {
+        'MISSION': {
+            'mission_name': mission_name,
+            'target_date': None,
+            'max_depth': max_depth,
+            'extent': tuple(map(tuple, extent)),
+            'GPS_coords': waypoints,
+            'glider_id': None,
+            'glider_buffer': None
+        },
+        'MODEL': {
+            'single_datetime': True,
+            'enable_rtofs': True,
+            'enable_cmems': True,
+            'enable_gofs': True,
+            'chunk': False,
+            'save_model_data': False,
+            'save_depth_average': False,
+            'save_bin_average': False
+        },
+        'PRODUCT': {
+            'create_magnitude_plot': True,
+            'create_threshold_plot': True,
+            'create_advantage_plot': True,
+            'create_profile_plot': True,
+            'create_gpkg_file': True,
+            'latitude_qc': center_lat,
+            'longitude_qc': center_lon,
+            'density': 3,
+            'mag1': 0.0,
+            'mag2': 0.2,
+            'mag3': 0.3,
+            'mag4': 0.4,
+            'mag5': 0.5,
+            'tolerance': 15,
+            'show_gliders': False,
+            'show_waypoints': True,
+            'show_eez': False,
+            'show_qc': False,
+            'show_basemap': False,
+            'manual_extent': None,
+            'compute_optimal_path': True
+        },
+        'DATA': {
+            'bathymetry_path': None,
+            'eez_path': None
+        },
+        'ADVANCED': {
+            'reprocess': False
+        }
+    }
+    config['DATA']['bathymetry_path'] = synthetic_bathymetry(config, os.path.join(directory, "bathymetry", "synthetic_bathymetry.nc"))
+
+    return config
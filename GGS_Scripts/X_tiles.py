@@ -0,0 +1,389 @@
+# =========================
+# IMPORTS
+# =========================
+
+from concurrent.futures import ProcessPoolExecutor
+import gc
+import hashlib
+import io
+import json
+import numpy as np
+import os
+import sqlite3
+
+from X_dispatch import dispatch_nested_workers
+from X_functions import calculate_bearing, calculate_grid_locator, calculate_pixel_index, format_save_datetime
+from X_render import render_share_dataset, render_attach_dataset, render_release
+from X_lazy import lazy_import
+from X_trace import trace_function
+
+cmo = lazy_import("cmocean.cm")
+mcolors = lazy_import("matplotlib.colors")
+mimage = lazy_import("matplotlib.image")
+
+# =========================
+
+TILE_SIZE = 256
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = np.pi * EARTH_RADIUS
+
+# TILE GRID FUNCTIONS
+
+### FUNCTION:
+def tile_bounds(zoom, tile_x, tile_y):
+
+    '''
+    Calculate the Web Mercator (EPSG:3857) bounds of an XYZ tile.
+
+    Args:
+    - zoom (int): Zoom level.
+    - tile_x (int): Tile column.
+    - tile_y (int): Tile row, counted from the top (XYZ scheme).
+
+    Returns:
+    - bounds (tuple): (min_x, min_y, max_x, max_y) in meters.
+    '''
+
+    tile_span = 2 * ORIGIN_SHIFT / 2**zoom
+    min_x = -ORIGIN_SHIFT + tile_x * tile_span
+    max_y = ORIGIN_SHIFT - tile_y * tile_span
+
+    return (min_x, max_y - tile_span, min_x + tile_span, max_y)
+
+### FUNCTION:
+def tile_range(extent, zoom):
+
+    '''
+    List the XYZ tiles covering a geographic extent at a zoom level.
+
+    Args:
+    - extent (list): Extent as [min_lon, max_lon, min_lat, max_lat].
+    - zoom (int): Zoom level.
+
+    Returns:
+    - tiles (list): List of (zoom, tile_x, tile_y) tuples.
+    '''
+
+    num_tiles = 2**zoom
+
+    def lonlat_to_tile(lon, lat):
+        lat = np.clip(lat, -85.0511, 85.0511)
+        tile_x = int(np.floor((lon + 180) / 360 * num_tiles))
+        tile_y = int(np.floor((1 - np.log(np.tan(np.radians(lat)) + 1 / np.cos(np.radians(lat))) / np.pi) / 2 * num_tiles))
+        return min(max(tile_x, 0), num_tiles - 1), min(max(tile_y, 0), num_tiles - 1)
+
+    min_x, min_y = lonlat_to_tile(extent[0], extent[3])
+    max_x, max_y = lonlat_to_tile(extent[1], extent[2])
+
+    return [(zoom, tile_x, tile_y) for tile_x in range(min_x, max_x + 1) for tile_y in range(min_y, max_y + 1)]
+
+### FUNCTION:
+def tile_pixel_coords(zoom, tile_x, tile_y):
+
+    '''
+    Calculate the longitudes of the pixel columns and the latitudes of the pixel rows (north to south) of a tile.
+
+    Args:
+    - zoom (int): Zoom level.
+    - tile_x (int): Tile column.
+    - tile_y (int): Tile row, counted from the top (XYZ scheme).
+
+    Returns:
+    - pixel_lons (np.ndarray): Pixel column longitudes.
+    - pixel_lats (np.ndarray): Pixel row latitudes.
+    '''
+
+    min_x, min_y, max_x, max_y = tile_bounds(zoom, tile_x, tile_y)
+    pixel_span = (max_x - min_x) / TILE_SIZE
+    x_centers = min_x + (np.arange(TILE_SIZE) + 0.5) * pixel_span
+    y_centers = max_y - (np.arange(TILE_SIZE) + 0.5) * pixel_span
+
+    pixel_lons = np.degrees(x_centers / EARTH_RADIUS)
+    pixel_lats = np.degrees(np.arctan(np.sinh(y_centers / EARTH_RADIUS)))
+
+    return pixel_lons, pixel_lats
+
+# TILE RENDER FUNCTIONS
+
+### FUNCTION:
+def tile_layer_styles(config):
+
+    '''
+    Build the fixed color styles for the tile layers so colors stay consistent across tiles, zoom levels and forecast cycles.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+
+    Returns:
+    - styles (dict): Style parameters per tile layer.
+    '''
+
+    product_config = config['PRODUCT']
+    magnitudes = [product_config[key] for key in ('mag1', 'mag2', 'mag3', 'mag4', 'mag5')]
+
+    styles = {
+        'magnitude': {
+            'max_magnitude': product_config.get('tile_max_magnitude', 1.0)
+        },
+        'threshold': {
+            'levels': magnitudes[1:]
+        },
+        'advantage': None
+    }
+
+    GPS_coords = config['MISSION'].get('GPS_coords')
+    if GPS_coords and len(GPS_coords) >= 2:
+        start_lat, start_lon = GPS_coords[0]
+        end_lat, end_lon = GPS_coords[-1]
+        direct_bearing = calculate_bearing(start_lat, start_lon, end_lat, end_lon)
+        tolerance = product_config['tolerance']
+        styles['advantage'] = {
+            'bearing_lower': float((direct_bearing - tolerance) % 360),
+            'bearing_upper': float((direct_bearing + tolerance) % 360)
+        }
+
+    return styles
+
+### FUNCTION:
+def tile_colorize(layer, style, mag_tile, dir_tile, derived_tile=None):
+
+    '''
+    Convert the sampled field values of a tile into RGBA pixels for a layer.
+
+    Args:
+    - layer (str): Tile layer. Options: 'magnitude', 'threshold' or 'advantage'.
+    - style (dict): Style parameters of the layer.
+    - mag_tile (np.ndarray): Sampled depth-averaged magnitude values.
+    - dir_tile (np.ndarray): Sampled depth-averaged direction values.
+    - derived_tile (np.ndarray or None): Sampled derived field of the layer (threshold classes or advantage mask), used instead of classifying the sampled values.
+        - default: None
+
+    Returns:
+    - rgba (np.ndarray): (TILE_SIZE, TILE_SIZE, 4) uint8 pixel array.
+    '''
+
+    if layer == 'magnitude':
+        norm = mcolors.Normalize(vmin=0, vmax=style['max_magnitude'])
+        rgba = cmo.speed(norm(np.nan_to_num(mag_tile)))
+        rgba[np.isnan(mag_tile), 3] = 0
+    elif layer == 'threshold':
+        colors = mcolors.to_rgba_array(['none', 'yellow', 'orange', 'orangered', 'maroon'])
+        if derived_tile is not None:
+            classes = np.where(derived_tile == 255, 0, derived_tile)
+        else:
+            classes = np.digitize(np.nan_to_num(mag_tile, nan=-np.inf), style['levels'])
+        rgba = colors[classes]
+    else:
+        lower, upper = style['bearing_lower'], style['bearing_upper']
+        if derived_tile is not None:
+            mask = derived_tile.astype(bool)
+        elif lower < upper:
+            mask = (dir_tile >= lower) & (dir_tile <= upper)
+        else:
+            mask = (dir_tile >= lower) | (dir_tile <= upper)
+        rgba = np.zeros(mag_tile.shape + (4,))
+        rgba[mask] = mcolors.to_rgba('purple', alpha=0.5)
+
+    return (rgba * 255).round().astype(np.uint8)
+
+### FUNCTION:
+def tile_render_batch(job):
+
+    '''
+    Render a batch of tiles for every layer, skipping tiles whose data did not change since the last forecast cycle.
+
+    Args:
+    - job (dict): Tile job with the shared depth average descriptor, tiles, layer styles, previous hashes and output settings.
+
+    Returns:
+    - results (list): List of (layer, zoom, tile_x, tile_y, tile_hash, png_bytes) tuples for changed tiles. 'png_bytes' is None for tiles without data.
+    '''
+
+    depth_average, handles = render_attach_dataset(job['descriptor'])
+    results = []
+
+    try:
+        longitude = depth_average['lon'].values
+        latitude = depth_average['lat'].values
+        mag_depth_avg = depth_average['mag_depth_avg'].values.squeeze()
+        dir_depth_avg = depth_average['dir_depth_avg'].values.squeeze()
+
+        tree = calculate_grid_locator(latitude, longitude).tree
+
+        derived_fields = {}
+        styles = job['styles']
+        if 'threshold_class' in depth_average and 'threshold' in styles and np.allclose(depth_average['threshold_class'].attrs['levels'], styles['threshold']['levels']):
+            derived_fields['threshold'] = (depth_average['threshold_class'].values, 255)
+        if 'advantage_route' in depth_average and 'advantage' in styles and np.isclose(depth_average['advantage_route'].attrs['bearing_lower'], styles['advantage']['bearing_lower']) and np.isclose(depth_average['advantage_route'].attrs['bearing_upper'], styles['advantage']['bearing_upper']):
+            derived_fields['advantage'] = (depth_average['advantage_route'].values, 0)
+
+        for zoom, tile_x, tile_y in job['tiles']:
+            pixel_lons, pixel_lats = tile_pixel_coords(zoom, tile_x, tile_y)
+            index, valid = calculate_pixel_index(longitude, latitude, pixel_lons, pixel_lats, tree=tree)
+            mag_tile = np.where(valid, mag_depth_avg[index], np.nan).astype(np.float32)
+            dir_tile = np.where(valid, dir_depth_avg[index], np.nan).astype(np.float32)
+            has_data = bool(np.isfinite(mag_tile).any())
+
+            for layer, style in job['styles'].items():
+                tile_key = f"{layer}/{zoom}/{tile_x}/{tile_y}"
+                tile_hash = hashlib.sha1(json.dumps(style, sort_keys=True).encode() + mag_tile.tobytes() + (dir_tile.tobytes() if layer == 'advantage' else b'')).hexdigest()
+                if job['previous_hashes'].get(tile_key) == tile_hash:
+                    continue
+                png_bytes = None
+                if has_data:
+                    buffer = io.BytesIO()
+                    derived_tile = None
+                    if layer in derived_fields:
+                        field, nodata = derived_fields[layer]
+                        derived_tile = np.where(valid, field[index], nodata)
+                    mimage.imsave(buffer, tile_colorize(layer, style, mag_tile, dir_tile, derived_tile=derived_tile), format='png')
+                    png_bytes = buffer.getvalue()
+                if job['tile_format'] == 'xyz':
+                    tile_path = os.path.join(job['directory'], layer, str(zoom), str(tile_x), f"{tile_y}.png")
+                    if png_bytes is None:
+                        if os.path.exists(tile_path):
+                            os.remove(tile_path)
+                    else:
+                        os.makedirs(os.path.dirname(tile_path), exist_ok=True)
+                        with open(tile_path, 'wb') as file:
+                            file.write(png_bytes)
+                    png_bytes = None
+                results.append((layer, zoom, tile_x, tile_y, tile_hash, png_bytes))
+    finally:
+        depth_average = longitude = latitude = mag_depth_avg = dir_depth_avg = derived_fields = None
+        gc.collect()
+        render_release(handles)
+
+    return results
+
+# TILE STORAGE FUNCTIONS
+
+### FUNCTION:
+def tile_open_mbtiles(mbtiles_path, layer, model_name, extent, zoom_levels):
+
+    '''
+    Open (or create) an MBTiles archive for a tile layer.
+
+    Args:
+    - mbtiles_path (str): Path of the MBTiles file.
+    - layer (str): Tile layer name.
+    - model_name (str): Model name.
+    - extent (list): Extent as [min_lon, max_lon, min_lat, max_lat].
+    - zoom_levels (list): [min_zoom, max_zoom].
+
+    Returns:
+    - connection (sqlite3.Connection): Open connection to the archive.
+    '''
+
+    connection = sqlite3.connect(mbtiles_path)
+    connection.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT)")
+    connection.execute("CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)")
+    connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row)")
+
+    metadata = {
+        'name': f"{model_name} {layer}",
+        'format': 'png',
+        'type': 'overlay',
+        'bounds': f"{extent[0]},{extent[2]},{extent[1]},{extent[3]}",
+        'minzoom': str(zoom_levels[0]),
+        'maxzoom': str(zoom_levels[1])
+    }
+    connection.execute("DELETE FROM metadata")
+    connection.executemany("INSERT INTO metadata (name, value) VALUES (?, ?)", metadata.items())
+
+    return connection
+
+# TILE PRODUCT FUNCTIONS
+
+### FUNCTION:
+@trace_function()
+def GGS_export_tiles(config, directory, datetime_index, model_datasets):
+
+    '''
+    Render the magnitude, threshold and advantage layers into a z/x/y tile pyramid (or one MBTiles archive per layer), regenerating only tiles whose data changed.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - directory (str): Root directory of the tile pyramids. Pyramids are kept per model and valid time so successive forecast cycles only rewrite changed tiles.
+    - datetime_index (str): Datetime index of the model datasets.
+    - model_datasets (list): List of (model, depth average, bin average) dataset tuples.
+
+    Returns:
+    - None
+    '''
+
+    print(f"\n### CREATING MAP TILES ###\n")
+
+    valid_datasets = [datasets for datasets in model_datasets if datasets is not None]
+    if len(valid_datasets) == 0:
+        print("No datasets provided for tile rendering.")
+        return
+
+    product_config = config['PRODUCT']
+    zoom_levels = product_config.get('tile_zoom') or [3, 7]
+    tile_format = product_config.get('tile_format', 'xyz')
+    tile_workers = dispatch_nested_workers(product_config.get('tile_workers'))
+
+    styles = tile_layer_styles(config)
+    if styles['advantage'] is None:
+        print("Insufficient GPS route coordinates provided. Skipping advantage tile layer.")
+        del styles['advantage']
+
+    for _, depth_average, _ in valid_datasets:
+        model_name = depth_average.attrs['model_name']
+        model_directory = os.path.join(directory, model_name, format_save_datetime(datetime_index))
+        os.makedirs(model_directory, exist_ok=True)
+
+        extent = [float(depth_average.lon.min()), float(depth_average.lon.max()), float(depth_average.lat.min()), float(depth_average.lat.max())]
+        tiles = [tile for zoom in range(zoom_levels[0], zoom_levels[1] + 1) for tile in tile_range(extent, zoom)]
+
+        manifest_path = os.path.join(model_directory, "manifest.json")
+        previous_hashes = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as file:
+                previous_hashes = json.load(file).get('tiles', {})
+
+        descriptor, handles = render_share_dataset(depth_average)
+        batch_size = max(1, int(np.ceil(len(tiles) / (tile_workers * 4))))
+        jobs = []
+        for i in range(0, len(tiles), batch_size):
+            batch = tiles[i:i + batch_size]
+            batch_keys = [f"{layer}/{zoom}/{tile_x}/{tile_y}" for layer in styles for zoom, tile_x, tile_y in batch]
+            jobs.append({
+                'descriptor': descriptor,
+                'tiles': batch,
+                'styles': styles,
+                'previous_hashes': {key: previous_hashes[key] for key in batch_keys if key in previous_hashes},
+                'tile_format': tile_format,
+                'directory': model_directory
+            })
+
+        results = []
+        try:
+            if tile_workers <= 1:
+                for job in jobs:
+                    results.extend(tile_render_batch(job))
+            else:
+                with ProcessPoolExecutor(max_workers=min(tile_workers, len(jobs))) as executor:
+                    for batch_results in executor.map(tile_render_batch, jobs):
+                        results.extend(batch_results)
+        finally:
+            render_release(handles, unlink=True)
+
+        if tile_format == 'mbtiles':
+            connections = {layer: tile_open_mbtiles(os.path.join(model_directory, f"{layer}.mbtiles"), layer, model_name, extent, zoom_levels) for layer in styles}
+            for layer, zoom, tile_x, tile_y, _, png_bytes in results:
+                tile_row = 2**zoom - 1 - tile_y
+                connections[layer].execute("DELETE FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?", (zoom, tile_x, tile_row))
+                if png_bytes is not None:
+                    connections[layer].execute("INSERT INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)", (zoom, tile_x, tile_row, sqlite3.Binary(png_bytes)))
+            for connection in connections.values():
+                connection.commit()
+                connection.close()
+
+        for layer, zoom, tile_x, tile_y, tile_hash, _ in results:
+            previous_hashes[f"{layer}/{zoom}/{tile_x}/{tile_y}"] = tile_hash
+        with open(manifest_path, 'w') as file:
+            json.dump({'model_datetime': datetime_index, 'tiles': previous_hashes}, file)
+
+        print(f"{model_name}: {len(results)} of {len(tiles) * len(styles)} tiles regenerated across zoom levels {zoom_levels[0]}-{zoom_levels[1]}.")
@@ -0,0 +1,258 @@
+# =========================
+# IMPORTS
+# =========================
+
+from contextlib import contextmanager
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# =========================
+
+TRACE_STATE = {
+    'events': [],
+    'local': threading.local(),
+    'counters': {}
+}
+TRACE_LOCK = threading.Lock()
+
+# TRACE FUNCTIONS
+
+### FUNCTION:
+def trace_peak_rss():
+
+    '''
+    Calculate the peak resident set size (memory high-water mark) of the current process.
+
+    Returns:
+    - peak_rss_mb (float or None): Peak resident set size in MB, None if unavailable on this platform.
+    '''
+
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / 1e6 if sys.platform == 'darwin' else peak_rss / 1e3
+
+    return peak_rss_mb
+
+### FUNCTION:
+def trace_stack():
+
+    '''
+    Get the stack of active spans of the current thread, so spans running in other threads do not nest under each other.
+
+    Returns:
+    - stack (list): Active spans of the current thread, innermost last.
+    '''
+
+    local = TRACE_STATE['local']
+    if not hasattr(local, 'stack'):
+        local.stack = []
+
+    return local.stack
+
+### FUNCTION:
+@contextmanager
+def trace_span(name, **args):
+
+    '''
+    Record the wall time, CPU time, memory high-water mark and counters of a block of code as a trace event.
+
+    Args:
+    - name (str): Name of the span.
+    - **args: Extra values stored with the event (e.g. model name).
+
+    Returns:
+    - event (dict): The trace event, completed when the block exits.
+    '''
+
+    stack = trace_stack()
+    event = {
+        'name': name,
+        'args': {key: value for key, value in args.items() if value is not None},
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+        'depth': len(stack),
+        'start': time.time(),
+        'counters': {},
+        'status': 'ok'
+    }
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    stack.append(event)
+    try:
+        yield event
+    except BaseException:
+        event['status'] = 'error'
+        raise
+    finally:
+        stack.pop()
+        event['wall_time_s'] = time.perf_counter() - wall_start
+        event['cpu_time_s'] = time.process_time() - cpu_start
+        event['peak_rss_mb'] = trace_peak_rss()
+        TRACE_STATE['events'].append(event)
+        for counter, value in event['counters'].items():
+            if stack:
+                parent_counters = stack[-1]['counters']
+                parent_counters[counter] = parent_counters.get(counter, 0) + value
+        label = ' '.join([name] + [str(value) for value in event['args'].values()])
+        peak_rss = f", peak RSS {event['peak_rss_mb']:.0f} MB" if event['peak_rss_mb'] is not None else ""
+        print(f"[{event['pid']}] {label}: wall {event['wall_time_s']:.2f} s, CPU {event['cpu_time_s']:.2f} s{peak_rss}")
+
+### FUNCTION:
+def trace_function(name=None, arg_names=()):
+
+    '''
+    Decorator that records every call of a function as a trace span.
+
+    Args:
+    - name (str or None): Name of the span. None uses the function name.
+        - default: None
+    - arg_names (tuple): Keyword or positional argument names stored with the event when they are simple values.
+        - default: ()
+
+    Returns:
+    - decorator (callable): The decorator.
+    '''
+
+    def decorator(function):
+        span_name = name or function.__name__
+        parameter_names = function.__code__.co_varnames[:function.__code__.co_argcount]
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            span_args = {}
+            for arg_name in arg_names:
+                value = kwargs.get(arg_name)
+                if value is None and arg_name in parameter_names and parameter_names.index(arg_name) < len(args):
+                    value = args[parameter_names.index(arg_name)]
+                if isinstance(value, (str, int, float, bool)):
+                    span_args[arg_name] = value
+            with trace_span(span_name, **span_args):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+### FUNCTION:
+def trace_count(name, value=1):
+
+    '''
+    Add a value to a counter of the innermost active span of the current thread (and to the process totals).
+
+    Args:
+    - name (str): Name of the counter (e.g. 'bytes_fetched', 'astar_nodes_expanded').
+    - value (int or float): Value to add.
+        - default: 1
+
+    Returns:
+    - None
+    '''
+
+    with TRACE_LOCK:
+        TRACE_STATE['counters'][name] = TRACE_STATE['counters'].get(name, 0) + value
+    stack = trace_stack()
+    if stack:
+        counters = stack[-1]['counters']
+        counters[name] = counters.get(name, 0) + value
+
+### FUNCTION:
+def trace_collect():
+
+    '''
+    Return and clear the trace events and counters recorded in the current process.
+
+    Returns:
+    - events (list): Completed trace events.
+    - counters (dict): Counter totals.
+    '''
+
+    with TRACE_LOCK:
+        events = TRACE_STATE['events']
+        counters = TRACE_STATE['counters']
+        TRACE_STATE['events'] = []
+        TRACE_STATE['counters'] = {}
+
+    return events, counters
+
+# TRACE OUTPUT FUNCTIONS
+
+### FUNCTION:
+def trace_aggregate(events):
+
+    '''
+    Aggregate trace events by span name.
+
+    Args:
+    - events (list): Trace events.
+
+    Returns:
+    - aggregate (dict): Per span name: call count, total and maximum wall time, total CPU time, peak RSS, summed counters and error count.
+    '''
+
+    aggregate = {}
+    for event in events:
+        entry = aggregate.setdefault(event['name'], {'calls': 0, 'wall_time_s': 0.0, 'max_wall_time_s': 0.0, 'cpu_time_s': 0.0, 'peak_rss_mb': None, 'counters': {}, 'errors': 0})
+        entry['calls'] += 1
+        entry['wall_time_s'] += event['wall_time_s']
+        entry['max_wall_time_s'] = max(entry['max_wall_time_s'], event['wall_time_s'])
+        entry['cpu_time_s'] += event['cpu_time_s']
+        if event['peak_rss_mb'] is not None:
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'] or 0, event['peak_rss_mb'])
+        for counter, value in event['counters'].items():
+            entry['counters'][counter] = entry['counters'].get(counter, 0) + value
+        entry['errors'] += event['status'] == 'error'
+
+    return dict(sorted(aggregate.items(), key=lambda item: item[1]['wall_time_s'], reverse=True))
+
+### FUNCTION:
+def trace_export(events, path, chrome=False, metadata=None):
+
+    '''
+    Write a run trace as JSON, optionally with a Chrome trace file (also loadable in speedscope and Perfetto).
+
+    Args:
+    - events (list): Trace events of every process of the run.
+    - path (str): Output path of the trace JSON.
+    - chrome (bool): Also write '<path>.chrome.json' in Chrome trace event format.
+        - default: False
+    - metadata (dict or None): Extra run information stored in the trace.
+        - default: None
+
+    Returns:
+    - aggregate (dict): Per span aggregate of the trace.
+    '''
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    aggregate = trace_aggregate(events)
+    with open(path, 'w') as file:
+        json.dump({'metadata': metadata or {}, 'aggregate': aggregate, 'events': events}, file, indent=2, default=str)
+    print(f"Trace saved to: {path}")
+
+    if chrome:
+        chrome_events = [{
+            'name': event['name'],
+            'cat': 'GGS',
+            'ph': 'X',
+            'ts': event['start'] * 1e6,
+            'dur': event['wall_time_s'] * 1e6,
+            'pid': event['pid'],
+            'tid': event['tid'],
+            'args': {**event['args'], **event['counters'], 'cpu_time_s': event['cpu_time_s'], 'peak_rss_mb': event['peak_rss_mb'], 'status': event['status']}
+        } for event in events]
+        chrome_path = f"{os.path.splitext(path)[0]}.chrome.json"
+        with open(chrome_path, 'w') as file:
+            json.dump({'traceEvents': chrome_events, 'displayTimeUnit': 'ms'}, file, default=str)
+        print(f"Chrome trace saved to: {chrome_path}")
+
+    return aggregate
@@ -0,0 +1,416 @@
+# =========================
+# IMPORTS
+# =========================
+
+import glob
+import numpy as np
+import os
+import pandas as pd
+import xarray as xr
+
+from X_functions import format_save_datetime
+from X_lazy import lazy_import
+from X_storage import storage_save, storage_open
+from X_trace import trace_function
+
+cmo = lazy_import("cmocean.cm")
+plt = lazy_import("matplotlib.pyplot")
+
+# =========================
+
+TRACK_VARIABLES = {
+    'depth_average': ('u_depth_avg', 'v_depth_avg'),
+    'bin_average': ('u_bin_avg', 'v_bin_avg')
+}
+
+# TRACK POINT FUNCTIONS
+
+### FUNCTION:
+def track_distance(latitudes, longitudes):
+
+    '''
+    Calculate the cumulative great circle distance along a track.
+
+    Args:
+    - latitudes (np.ndarray): Track latitudes.
+    - longitudes (np.ndarray): Track longitudes.
+
+    Returns:
+    - distance (np.ndarray): Distance from the first point in kilometers.
+    '''
+
+    latitudes = np.radians(np.asarray(latitudes, dtype=float))
+    longitudes = np.radians(np.asarray(longitudes, dtype=float))
+    a = np.sin(np.diff(latitudes) / 2)**2 + np.cos(latitudes[:-1]) * np.cos(latitudes[1:]) * np.sin(np.diff(longitudes) / 2)**2
+    segments = 2 * np.arcsin(np.sqrt(a)) * 6371.0
+
+    return np.concatenate([[0.0], np.cumsum(segments)])
+
+### FUNCTION:
+def track_points(config, glider_dataframes=None):
+
+    '''
+    Build the points to sample: every glider profile position of the glider tracks, and the mission route ('GPS_coords') densified every 'along_track_spacing' kilometers.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - glider_dataframes (pandas.DataFrame or None): The concatenated glider datasets, indexed by glider and time.
+        - default: None
+
+    Returns:
+    - points (pandas.DataFrame): One row per point with the 'track' name, 'time' (NaT on the route), 'latitude', 'longitude' and along-track 'distance_km'.
+    '''
+
+    tracks = []
+    if glider_dataframes is not None and not glider_dataframes.empty:
+        for glider_id, glider_data in glider_dataframes.groupby(level=0):
+            glider_data = glider_data.droplevel(0)
+            key = glider_data['profile_id'] if 'profile_id' in glider_data.columns else glider_data.index
+            glider_data = glider_data[~pd.Index(key).duplicated()].dropna(subset=['latitude', 'longitude'])
+            if glider_data.empty:
+                continue
+            tracks.append(pd.DataFrame({
+                'track': glider_id,
+                'time': glider_data.index.values,
+                'latitude': glider_data['latitude'].values,
+                'longitude': glider_data['longitude'].values
+            }))
+
+    waypoints = config['MISSION'].get('GPS_coords')
+    if waypoints and len(waypoints) > 1:
+        spacing = config['PRODUCT'].get('along_track_spacing', 5)
+        waypoints = np.array(waypoints, dtype=float)
+        latitudes, longitudes = [waypoints[0, 0]], [waypoints[0, 1]]
+        for (start_lat, start_lon), (end_lat, end_lon) in zip(waypoints[:-1], waypoints[1:]):
+            num_steps = max(1, int(np.ceil(track_distance([start_lat, end_lat], [start_lon, end_lon])[-1] / spacing)))
+            fractions = np.arange(1, num_steps + 1) / num_steps
+            latitudes.extend(start_lat + fractions * (end_lat - start_lat))
+            longitudes.extend(start_lon + fractions * (end_lon - start_lon))
+        tracks.append(pd.DataFrame({
+            'track': "route",
+            'time': pd.NaT,
+            'latitude': latitudes,
+            'longitude': longitudes
+        }))
+
+    if not tracks:
+        return pd.DataFrame(columns=['track', 'time', 'latitude', 'longitude', 'distance_km'])
+
+    for track in tracks:
+        track['distance_km'] = track_distance(track['latitude'].values, track['longitude'].values)
+    points = pd.concat(tracks, ignore_index=True)
+    points['time'] = pd.to_datetime(points['time'])
+
+    return points
+
+# SAMPLING FUNCTIONS
+
+### FUNCTION:
+def track_fractional_index(axis, targets):
+
+    '''
+    Calculate the fractional index of target values along a monotonic 1D coordinate.
+
+    Args:
+    - axis (np.ndarray): 1D coordinate values, ascending or descending.
+    - targets (np.ndarray): Target values.
+
+    Returns:
+    - fraction (np.ndarray): Fractional index of every target.
+    - valid (np.ndarray): Mask of targets within the coordinate range.
+    '''
+
+    indices = np.arange(len(axis), dtype=float)
+    if axis[0] > axis[-1]:
+        axis, indices = axis[::-1], indices[::-1]
+    fraction = np.interp(targets, axis, indices)
+    valid = (targets >= axis[0]) & (targets <= axis[-1])
+
+    return fraction, valid
+
+### FUNCTION:
+def track_sample_space(dataset, variables, latitudes, longitudes):
+
+    '''
+    Interpolate dataset variables bilinearly at many points in one pass. Land (NaN) corners are left out and the remaining corner weights renormalized. Curvilinear (RTOFS) grids are indexed along their first row and column, as their axes are separable within a mission extent.
+
+    Args:
+    - dataset (xarray.Dataset): Depth or bin average dataset with 'lat'/'lon' coordinates (1D or 2D).
+    - variables (tuple): Names of the variables to sample.
+    - latitudes (np.ndarray): Point latitudes.
+    - longitudes (np.ndarray): Point longitudes.
+
+    Returns:
+    - samples (dict): Sampled values per variable, shaped (points,) or (points, bins). Points outside the grid are NaN.
+    '''
+
+    lat_values = dataset['lat'].values
+    lon_values = dataset['lon'].values
+    lat_axis = lat_values if lat_values.ndim == 1 else lat_values[:, 0]
+    lon_axis = lon_values if lon_values.ndim == 1 else lon_values[0, :]
+    grid_dims = ('lat', 'lon') if lat_values.ndim == 1 else dataset['lat'].dims
+
+    y_fraction, y_valid = track_fractional_index(lat_axis, latitudes)
+    x_fraction, x_valid = track_fractional_index(lon_axis, longitudes)
+    y0 = np.floor(y_fraction).astype(int)
+    x0 = np.floor(x_fraction).astype(int)
+    y1 = np.minimum(y0 + 1, len(lat_axis) - 1)
+    x1 = np.minimum(x0 + 1, len(lon_axis) - 1)
+    wy = y_fraction - y0
+    wx = x_fraction - x0
+    corners = [(y0, x0, (1 - wy) * (1 - wx)), (y0, x1, (1 - wy) * wx), (y1, x0, wy * (1 - wx)), (y1, x1, wy * wx)]
+    valid = y_valid & x_valid
+
+    samples = {}
+    for variable in variables:
+        field = dataset[variable]
+        field = field.isel(time=0) if 'time' in field.dims else field
+        field = field.transpose(*grid_dims, ...).values
+        total = 0.0
+        weight_sum = 0.0
+        for y, x, weight in corners:
+            values = field[y, x]
+            weight = weight.reshape(weight.shape + (1,) * (values.ndim - 1))
+            finite = np.isfinite(values)
+            total = total + np.where(finite, values, 0.0) * weight
+            weight_sum = weight_sum + finite * weight
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sampled = np.where(weight_sum > 0, total / weight_sum, np.nan)
+        sampled[~valid] = np.nan
+        samples[variable] = sampled
+
+    return samples
+
+### FUNCTION:
+@trace_function()
+def track_sample_snapshot(config, directory, depth_average, bin_average, glider_dataframes=None):
+
+    '''
+    Sample the depth and bin averages of one model datetime along the glider tracks and the route, and save the samples for the time interpolation of 'GGS_along_track'.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - directory (str): Data output directory of the datetime.
+    - depth_average (xarray.Dataset): Depth average dataset.
+    - bin_average (xarray.Dataset or None): Bin average dataset. None samples the depth average only.
+    - glider_dataframes (pandas.DataFrame or None): The concatenated glider datasets.
+        - default: None
+
+    Returns:
+    - samples_path (str or None): Path of the saved samples, None when there are no points.
+    '''
+
+    points = track_points(config, glider_dataframes)
+    if points.empty:
+        print("No glider tracks or route to sample.")
+        return None
+
+    latitudes = points['latitude'].values
+    longitudes = points['longitude'].values
+    samples = track_sample_space(depth_average, TRACK_VARIABLES['depth_average'], latitudes, longitudes)
+    data_vars = {variable: (('point',), values) for variable, values in samples.items()}
+    coords = {name: (('point',), points[name].values) for name in points.columns}
+    if bin_average is not None:
+        config_bins = config['MISSION']['max_depth'] + 1
+        samples = track_sample_space(bin_average.isel(bin=slice(None, config_bins)), TRACK_VARIABLES['bin_average'], latitudes, longitudes)
+        data_vars.update({variable: (('point', 'bin'), values) for variable, values in samples.items()})
+        coords['bin'] = bin_average['bin'].values[:config_bins]
+
+    model_name = depth_average.attrs['model_name']
+    model_datetime = depth_average.attrs['model_datetime']
+    snapshot = xr.Dataset(data_vars, coords=coords, attrs={'model_name': model_name, 'model_datetime': str(model_datetime)})
+    mission_name = config['MISSION'].get('mission_name', 'UnknownMission')
+    samples_path = storage_save(snapshot, os.path.join(directory, f"{mission_name}_{model_name}_AlongTrackSamples_{format_save_datetime(model_datetime)}"))
+
+    return samples_path
+
+# TIME INTERPOLATION FUNCTIONS
+
+### FUNCTION:
+def track_blend(before, after, weight):
+
+    '''
+    Blend two snapshots linearly, using the available one where the other is NaN.
+
+    Args:
+    - before (np.ndarray): Values at the earlier snapshot.
+    - after (np.ndarray): Values at the later snapshot.
+    - weight (np.ndarray): Weight of the later snapshot per point, broadcast over trailing dimensions.
+
+    Returns:
+    - blended (np.ndarray): Blended values.
+    '''
+
+    weight = weight.reshape(weight.shape + (1,) * (before.ndim - 1))
+    blended = (1 - weight) * before + weight * after
+    blended = np.where(np.isnan(before), after, blended)
+    blended = np.where(np.isnan(after), before, blended)
+
+    return blended
+
+### FUNCTION:
+def track_interpolate_time(snapshots):
+
+    '''
+    Interpolate along-track snapshot samples linearly in time to the glider observation times. Route points have no time and are reported at every snapshot.
+
+    Args:
+    - snapshots (list): Along-track sample datasets of one model, one per datetime, sharing the same points.
+
+    Returns:
+    - depth_table (pandas.DataFrame): One row per glider point and per route point and snapshot, with the depth averaged currents. Glider points outside the snapshot times take the nearest snapshot and are flagged 'extrapolated_in_time' instead of 'interpolated_in_time'.
+    - bin_table (pandas.DataFrame or None): The same rows per depth bin, with the bin averaged currents. None without bin samples.
+    '''
+
+    snapshots = sorted(snapshots, key=lambda snapshot: pd.Timestamp(snapshot.attrs['model_datetime']))
+    snapshot_times = np.array([pd.Timestamp(snapshot.attrs['model_datetime']).tz_localize(None).value for snapshot in snapshots], dtype=float)
+    has_bins = all('u_bin_avg' in snapshot for snapshot in snapshots)
+    variables = TRACK_VARIABLES['depth_average'] + (TRACK_VARIABLES['bin_average'] if has_bins else ())
+    if has_bins:
+        num_bins = min(snapshot.sizes['bin'] for snapshot in snapshots)
+    stacks = {variable: np.stack([snapshot[variable].values[:, :num_bins] if snapshot[variable].ndim == 2 else snapshot[variable].values for snapshot in snapshots]) for variable in variables}
+
+    first = snapshots[0]
+    point_times = pd.to_datetime(first['time'].values)
+    is_route = point_times.isna()
+    glider_points = np.flatnonzero(~is_route)
+    route_points = np.flatnonzero(is_route)
+
+    glider_times = point_times[glider_points].values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    position = np.interp(glider_times, snapshot_times, np.arange(len(snapshots), dtype=float))
+    extrapolated = (glider_times < snapshot_times[0]) | (glider_times > snapshot_times[-1])
+    before = np.floor(position).astype(int)
+    after = np.minimum(before + 1, len(snapshots) - 1)
+    weight = position - before
+
+    rows = {
+        'point': np.concatenate([glider_points, np.tile(route_points, len(snapshots))]),
+        'snapshot': np.concatenate([np.full(len(glider_points), -1), np.repeat(np.arange(len(snapshots)), len(route_points))])
+    }
+    values = {}
+    for variable, stack in stacks.items():
+        glider_values = track_blend(stack[before, glider_points], stack[after, glider_points], weight)
+        route_values = stack[:, route_points].reshape((-1,) + stack.shape[2:])
+        values[variable] = np.concatenate([glider_values, route_values])
+
+    snapshot_datetimes = pd.to_datetime(snapshot_times.astype(np.int64))
+    times = np.where(rows['snapshot'] < 0, first['time'].values[rows['point']], snapshot_datetimes.values[np.maximum(rows['snapshot'], 0)])
+    depth_table = pd.DataFrame({
+        'model': first.attrs['model_name'],
+        'track': first['track'].values[rows['point']],
+        'point': rows['point'],
+        'time': pd.to_datetime(times),
+        'interpolated_in_time': np.concatenate([~extrapolated, np.zeros(len(rows['point']) - len(glider_points), dtype=bool)]),
+        'extrapolated_in_time': np.concatenate([extrapolated, np.zeros(len(rows['point']) - len(glider_points), dtype=bool)]),
+        'latitude': first['latitude'].values[rows['point']],
+        'longitude': first['longitude'].values[rows['point']],
+        'distance_km': first['distance_km'].values[rows['point']],
+        'u_depth_avg': values['u_depth_avg'],
+        'v_depth_avg': values['v_depth_avg']
+    })
+    depth_table['mag_depth_avg'] = np.sqrt(depth_table['u_depth_avg']**2 + depth_table['v_depth_avg']**2)
+    depth_table['dir_depth_avg'] = (np.degrees(np.arctan2(depth_table['v_depth_avg'], depth_table['u_depth_avg'])) + 360) % 360
+
+    bin_table = None
+    if has_bins:
+        bins = first['bin'].values[:num_bins]
+        bin_table = depth_table[['model', 'track', 'point', 'time', 'latitude', 'longitude', 'distance_km']].loc[np.repeat(depth_table.index.values, num_bins)].reset_index(drop=True)
+        bin_table['depth'] = np.tile(bins, len(depth_table))
+        bin_table['u_bin_avg'] = values['u_bin_avg'].ravel()
+        bin_table['v_bin_avg'] = values['v_bin_avg'].ravel()
+        bin_table['mag_bin_avg'] = np.sqrt(bin_table['u_bin_avg']**2 + bin_table['v_bin_avg']**2)
+        bin_table = bin_table.dropna(subset=['mag_bin_avg'])
+
+    return depth_table, bin_table
+
+# PRODUCT FUNCTIONS
+
+### FUNCTION:
+def track_plot_section(depth_table, bin_table, track, path):
+
+    '''
+    Plot the current magnitude section along one track: bin averages against along-track distance and depth, under the depth average. Route sections are averaged over the snapshots.
+
+    Args:
+    - depth_table (pandas.DataFrame): Depth averaged along-track table of one model.
+    - bin_table (pandas.DataFrame): Bin averaged along-track table of one model.
+    - track (str): Track name (glider dataset ID or 'route').
+    - path (str): Path of the figure.
+
+    Returns:
+    - None
+    '''
+
+    track_depth = depth_table[depth_table['track'] == track].groupby('point')[['distance_km', 'mag_depth_avg']].mean()
+    track_bins = bin_table[bin_table['track'] == track].groupby(['depth', 'point'])['mag_bin_avg'].mean().unstack('point')
+    track_bins = track_bins.reindex(columns=track_depth.index)
+    if track_bins.empty:
+        return
+
+    fig, (ax_top, ax_section) = plt.subplots(2, 1, figsize=(12, 8), sharex=True, gridspec_kw={'height_ratios': [1, 3]})
+    ax_top.plot(track_depth['distance_km'], track_depth['mag_depth_avg'], color='black', linewidth=1.5)
+    ax_top.set_ylabel("Depth Avg (m/s)")
+    ax_top.grid(color='lightgrey', linewidth=0.5)
+
+    mesh = ax_section.pcolormesh(track_depth['distance_km'].values, track_bins.index.values, track_bins.values, cmap=cmo.speed, shading='nearest')
+    ax_section.invert_yaxis()
+    ax_section.set_xlabel("Along-Track Distance (km)")
+    ax_section.set_ylabel("Depth (m)")
+    colorbar = fig.colorbar(mesh, ax=[ax_top, ax_section], orientation='vertical', pad=0.02)
+    colorbar.set_label("Current Magnitude (m/s)")
+
+    model_name = depth_table['model'].iloc[0]
+    title = f"{model_name} Along-Track Currents - {'Route (snapshot mean)' if track == 'route' else track.split('-2')[0]}"
+    ax_top.set_title(title, fontsize=12, fontweight='bold')
+    fig.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+### FUNCTION:
+@trace_function()
+def GGS_along_track(config, root_directory, datetime_list):
+
+    '''
+    Combine the along-track samples of a run into tidy tables per model, interpolated linearly in time between the model datetimes, and plot a current section per track.
+
+    Args:
+    - config (dict): Glider Guidance System mission configuration.
+    - root_directory (str): Root output directory of the mission.
+    - datetime_list (list): Datetime indexes of the run.
+
+    Returns:
+    - tables (dict): Paths of the depth and bin average tables per model.
+    '''
+
+    print(f"\n### ALONG-TRACK SAMPLING ###\n")
+
+    mission_name = config['MISSION'].get('mission_name', 'UnknownMission')
+    file_datetimes = {format_save_datetime(datetime_index) for datetime_index in datetime_list}
+    sample_paths = {}
+    for path in sorted(glob.glob(os.path.join(root_directory, "data", "*", f"{mission_name}_*_AlongTrackSamples_*.nc"))):
+        model_name, file_datetime = os.path.basename(path)[len(mission_name) + 1:-3].split('_AlongTrackSamples_')
+        if file_datetime in file_datetimes:
+            sample_paths.setdefault(model_name, []).append(path)
+
+    output_directory = os.path.join(root_directory, "data", "along_track")
+    os.makedirs(output_directory, exist_ok=True)
+    run_label = f"{min(file_datetimes)}_{max(file_datetimes)}" if file_datetimes else "empty"
+    tables = {}
+    for model_name, paths in sample_paths.items():
+        snapshots = [storage_open(path).load() for path in paths]
+        depth_table, bin_table = track_interpolate_time(snapshots)
+
+        depth_path = os.path.join(output_directory, f"{mission_name}_{model_name}_AlongTrack_DepthAverage_{run_label}.csv")
+        depth_table.to_csv(depth_path, index=False)
+        tables[model_name] = {'depth_average': depth_path}
+        print(f"{model_name} along-track depth averages ({len(depth_table)} rows) saved to: {depth_path}")
+
+        if bin_table is not None:
+            bin_path = os.path.join(output_directory, f"{mission_name}_{model_name}_AlongTrack_BinAverage_{run_label}.parquet")
+            bin_table.to_parquet(bin_path, index=False)
+            tables[model_name]['bin_average'] = bin_path
+            print(f"{model_name} along-track bin averages ({len(bin_table)} rows) saved to: {bin_path}")
+            for track in depth_table['track'].unique():
+                track_name = "Route" if track == "route" else track.split('-2')[0]
+                track_plot_section(depth_table, bin_table, track, os.path.join(output_directory, f"{mission_name}_{model_name}_AlongTrack_{track_name}_{run_label}.png"))
+
+    return tables
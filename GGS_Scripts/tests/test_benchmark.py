@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("xarray")
+pytest.importorskip("cartopy")
+pytest.importorskip("cmocean")
+
+from GGS_benchmark import benchmark_case
+from X_render import RENDER_PRODUCTS
+
+
+def test_benchmark_case_runs_every_stage_on_a_tiny_grid():
+    results = benchmark_case(grid_size=(16, 16), num_depths=4, max_depth=50, repeats=1, include_products=True)
+
+    expected = {'RTOFS_standardize', 'interpolate_rtofs', 'interpolate_cmems', 'interpolate_gofs', 'compute_optimal_path', 'GGS_export_gpkg'}
+    expected.update(plot_function.__name__ for _, plot_function in RENDER_PRODUCTS.values())
+    assert expected <= set(results)
+    for measurement in results.values():
+        assert measurement['repeats'] == 1
+        assert measurement['median_s'] >= 0
@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+xr = pytest.importorskip("xarray")
+pytest.importorskip("scipy")
+pytest.importorskip("netCDF4")
+
+import datetime as dt
+import json
+import os
+
+from GGS_main import GGS_analysis
+from X_interpolation import interpolate_cmems
+from X_models import CMEMS
+from X_storage import storage_open, storage_save
+from X_synthetic import synthetic_config, synthetic_cmems
+
+
+def test_products_and_reprocessing_get_the_same_derived_fields_and_optimal_paths(tmp_path):
+    config = synthetic_config(str(tmp_path), max_depth=50)
+    config['PRODUCT']['save_derived_fields'] = True
+    model = CMEMS(username=None, password=None)
+    model.cmems_standardize(config, synthetic_cmems(config, grid_size=(24, 24), num_depths=6), dt.datetime(2024, 1, 1))
+    depth_average, bin_average = interpolate_cmems(config, str(tmp_path), model.data_origin.load(), save_depth_average=False, save_bin_average=False)
+
+    products_directory = tmp_path / "products"
+    reprocess_directory = tmp_path / "reprocess"
+    products_directory.mkdir()
+    reprocess_directory.mkdir()
+    products_datasets, products_paths = GGS_analysis(config, str(products_directory), [(model.data_origin, depth_average, bin_average)])
+
+    depth_average_path = storage_save(depth_average, str(tmp_path / "depth_average"))
+    reprocess_datasets, reprocess_paths = GGS_analysis(config, str(reprocess_directory), [(None, storage_open(depth_average_path), None)])
+
+    assert products_paths[0] is not None
+    assert products_paths == reprocess_paths
+    products_depth_average = products_datasets[0][1]
+    reprocess_depth_average = reprocess_datasets[0][1]
+    for name in ('threshold_class', 'advantage_route', 'advantage_legs'):
+        xr.testing.assert_identical(products_depth_average[name], reprocess_depth_average[name])
+    derived_attrs = {key: value for key, value in products_depth_average.attrs.items() if key.startswith('derived_')}
+    assert derived_attrs
+    assert derived_attrs == {key: value for key, value in reprocess_depth_average.attrs.items() if key.startswith('derived_')}
+
+    summaries = []
+    for directory in (products_directory, reprocess_directory):
+        summary_files = [name for name in os.listdir(directory) if '_DerivedSummary_' in name]
+        assert len(summary_files) == 1
+        with open(directory / summary_files[0]) as file:
+            summaries.append(json.load(file))
+    assert summaries[0] == summaries[1]
@@ -0,0 +1,23 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+from X_dispatch import dispatch_attach_gliders, dispatch_publish_gliders
+
+
+def test_published_gliders_are_attached_as_views_of_the_mapped_file(tmp_path):
+    times = pd.date_range('2024-01-01', periods=100, freq='h')
+    glider_dataframes = pd.DataFrame(
+        {'latitude': np.linspace(30, 31, 200), 'longitude': np.linspace(-75, -74, 200), 'profile_id': np.arange(200)},
+        index=pd.MultiIndex.from_product([['glider-1', 'glider-2'], times], names=['glider', 'time'])
+    )
+
+    glider_path = dispatch_publish_gliders(glider_dataframes, str(tmp_path))
+    attached = dispatch_attach_gliders(glider_path)
+
+    pd.testing.assert_frame_equal(attached, glider_dataframes)
+    for name in ('latitude', 'longitude', 'profile_id'):
+        assert not attached[name].to_numpy().flags.writeable
+    assert dispatch_attach_gliders(None) is None
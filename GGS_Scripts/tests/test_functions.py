@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+pytest.importorskip("xarray")
+
+from X_functions import GridLocator, calculate_grid_locator, calculate_threshold_runs
+
+
+def brute_force_nearest(latitude, longitude, target_lats, target_lons):
+    distances = (latitude.ravel()[None, :] - target_lats[:, None])**2 + (longitude.ravel()[None, :] - target_lons[:, None])**2
+    return np.unravel_index(distances.argmin(axis=1), latitude.shape)
+
+
+def test_grid_locator_matches_brute_force_on_a_curvilinear_grid():
+    rows, columns = np.meshgrid(np.arange(25), np.arange(40), indexing='ij')
+    latitude = 30 + 0.1 * rows + 0.03 * columns + 0.02 * np.sin(columns / 4)
+    longitude = -75 + 0.1 * columns - 0.03 * rows + 0.02 * np.cos(rows / 3)
+    random = np.random.default_rng(46)
+    target_lats = random.uniform(latitude.min(), latitude.max(), 500)
+    target_lons = random.uniform(longitude.min(), longitude.max(), 500)
+
+    locator = GridLocator(latitude, longitude)
+    (y_index, x_index), (lats, lons) = locator.query(target_lats, target_lons)
+
+    expected_y, expected_x = brute_force_nearest(latitude, longitude, target_lats, target_lons)
+    np.testing.assert_array_equal(y_index, expected_y)
+    np.testing.assert_array_equal(x_index, expected_x)
+    np.testing.assert_array_equal(lats, latitude[expected_y, expected_x])
+    np.testing.assert_array_equal(lons, longitude[expected_y, expected_x])
+
+
+@pytest.mark.parametrize("irregular", [False, True])
+def test_grid_locator_matches_brute_force_on_a_rectilinear_grid(irregular):
+    latitude = np.linspace(30, 35, 26)
+    longitude = np.linspace(-75, -70, 41)
+    if irregular:
+        latitude = 30 + 5 * np.linspace(0, 1, 26)**1.5
+    random = np.random.default_rng(46)
+    target_lats = random.uniform(29.5, 35.5, 500)
+    target_lons = random.uniform(-75.5, -69.5, 500)
+
+    (y_index, x_index), _ = GridLocator(latitude, longitude).query(target_lats, target_lons)
+
+    lat_grid, lon_grid = np.meshgrid(latitude, longitude, indexing='ij')
+    expected_y, expected_x = brute_force_nearest(lat_grid, lon_grid, target_lats, target_lons)
+    np.testing.assert_array_equal(y_index, expected_y)
+    np.testing.assert_array_equal(x_index, expected_x)
+
+
+def test_grid_locator_is_shared_per_grid():
+    latitude = np.linspace(30, 35, 11)
+    longitude = np.linspace(-75, -70, 11)
+
+    assert calculate_grid_locator(latitude, longitude) is calculate_grid_locator(latitude.copy(), longitude.copy())
+    assert calculate_grid_locator(latitude, longitude) is not calculate_grid_locator(latitude + 1, longitude)
+
+
+def test_threshold_runs_of_a_hand_built_series():
+    data = [0.6, 0.7, 0.2, 0.5, 0.9, np.nan, 0.8, 0.1, 0.1, 0.6, 0.7, 0.8]
+
+    starts, ends = calculate_threshold_runs(data, 0.5)
+
+    assert starts.tolist() == [0, 4, 6, 9]
+    assert ends.tolist() == [2, 5, 7, 12]
+    assert (ends - starts).tolist() == [2, 1, 1, 3]
+
+
+def test_threshold_runs_without_values_above_the_threshold():
+    starts, ends = calculate_threshold_runs(np.array([0.1, 0.5, np.nan]), 0.5)
+
+    assert starts.size == 0
+    assert ends.size == 0
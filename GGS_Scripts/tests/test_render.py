@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+xr = pytest.importorskip("xarray")
+pytest.importorskip("matplotlib")
+pytest.importorskip("cartopy")
+
+from X_render import render_share_dataset, render_attach_dataset, render_release
+
+
+def test_shared_dataset_round_trip_keeps_scalar_coordinates():
+    dataset = xr.Dataset(
+        {'mag_depth_avg': (('y', 'x'), np.arange(12, dtype=float).reshape(3, 4), {'units': 'm/s'})},
+        coords={
+            'lat': (('y', 'x'), np.linspace(30, 31, 12).reshape(3, 4)),
+            'lon': (('y', 'x'), np.linspace(-75, -74, 12).reshape(3, 4)),
+            'time': np.datetime64('2024-01-01T00:00:00')
+        },
+        attrs={'model_name': 'RTOFS'}
+    )
+
+    descriptor, handles = render_share_dataset(dataset)
+    try:
+        attached, attached_handles = render_attach_dataset(descriptor)
+        try:
+            assert attached['time'].shape == ()
+            assert 'time' in attached.coords
+            xr.testing.assert_identical(attached, dataset)
+        finally:
+            attached = None
+            render_release(attached_handles)
+    finally:
+        render_release(handles, unlink=True)
+
+
+@pytest.mark.parametrize("product", ["magnitude", "threshold"])
+def test_raster_mode_matches_contour_mode_within_tolerance(product):
+    from X_render import render_visual_diff
+
+    lon, lat = np.meshgrid(np.linspace(-75, -70, 60), np.linspace(30, 35, 60))
+    magnitude = 0.25 + 0.2 * np.sin(np.radians(lon * 40)) * np.cos(np.radians(lat * 40))
+    dataset = xr.Dataset(
+        {
+            'mag_depth_avg': (('y', 'x'), magnitude),
+            'dir_depth_avg': (('y', 'x'), np.degrees(np.arctan2(lat - 32.5, lon + 72.5)) % 360)
+        },
+        coords={'lat': (('y', 'x'), lat), 'lon': (('y', 'x'), lon)}
+    )
+    config = {'PRODUCT': {'mag1': 0.0, 'mag2': 0.2, 'mag3': 0.3, 'mag4': 0.4, 'mag5': 0.5, 'tolerance': 15}}
+
+    visual_diff = render_visual_diff(config, dataset, product=product, dpi=40)
+
+    assert visual_diff['difference'].ndim == 2
+    assert visual_diff['mismatch_fraction'] < 0.05
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+xr = pytest.importorskip("xarray")
+pytest.importorskip("netCDF4")
+pytest.importorskip("numcodecs")
+
+from X_storage import storage_append, storage_load_range, storage_store_path, storage_store_times
+
+
+def depth_average(model_datetime, value):
+    return xr.Dataset(
+        {'mag_depth_avg': (('time', 'y', 'x'), np.full((1, 3, 4), value, dtype=float))},
+        coords={
+            'time': [np.datetime64('NaT', 'ns')],
+            'lat': (('y', 'x'), np.linspace(30, 31, 12).reshape(3, 4)),
+            'lon': (('y', 'x'), np.linspace(-75, -74, 12).reshape(3, 4))
+        },
+        attrs={'model_name': 'RTOFS', 'model_datetime': model_datetime}
+    )
+
+
+@pytest.mark.parametrize("storage_format", ["netcdf", "zarr"])
+def test_store_append_keeps_sub_daily_times_and_overwrites_reissued_times(tmp_path, storage_format):
+    if storage_format == "zarr":
+        pytest.importorskip("zarr")
+    store_path = storage_store_path(str(tmp_path), "Mission", "RTOFS", storage_format=storage_format)
+
+    for position, model_datetime in enumerate(['2024-01-01T00:00:00', '2024-01-01T06:00:00', '2024-01-01T12:00:00', '2024-01-02T00:00:00']):
+        assert storage_append(depth_average(model_datetime, position), store_path) == position
+    assert storage_append(depth_average('2024-01-01T06:00:00', 10), store_path) == 1
+
+    assert len(storage_store_times(store_path)) == 4
+    dataset = storage_load_range(store_path)
+    expected = pd.to_datetime(['2024-01-01T00:00:00', '2024-01-01T06:00:00', '2024-01-01T12:00:00', '2024-01-02T00:00:00'])
+    assert (pd.to_datetime(dataset['time'].values) == expected).all()
+    assert dataset['mag_depth_avg'].values[:, 0, 0].tolist() == [0, 10, 2, 3]
+
+    window = storage_load_range(store_path, '2024-01-01T06:00:00', '2024-01-01T12:00:00')
+    assert (pd.to_datetime(window['time'].values) == expected[1:3]).all()
+    assert window['mag_depth_avg'].values[:, 0, 0].tolist() == [10, 2]
+
+    assert storage_load_range(store_path, '2024-01-03T00:00:00').sizes['time'] == 0
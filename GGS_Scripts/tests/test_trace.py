@@ -0,0 +1,37 @@
+import threading
+
+from X_trace import trace_collect, trace_count, trace_span
+
+
+def test_spans_in_different_threads_do_not_nest():
+    trace_collect()
+    opened = threading.Barrier(2)
+    counted = threading.Event()
+
+    def outer():
+        with trace_span("outer"):
+            opened.wait()
+            counted.wait()
+            trace_count('outer_items')
+
+    def inner():
+        opened.wait()
+        with trace_span("inner"):
+            with trace_span("inner_child"):
+                trace_count('inner_items', 2)
+        counted.set()
+
+    threads = [threading.Thread(target=outer), threading.Thread(target=inner)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    events, counters = trace_collect()
+    events = {event['name']: event for event in events}
+    assert events['outer']['depth'] == 0
+    assert events['inner']['depth'] == 0
+    assert events['inner_child']['depth'] == 1
+    assert events['outer']['counters'] == {'outer_items': 1}
+    assert events['inner']['counters'] == {'inner_items': 2}
+    assert counters == {'outer_items': 1, 'inner_items': 2}
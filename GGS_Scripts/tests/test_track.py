@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+xr = pytest.importorskip("xarray")
+pytest.importorskip("netCDF4")
+
+from X_storage import storage_open
+from X_track import track_interpolate_time, track_sample_snapshot
+
+
+def depth_average(model_datetime, u_value):
+    shape = (11, 11)
+    return xr.Dataset(
+        {
+            'u_depth_avg': (('lat', 'lon'), np.full(shape, u_value)),
+            'v_depth_avg': (('lat', 'lon'), np.zeros(shape))
+        },
+        coords={'lat': np.linspace(30, 35, 11), 'lon': np.linspace(-75, -70, 11)},
+        attrs={'model_name': 'RTOFS', 'model_datetime': model_datetime}
+    )
+
+
+def test_glider_points_outside_the_snapshots_are_flagged_as_extrapolated(tmp_path):
+    config = {
+        'MISSION': {'mission_name': 'Mission', 'max_depth': 100, 'GPS_coords': [[31.0, -74.0], [34.0, -71.0]]},
+        'PRODUCT': {'along_track_spacing': 100}
+    }
+    glider_times = pd.to_datetime(['2023-12-31T18:00:00', '2024-01-01T03:00:00', '2024-01-01T09:00:00', '2024-01-01T18:00:00'])
+    gliders = pd.DataFrame(
+        {'latitude': [31.0, 31.5, 32.0, 32.5], 'longitude': [-74.0, -73.5, -73.0, -72.5]},
+        index=pd.MultiIndex.from_product([['glider-1'], glider_times], names=['glider', 'time'])
+    )
+
+    snapshots = []
+    for model_datetime, u_value in (('2024-01-01T12:00:00', 0.3), ('2024-01-01T00:00:00', 0.1)):
+        samples_path = track_sample_snapshot(config, str(tmp_path), depth_average(model_datetime, u_value), None, glider_dataframes=gliders)
+        snapshots.append(storage_open(samples_path).load())
+
+    depth_table, bin_table = track_interpolate_time(snapshots)
+
+    assert bin_table is None
+    glider_rows = depth_table[depth_table['track'] == 'glider-1'].sort_values('time')
+    assert glider_rows['extrapolated_in_time'].tolist() == [True, False, False, True]
+    assert glider_rows['interpolated_in_time'].tolist() == [False, True, True, False]
+    np.testing.assert_allclose(glider_rows['u_depth_avg'], [0.1, 0.15, 0.25, 0.3])
+
+    route_rows = depth_table[depth_table['track'] == 'route']
+    assert len(route_rows) > 0
+    assert not route_rows['interpolated_in_time'].any()
+    assert not route_rows['extrapolated_in_time'].any()
+    assert sorted(route_rows['time'].unique()) == list(pd.to_datetime(['2024-01-01T00:00:00', '2024-01-01T12:00:00']))